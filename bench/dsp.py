@@ -0,0 +1,179 @@
+"""Benchmarks every filter plugin, the gate, filter chains and the whole channel across block sizes; compares against a baseline"""
+
+import os, sys, glob, json, time, wave, tempfile, tracemalloc, importlib.util, numpy as np
+from argparse import ArgumentParser
+from typing import List, Dict, Tuple, Callable, Optional, Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from figaro import params
+from figaro.filters.filter import Filter
+from figaro.vad import Gate
+
+"""The arguments every filter plugin is benchmarked with (`{ir}` = a synthetic impulse response)"""
+ARGS: Dict[str, List[str]] = {
+    'crackle': ['50%'],
+    'echo': ['50%', '.2'],
+    'eq': ['lowshelf:120:3', 'peak:1000:-2:1', 'peak:3000:2:2', 'highshelf:8000:-3'],
+    'highpass': ['100'],
+    'lowpass': ['8000'],
+    'noise': ['10%', 'pink', '0'],
+    'peak': ['1000', '6', '2'],
+    'pitch': ['20'],
+    'reverb': ['{ir}', '30%'],
+    'shelf': ['low', '200', '6'],
+    'trip': ['50%'],
+    'volume': ['150%'],
+}
+"""Filter chains benchmarked as a whole"""
+CHAINS: Dict[str, List[str]] = {
+    'voice': ['highpass', 'eq', 'pitch', 'volume'],
+    'room': ['eq', 'reverb', 'volume'],
+    'all': sorted(ARGS),
+}
+
+def load_plugins() -> Dict[str, Any]:
+    """Loads all filter plugins straight from their files; returns their classes by (lower case) name"""
+    plugins = {}
+    for f in sorted(glob.glob(os.path.join(params.BPATH, 'res', 'filters', '*.py'))):
+        name = os.path.splitext(os.path.basename(f))[0]
+        spec = importlib.util.spec_from_file_location(name, f)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        for v in vars(mod).values():
+            if isinstance(v, type) and issubclass(v, Filter) and v is not Filter and v.__module__ == name:
+                plugins[name] = v
+    return plugins
+
+def make_ir(path: str, seconds: float = 1.5) -> None:
+    """Writes a synthetic impulse response (exponentially decaying noise) to a .wav file"""
+    n = int(seconds * params.SMPRATE)
+    ir = np.random.default_rng(0).standard_normal(n) * np.exp(-np.arange(n) / (.3 * params.SMPRATE))
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(params.SMPRATE)
+        w.writeframes((ir / np.abs(ir).max() * 32767).astype('<i2').tobytes())
+
+def signal(n: int, channels: int) -> np.ndarray:
+    """A reproducible test signal - a chirp plus some noise, `(n, channels)`"""
+    t = np.arange(n) / params.SMPRATE
+    x = .3 * np.sin(2*np.pi*(100 + 2000*t)*t) + .02 * np.random.default_rng(1).standard_normal(n)
+    return np.repeat(x[:, None], channels, axis=1)
+
+def measure(fn: Callable[[np.ndarray], np.ndarray], blocks: List[np.ndarray], repeat: int) -> Tuple[float, float]:
+    """Returns the time (seconds) and the memory (bytes) `fn` needs per block - the best of `repeat` runs, after warming up"""
+    for b in blocks[:4]:
+        fn(b.copy())
+    copies = [[b.copy() for b in blocks] for _ in range(repeat)]
+    best = float('inf')
+    for cp in copies:
+        t = time.perf_counter()
+        for b in cp:
+            fn(b)
+        best = min(best, (time.perf_counter() - t) / len(blocks))
+    tracemalloc.start()
+    allocs = []
+    for b in blocks[:16]:
+        b = b.copy()
+        tracemalloc.reset_peak()
+        cur = tracemalloc.get_traced_memory()[0]
+        fn(b)
+        allocs.append(tracemalloc.get_traced_memory()[1] - cur)
+    tracemalloc.stop()
+    return best, float(np.median(allocs))
+
+def chain(fils: List[Any]) -> Callable[[np.ndarray], np.ndarray]:
+    """Runs a block through a list of filters, like the channel does"""
+    def run(data: np.ndarray) -> np.ndarray:
+        for f in fils:
+            data = f(data)
+        return data
+    return run
+
+def bench_channel(bsize: int, seconds: float) -> float:
+    """Runs the whole channel (virtual noise input, null output, 'voice' chain) as fast as possible; returns the time per block"""
+    from figaro.channel import Channel
+    from figaro.device import Noise, Null
+    buf, params.BUF = params.BUF, bsize
+    plugins = load_plugins()
+    ch = Channel(ist=[Noise('noise', realtime=False)], ost=[Null('null', realtime=False)],
+                 filters=[plugins[p].start(ARGS[p]) for p in CHAINS['voice']])
+    ch.start()
+    time.sleep(seconds)
+    ch.kill()
+    ch.join()
+    params.BUF = buf
+    return seconds / max(ch.stats()['blocks'], 1)
+
+def result(name: str, bsize: int, t: float, alloc: Optional[float] = None) -> Dict[str, Any]:
+    """Turns a measurement into a result entry (without allocations, if they weren't measured)"""
+    res = dict(name=name, block=bsize, ns_per_sample=t / bsize * 1e9, rtf=t / (bsize / params.SMPRATE))
+    if alloc is not None:
+        res['alloc_bytes'] = alloc
+    return res
+
+def compare(res: List[Dict[str, Any]], base: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """Returns a message for every result that's more than `threshold` (relative) slower than the baseline"""
+    old = {(b['name'], b['block']): b for b in base}
+    regs = []
+    for r in res:
+        b = old.get((r['name'], r['block']))
+        if b and r['ns_per_sample'] > b['ns_per_sample'] * (1 + threshold):
+            regs.append(f'{r["name"]} @ {r["block"]}: {b["ns_per_sample"]:.1f} -> {r["ns_per_sample"]:.1f} ns/sample '
+                        f'(+{(r["ns_per_sample"]/b["ns_per_sample"]-1)*100:.0f}%)')
+    return regs
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('-b', '--blocks', type=str, default='128,512,2048,4096,8192', help='Comma-separated block sizes ... ')
+    parser.add_argument('-n', '--samples', type=int, default=1 << 18, help='Samples processed per measurement ... ')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Measurements per benchmark (the best one counts) ... ')
+    parser.add_argument('-c', '--channels', type=int, default=1, help='Number of channels ... ')
+    parser.add_argument('-f', '--filter', type=str, default='', help='Only run benchmarks whose name contains this ("channel" for the whole-channel benchmark) ... ')
+    parser.add_argument('--no-channel', action='store_true', help='Skip the whole-channel benchmark ... ')
+    parser.add_argument('-o', '--output', type=str, help='Write the results to this JSON file ... ')
+    parser.add_argument('--baseline', type=str, help='Compare against the results in this JSON file ... ')
+    parser.add_argument('-t', '--threshold', type=float, default=.1, help='Relative slowdown that counts as a regression ... ')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    params.CHNNLS = args.channels
+    plugins = load_plugins()
+    tmp = tempfile.TemporaryDirectory()
+    ir = os.path.join(tmp.name, 'ir.wav')
+    make_ir(ir)
+    create = lambda p: plugins[p].start([a.format(ir=ir) for a in ARGS[p]])
+
+    res = []
+    print(f'{"benchmark":>16} | {"block":>6} | {"ns/sample":>10} | {"RTF":>7} | {"alloc/block":>12}')
+    for bsize in map(int, args.blocks.split(',')):
+        x = signal(max(args.samples, bsize), args.channels)
+        blocks = [x[i:i+bsize] for i in range(0, len(x) - bsize + 1, bsize)]
+        todo = [(p, lambda p=p: create(p)) for p in sorted(ARGS) if p in plugins]
+        todo += [('gate', Gate)]
+        todo += [(f'chain:{c}', lambda fils=fils: chain([create(p) for p in fils if p in plugins])) for c, fils in CHAINS.items()]
+        for name, make in todo:
+            if args.filter not in name:
+                continue
+            t, alloc = measure(make(), blocks, args.repeat)
+            res.append(result(name, bsize, t, alloc))
+            r = res[-1]
+            print(f'{name:>16} | {bsize:>6} | {r["ns_per_sample"]:>10.1f} | {r["rtf"]:>7.4f} | {alloc/1024:>9.1f}KiB')
+        if not args.no_channel and args.filter in ('', 'channel'):
+            res.append(result('channel', bsize, bench_channel(bsize, 2.)))
+            r = res[-1]
+            print(f'{"channel":>16} | {bsize:>6} | {r["ns_per_sample"]:>10.1f} | {r["rtf"]:>7.4f} |')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(rate=params.SMPRATE, channels=args.channels, results=res), f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regs = compare(res, json.load(f)['results'], args.threshold)
+        if regs:
+            print(f'\n{len(regs)} regression(s) (threshold: {args.threshold*100:.0f}%):\n  ' + '\n  '.join(regs))
+            sys.exit(1)
+        print('\nNo regressions ... ')
+
+if __name__ == '__main__':
+    main()
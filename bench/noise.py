@@ -0,0 +1,43 @@
+"""Benchmarks the per-block cost of the Noise filter at different block sizes"""
+
+import os, sys, time, importlib.util, numpy as np
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from figaro import params
+
+def load_noise() -> object:
+    """Loads the Noise filter plugin straight from its file"""
+    spec = importlib.util.spec_from_file_location('noise', os.path.join(params.BPATH, 'res', 'filters', 'noise.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod.Noise
+
+def legacy(data: np.ndarray) -> np.ndarray:
+    """The previous implementation - a fresh array from the global RNG for every block"""
+    return data + (np.random.rand(*data.shape) - .5) * .05
+
+def bench(fn: object, bsize: int, n: int) -> float:
+    """Returns the average time (in seconds) `fn` takes to process a single block"""
+    data = np.zeros(bsize)
+    fn(data)
+    t = time.perf_counter()
+    for _ in range(n):
+        fn(data)
+    return (time.perf_counter() - t) / n
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('-n', '--iterations', type=int, default=2000, help='Blocks processed per measurement ... ')
+    parser.add_argument('-b', '--blocks', type=str, default='128,512,2048,4096,8192', help='Comma-separated block sizes ... ')
+    args = parser.parse_args()
+
+    Noise = load_noise()
+    fils = [('legacy', legacy)] + [(c, Noise.Filter(1., c, seed=0)) for c in Noise.COLORS]
+    print(f'{"block":>6} | ' + ' | '.join(f'{name:>14}' for name, _ in fils))
+    for b in map(int, args.blocks.split(',')):
+        res = [bench(f, b, args.iterations) for _, f in fils]
+        print(f'{b:>6} | ' + ' | '.join(f'{r*1e6:8.2f} us/blk' for r in res))
+
+if __name__ == '__main__':
+    main()
@@ -8,12 +8,17 @@ from figaro import cmd, params, gui
 def main():
     parser = ArgumentParser()
     parser.add_argument('-f', '--file', type=str, help='A .fig file to be interpreted ... ')
+    parser.add_argument('-w', '--watch', action='store_true', help='Reload the .fig file whenever it changes?')
     parser.add_argument('-i', '--ist', type=str, help='Index of the Input Stream ... ')
     parser.add_argument('-o', '--ost', type=str, help='Index of the Output Stream ... ')
+    parser.add_argument('-c', '--channels', type=int, default=params.CHNNLS, help='Number of audio channels (e.g. 2 for stereo) ... ')
     parser.add_argument('-s', '--server', action='store_true', help='Start listening to websocket commands?')
     parser.add_argument('-g', '--gui', action='store_true', help='Start the GUI?')
     args = parser.parse_args()
     sys.argv = sys.argv[:1]
+    if args.channels < 1:
+        parser.error('There has to be at least one channel ... ')
+    params.CHNNLS = args.channels
 
     pash.cmds.clear(None, [])
     pash.misc.fancy_print("""   ,d8888b  d8,                                     
@@ -29,19 +34,19 @@ d88'      d88' `?88P'`88b`?88P'`88bd88'     `?8888P'
 """)
 
     if args.file:
-        cmd.on_start_interpreter(None, [], args.file)
+        cmd.on_start_interpreter(None, [], args.file, watch=args.watch)
     if args.ist:
         for ind in args.ist.split(','):
-            cmd.on_start_input(None, [], int(ind), json=False)
+            cmd.on_start_input(None, [], ind, json=False)
     if args.ost:
         for ind in args.ost.split(','):
-            cmd.on_start_output(None, [], int(ind), json=False)
+            cmd.on_start_output(None, [], ind, json=False)
     if args.ist and args.ost:
         cmd.on_start(None, [], json=False)
-    if args.server:
-        cmd.on_start_server(None, [])
     if args.gui:
         gui.start()
+    if args.server or args.gui:
+        cmd.on_start_server(None, [])
 
     cmd.start()
     pash.cmds.clear(None, [])
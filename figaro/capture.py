@@ -0,0 +1,208 @@
+"""Reads every input device on a thread of its own, so the channel never waits for more than one of them"""
+
+import time, numpy as np
+from threading import Thread, Condition
+from typing import Optional, Dict, Any
+
+from figaro import params
+from figaro.device import Device, fit, RETRY, MAX_RETRY
+
+"""How many blocks an input's ring buffer holds"""
+RING: int = 4
+"""How many blocks the channel waits for the clock input before treating it as stalled"""
+STALL: float = 2.
+
+class Capture(Thread):
+    """
+    Reads an input device into a ring buffer.
+
+    The thread reads a block after the other and appends it (fitted to
+    `params.CHNNLS`) to the ring buffer; the channel takes aligned blocks
+    out of it (`pull`). Only the copying in and out happens under the lock,
+    never the (blocking) device read. If the channel falls behind and the
+    buffer is full, the thread waits up to a block for room, then drops the
+    oldest frames (`overruns`) - unless the device doesn't run in real time,
+    then it waits for as long as it takes. Whatever the channel asks for but isn't there
+    (yet) is silence (`underruns`) - a stalled device is just a silent one.
+    If reading fails (e.g. the device was unplugged), the thread fills in
+    silence at the device's pace while it tries to reopen the device - after
+    `RETRY` seconds at first, twice as long after every failed attempt (up to
+    `MAX_RETRY`).
+
+    Unless it's the clock (`clock`), the ring buffer starts out with a block
+    of silence (a cushion against jitter) and the device is resampled
+    slightly faster/slower to keep the fill level there (drift compensation
+    against the clock input).
+
+    ...
+
+    Attributes
+    ----------
+    dev : Device
+        The input device.
+    clock : bool
+        Is this the channel's clock (the first input)?
+    overruns : int
+        The number of frames dropped because the ring buffer was full.
+    underruns : int
+        The number of frames replaced by silence because the device didn't deliver them in time.
+    error : Optional[str]
+        Why the device stopped delivering frames (while it's failing).
+    lost : int
+        The number of frames filled in with silence while the device was failing.
+    reconnects : int
+        How often the device was reopened after it failed.
+    _ring : np.ndarray
+        The ring buffer, `(RING * params.BUF, params.CHNNLS)`.
+    _r : int
+        The number of frames taken out of the ring buffer so far.
+    _w : int
+        The number of frames put into the ring buffer so far.
+    _cond : Condition
+        Guards the ring buffer; notified whenever frames are put in or taken out.
+    _running : bool
+        Is the device still being read?
+    _close : bool
+        Should the device be closed once the thread is done?
+    _held : bool
+        Is the channel paused? (Everything read from a real-time device is discarded meanwhile, other devices aren't read at all.)
+
+    Methods
+    -------
+    pull(out, timeout)
+        Takes the next block out of the ring buffer.
+    fill()
+        Gets the number of frames in the ring buffer.
+    hold(on)
+        Discards everything read / stops reading (or resumes).
+    stop(close)
+        Stops reading (and closes the device).
+    """
+
+    def __init__(self, dev: Device, clock: bool = False):
+        super(Capture, self).__init__(daemon=True)
+        self.dev: Device = dev
+        self.clock: bool = clock
+        self.overruns: int = 0
+        self.underruns: int = 0
+        self.error: Optional[str] = None
+        self.lost: int = 0
+        self.reconnects: int = 0
+        self._ring: np.ndarray = np.zeros((RING * params.BUF, params.CHNNLS))
+        self._r: int = 0
+        self._w: int = 0 if clock else params.BUF
+        self._cond: Condition = Condition()
+        self._running: bool = True
+        self._close: bool = False
+        self._held: bool = False
+
+    def run(self) -> None:
+        """Reads the device until stopped (reopens it, if it fails)"""
+        try:
+            while self._running:
+                try:
+                    x = self.dev.read_frames(params.BUF, steer=not self.clock, fill=self.fill())
+                except Exception as e:
+                    self._recover(e)
+                    continue
+                self._push(x)
+        finally:
+            if self._close:
+                self.dev.stop_stream()
+                self.dev.close()
+
+    def _recover(self, e: Exception) -> None:
+        """Fills in silence (at the device's pace) while trying to reopen the failed device"""
+        blk, delay, silence = params.BUF/params.SMPRATE, RETRY, np.zeros((params.BUF, 1))
+        while self._running:
+            self.error = str(e)
+            end = time.perf_counter() + delay
+            while self._running and time.perf_counter() < end:
+                time.sleep(blk)
+                self._push(silence)
+                self.lost += params.BUF
+            if not self._running:
+                return
+            try:
+                self.dev.reopen()
+            except Exception as ex:
+                e, delay = ex, min(2*delay, MAX_RETRY)
+                continue
+            self.error = None
+            self.reconnects += 1
+            return
+
+    def _push(self, x: np.ndarray) -> None:
+        """Appends frames to the ring buffer (makes room by dropping the oldest ones, if the channel doesn't)"""
+        cap, c = self._ring.shape
+        x = (x if x.shape[1] in (1, c) else fit(x, c))[-cap:]
+        n = len(x)
+        self._cond.acquire()
+        while self._held and not self.dev.realtime and self._running:
+            self._cond.wait()
+        if self._held:
+            self._cond.release()
+            return
+        if self._w - self._r + n > cap:
+            self._cond.wait(params.BUF/params.SMPRATE)
+        while not self.dev.realtime and self._w - self._r + n > cap and self._running:
+            self._cond.wait()
+        over = self._w - self._r + n - cap
+        if over > 0:
+            self._r += over
+            self.overruns += over
+        i = self._w % cap
+        k = min(n, cap - i)
+        self._ring[i:i+k] = x[:k]
+        self._ring[:n-k] = x[k:]
+        self._w += n
+        self._cond.notify_all()
+        self._cond.release()
+
+    def pull(self, out: np.ndarray, timeout: float = 0.) -> int:
+        """Takes the next `len(out)` frames out of the ring buffer (into `out`), waits up to `timeout` seconds for them; returns how many were missing (and are silence)"""
+        cap, n = len(self._ring), len(out)
+        self._cond.acquire()
+        end = time.perf_counter() + timeout
+        while self._w - self._r < n and self._running and self.is_alive():
+            left = end - time.perf_counter()
+            if left <= 0:
+                break
+            self._cond.wait(left)
+        m = min(n, self._w - self._r)
+        i = self._r % cap
+        k = min(m, cap - i)
+        out[:k] = self._ring[i:i+k]
+        out[k:m] = self._ring[:m-k]
+        out[m:] = 0.
+        self._r += m
+        self._cond.notify_all()
+        self._cond.release()
+        self.underruns += n - m
+        return n - m
+
+    def fill(self) -> int:
+        """Gets the number of frames in the ring buffer"""
+        return self._w - self._r
+
+    def hold(self, on: bool) -> None:
+        """Discards everything read from now on, if `on` (a real-time device keeps running, any other one isn't read until the hold is released); either way, starts over with an empty ring buffer"""
+        self._cond.acquire()
+        self._held = on
+        self._ring[:params.BUF] = 0.
+        self._r, self._w = 0, 0 if self.clock or on else params.BUF
+        self._cond.notify_all()
+        self._cond.release()
+
+    def stop(self, close: bool = False) -> None:
+        """Stops reading the device (after the current block); closes it afterwards, if `close`"""
+        self._close = close
+        self._running = False
+        self._cond.acquire()
+        self._cond.notify_all()
+        self._cond.release()
+
+    def toJSON(self) -> Dict[str, Any]:
+        """Gets the input's state and counters into a JSON-compatible format"""
+        return dict(self.dev.toJSON(), clock=self.clock, fill=self.fill(), overruns=self.overruns, underruns=self.underruns,
+                    error=self.error, lost=self.lost, reconnects=self.reconnects)
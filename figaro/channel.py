@@ -1,104 +1,370 @@
 """Channels the altered input data to the output devices"""
 
-import struct, time, numpy as np
-from threading import Thread, Lock
-from typing import Any, List, Dict, Optional
+import time, numpy as np
+from threading import Thread, Lock, Event
+from typing import Any, List, Dict, Optional, Tuple, Iterable
 
-from figaro import params
+from figaro import params, scheduler, metrics
 from figaro.sound import Sound
-from figaro.device import Device
+from figaro.device import Device, fit
 from figaro.transformer import Transformer
 from figaro.filters.filter import Filter
+from figaro.dynamics import Compressor
+from figaro.vad import Gate
+from figaro.recorder import Recorder, Tap
+from figaro.memory import Monitor
+from figaro.capture import Capture, STALL
+from figaro.playback import Playback
+
+"""How long processing a block takes (in seconds)"""
+BLOCK_SECONDS: metrics.Histogram = metrics.REGISTRY.histogram('figaro_block_seconds', 'Time it takes to process a block (in seconds).')
+"""How much time the filters take (in seconds, by filter)"""
+FILTER_SECONDS: metrics.Counter = metrics.REGISTRY.counter('figaro_filter_seconds_total', 'Time spent in every filter (in seconds).', ('filter',))
 
 class Channel(Thread):
     """
     The channel between input and output.
 
+    Everything in between runs at `params.SMPRATE`, the devices run at their
+    native rates. The first input device is the clock - all other devices are
+    resampled slightly faster/slower to follow it (drift compensation), so
+    their buffers neither run dry nor overflow.
+
+    The devices, filters and sounds are immutable snapshots (tuples): the
+    audio thread picks up whatever snapshot is current at the start of a block
+    and never takes a lock. Changes build a new snapshot and swap it in as a
+    whole (the mutexes only serialize changes against each other), so they
+    never wait for a block to be read or written. Removed devices are closed
+    by the audio thread once it's done with them; finished sounds are pruned
+    by the audio thread, but only if no change is in progress (otherwise they
+    are simply pruned with a later block).
+
     ...
 
     Attributes
     ----------
     transf : Transformer
         The transformer applied to the input.
-    ist : List[Device]
+    ist : Tuple[Device, ...]
         The input devices.
-    ost : List[Device]
+    ost : Tuple[Device, ...]
         The output devices.
     buff : np.ndarray
-        The current buffer.
-    filters : List[Filter]
+        The current buffer, `(frames, channels)`.
+    filters : Tuple[Filter, ...]
         Filters to be applied.
-    sounds : List[Sound]
+    sounds : Tuple[Sound, ...]
         Sounds to be played.
+    master : Optional[Compressor]
+        The limiter/compressor applied to the final mix (after filters and sounds).
+    gate : Optional[Gate]
+        The noise gate applied to the input; while it's closed, filters only run idle.
+    recorders : List[Recorder]
+        Everything that's being recorded (never changed in place - replaced as a whole, so the audio thread needs no lock).
+    memory : Monitor
+        Watches the audio thread's allocations and garbage collector pauses, applies the garbage collector policy.
     _running : bool
-        Is the channel active?
+        Is the channel active (i.e. started and not paused)?
+    _alive : bool
+        Has the channel not been killed yet?
+    _wake : Event
+        Set to wake the paused channel up (when it's resumed or killed).
+    latency : float
+        The fixed delay (in seconds) between a sound's trigger and its start.
+    _tblk : float
+        The (smoothed) time the current block is aligned to (`time.perf_counter()`).
     _ist_mut : Lock
-        Mutex for the input stream.
+        Serializes changes of the input devices.
     _ost_mut : Lock
-        Mutex for the output streams.
+        Serializes changes of the output devices.
+    _fil_mut : Lock
+        Serializes changes of the filters.
     _sou_mut : Lock
-        Mutex for the sounds list.
+        Serializes changes of the sounds (the audio thread only ever tries to get it).
+    _caps : Tuple[Capture, ...]
+        The input devices' capture threads (while the channel is running).
+    _outs : Tuple[Playback, ...]
+        The output devices' writer threads (while the channel is running).
+    _live : bool
+        Are the devices being captured/written to (i.e. do new ones need a thread)?
+    _stats : Dict[str, Any]
+        Counters of the audio thread (blocks processed, clipped samples, peak level, time spent on/saved in filters).
+    _cost : Optional[float]
+        The (smoothed) time the filters take for a block that isn't silent.
+    _mix : np.ndarray
+        The buffer the inputs are mixed into (reused for every block, so reading the input allocates nothing).
+    _stack : np.ndarray
+        The inputs' current blocks, `(inputs, frames, channels)` (reused as well).
+    _fcpu : Dict[type, metrics.Counter]
+        The counters of the time every kind of filter takes (by the filter's type).
 
     Methods
     -------
     ...
     """
 
-    def __init__(self, transf: Optional[Transformer] = None, ist: List[Device] = [], ost: List[Device] = [], 
-                 filters: List[Filter] = [], sounds: List[Sound] = [], *args: List[Any], **kwargs: Dict[str, Any]):
+    def __init__(self, transf: Optional[Transformer] = None, ist: Iterable[Device] = (), ost: Iterable[Device] = (), 
+                 filters: Iterable[Filter] = (), sounds: Iterable[Sound] = (), master: Optional[Compressor] = None, gate: Optional[Gate] = None, memory: Optional[Monitor] = None, *args: List[Any], **kwargs: Dict[str, Any]):
         super(Channel, self).__init__(*args, **kwargs)
         self.transf: Transformer = transf or Transformer()
-        self.ist: List[Device] = ist
-        self.ost: List[Device] = ost
-        self.buff: np.ndarray = np.array([])
-        self.filters: List[Filter] = filters
-        self.sounds: List[Sound] = sounds
+        self.ist: Tuple[Device, ...] = tuple(ist)
+        self.ost: Tuple[Device, ...] = tuple(ost)
+        self.buff: np.ndarray = np.zeros((0, params.CHNNLS))
+        self.filters: Tuple[Filter, ...] = tuple(filters)
+        self.sounds: Tuple[Sound, ...] = tuple(sounds)
+        self.master: Optional[Compressor] = master
+        self.gate: Optional[Gate] = gate
+        self.recorders: List[Recorder] = []
+        self.memory: Monitor = memory or Monitor()
         self._running: bool = False
+        self._alive: bool = False
+        self._wake: Event = Event()
+        self.latency: float = params.BUF/params.SMPRATE
+        self._tblk: float = 0.
         self._ist_mut: Lock = Lock()
         self._ost_mut: Lock = Lock()
         self._fil_mut: Lock = Lock()
         self._sou_mut: Lock = Lock()
+        self._rec_mut: Lock = Lock()
+        self._caps: Tuple[Capture, ...] = ()
+        self._outs: Tuple[Playback, ...] = ()
+        self._live: bool = False
+        self._stats: Dict[str, Any] = dict(blocks=0, clipped=0, peak=-180., silent=0, dsp_ms=0., saved_ms=0.)
+        self._cost: Optional[float] = None
+        self._mix: np.ndarray = np.zeros((params.BUF, params.CHNNLS))
+        self._stack: np.ndarray = np.zeros((0, params.BUF, params.CHNNLS))
+        self._fcpu: Dict[type, metrics.Counter] = {}
+        self._register()
 
     def start(self):
         """Start the audio channeling process"""
         if not self.ist or not self.ost:
             raise IOError('Missing I/O devices!')
+        self._alive = self._running = True
         return super().start()
 
     def run(self) -> None:
         """Read audio from the input, run it through the transformer and write the result to the output streams"""
-        self._running = True
-        while self._running:
-            self._ist_mut.acquire()
-            self.buff = np.zeros(params.BUF)
-            for i in self.ist:
-                self.buff += np.asarray(struct.unpack('f'*params.BUF, i.read(params.BUF)))
-            self.buff /= len(self.ist)
-            self._ist_mut.release()
-            self.buff = self.transf.apply_all(self.buff)
-            self._fil_mut.acquire()
-            for f in self.filters:
-                self.buff = f(self.buff)
-            self._fil_mut.release()
-            self._sou_mut.acquire()
-            dels = []
-            for i, s in enumerate(self.sounds):
-                so_raw = s.read(params.BUF)
-                if so_raw == b'':
-                    dels.append(i)
+        self._ist_mut.acquire()
+        self._ost_mut.acquire()
+        self._caps = tuple(self._capture(i, n == 0) for n, i in enumerate(self.ist))
+        self._outs = tuple(self._playback(o) for o in self.ost)
+        self._live = True
+        self._ost_mut.release()
+        self._ist_mut.release()
+        self.memory.attach()
+        try:
+            while self._alive:
+                if not self._running:
+                    self._idle()
                     continue
-                so = np.asarray(struct.unpack(s.format*(len(so_raw)//s.f_size), so_raw)).astype(np.float32)
-                so /= 2**(8*s.f_size-1)
-                so = np.hstack((so, np.zeros(params.BUF-len(so))))*s.amp
-                self.buff = np.average([self.buff, so], axis=0, weights=[.8,.2])
-            for d in reversed(dels):
-                del self.sounds[d]
-            self._sou_mut.release()
-            raw = struct.pack('f'*len(self.buff), *self.buff)
+                self._block()
+        finally:
+            self.memory.detach()
+            self._ist_mut.acquire()
             self._ost_mut.acquire()
-            for o in self.ost:
-                o.write(raw)
+            thrs, self._caps, self._outs, self._live = self._caps + self._outs, (), (), False
             self._ost_mut.release()
+            self._ist_mut.release()
+            for t in thrs:
+                t.stop()
+            for t in thrs:
+                t.join(STALL * params.BUF/params.SMPRATE)
+
+    def _idle(self) -> None:
+        """Wait until the channel is resumed (or killed) - meanwhile, real-time inputs are read (and discarded) to keep them warm, all others wait"""
+        self.memory.detach()
+        for c in self._caps:
+            c.hold(True)
+        for p in self._outs:
+            p.hold()
+        self._wake.wait()
+        self._wake.clear()
+        for c in self._caps:
+            c.hold(not self._running)
+        self.memory.attach()
+
+    def _block(self) -> None:
+        """Process a single block (with the snapshots that are current when it starts)"""
+        mem, caps, outs, fils, sounds = self.memory, self._caps, self._outs, self.filters, self.sounds
+        mix = self._read(caps)
+        t0 = time.perf_counter()
+        mem.begin()
+        self.buff = mix
+        self._tick()
+        recs = self.recorders
+        self._tap(recs, 'input')
+        g, silent = self.gate, False
+        if g is not None:
+            self.buff = g(self.buff)
+            silent = g.silent
+        self.buff = self.transf.apply_all(self.buff)
+        t = tf = time.perf_counter()
+        for j, f in enumerate(fils):
+            self.buff = f.idle(self.buff) if silent else f(self.buff)
+            self._tap(recs, j)
+            now = time.perf_counter()
+            (self._fcpu.get(type(f)) or self._fcounter(f)).inc(now - tf)
+            tf = now
+        self._cpu(silent, tf - t)
+        ended = None
+        for s in sounds:
+            off = 0
+            if s.start is not None:
+                off = int(round((s.start - self._tblk) * params.SMPRATE))
+                if off >= params.BUF:
+                    continue
+                off, s.start = max(off, 0), None
+            so = s.read_frames(params.BUF-off)
+            if not len(so):
+                ended = (ended or []) + [s]
+                continue
+            self.buff *= .8
+            self.buff[off:off+len(so)] += fit(so, params.CHNNLS) * (.2*s.amp)
+        if ended:
+            self._prune(ended)
+        m = self.master
+        if m is not None:
+            self.buff = m(self.buff)
+        self._meter()
+        self._tap(recs, 'output')
+        used = time.perf_counter() - t0
+        BLOCK_SECONDS.observe(used)
+        for p in outs:
+            p.push(self.buff)
+        mem.end(used, params.BUF/params.SMPRATE, silent)
+
+    def _read(self, caps: Tuple[Capture, ...]) -> np.ndarray:
+        """Take the next block out of every input's ring buffer and mix them (weighted by their gain)"""
+        if self._mix.shape != (params.BUF, params.CHNNLS) or self._stack.shape[0] != len(caps):
+            self._mix = np.zeros((params.BUF, params.CHNNLS))
+            self._stack = np.zeros((len(caps), params.BUF, params.CHNNLS))
+        for n, c in enumerate(caps):
+            c.pull(self._stack[n], STALL * params.BUF/params.SMPRATE if n == 0 else 0.)
+        if caps:
+            w = np.array([0. if c.dev.muted else c.dev.gain for c in caps])
+            np.matmul(w, self._stack.reshape(len(caps), -1), out=self._mix.reshape(-1))
+        else:
+            self._mix.fill(0.)
+        return self._mix
+
+    def _capture(self, dev: Device, clock: bool) -> Capture:
+        """Start reading an input device on a thread of its own"""
+        c = Capture(dev, clock)
+        c.hold(not self._running)
+        c.start()
+        return c
+
+    def _playback(self, dev: Device) -> Playback:
+        """Start writing to an output device on a thread of its own"""
+        p = Playback(dev)
+        p.start()
+        return p
+
+    def _prune(self, ended: List[Sound]) -> None:
+        """Remove finished sounds - unless the sounds are being changed right now (then they're pruned with a later block)"""
+        if not self._sou_mut.acquire(blocking=False):
+            return
+        self.sounds = tuple(s for s in self.sounds if all(s is not e for e in ended))
+        self._sou_mut.release()
+
+    def _tick(self) -> None:
+        """Advance the block clock by one block; slowly follows the actual block timing, resyncs after hiccups"""
+        now = time.perf_counter()
+        self._tblk += params.BUF/params.SMPRATE
+        if abs(now - self._tblk) > params.BUF/params.SMPRATE:
+            self._tblk = now
+        else:
+            self._tblk += (now - self._tblk) * .05
+
+    def _meter(self) -> None:
+        """Update the output counters with the current (final) buffer"""
+        peak = max(self.buff.max(), -self.buff.min()) if self.buff.size else 0.
+        self._stats['blocks'] += 1
+        if peak > 1:
+            self._stats['clipped'] += int(np.count_nonzero(np.abs(self.buff) > 1))
+        self._stats['peak'] = float(20*np.log10(max(peak, 1e-9)))
+
+    def _tap(self, recs: List[Recorder], where: Tap) -> None:
+        """Pass the current buffer to all recorders tapping at `where`"""
+        for r in recs:
+            if r.tap == where:
+                r.push(self.buff)
+
+    def _cpu(self, silent: bool, dt: float) -> None:
+        """Account for the time the filters took - a silent block saved what a normal block usually costs"""
+        self._stats['dsp_ms'] += dt * 1000
+        if not silent:
+            self._cost = dt if self._cost is None else self._cost + (dt - self._cost) * .1
+            return
+        self._stats['silent'] += 1
+        self._stats['saved_ms'] += max(0., (self._cost or 0.) - dt) * 1000
+
+    def _fcounter(self, f: Filter) -> metrics.Counter:
+        """Get the counter of the time a filter takes (by the filter's plugin name)"""
+        self._fcpu[type(f)] = c = FILTER_SECONDS.labels(type(f).__qualname__.split('.')[0].lower())
+        return c
+
+    def _xruns(self) -> Dict[Tuple[str, ...], float]:
+        """Get the devices' over-/underruns (by direction, device and kind)"""
+        res = {}
+        for c in self._caps:
+            d = str(c.dev.indi)
+            res[('input', d, 'overrun')], res[('input', d, 'underrun')] = c.overruns, c.underruns
+        for p in self._outs:
+            d = str(p.dev.indo)
+            res[('output', d, 'overrun')], res[('output', d, 'underrun')] = p.overruns, p.underruns
+        return res
+
+    def _register(self) -> None:
+        """Register the channel's counters and gauges (evaluated when they're scraped, so they cost the audio thread nothing)"""
+        reg = metrics.REGISTRY
+        reg.counter('figaro_blocks_total', 'Blocks processed.', fn=lambda: self._stats['blocks'])
+        reg.counter('figaro_silent_blocks_total', 'Blocks the gate closed on (filters ran idle).', fn=lambda: self._stats['silent'])
+        reg.counter('figaro_clipped_samples_total', 'Output samples beyond full scale.', fn=lambda: self._stats['clipped'])
+        reg.counter('figaro_xruns_total', 'Frames (inputs) / blocks (outputs) dropped or replaced by silence.',
+                    ('direction', 'device', 'kind'), fn=self._xruns)
+        reg.gauge('figaro_running', 'Is the channel running (1) or paused/stopped (0)?', fn=lambda: float(self.is_running()))
+        reg.gauge('figaro_sounds', 'Sounds playing.', fn=lambda: len(self.sounds))
+        reg.gauge('figaro_filters', 'Filters running.', fn=lambda: len(self.filters))
+        reg.gauge('figaro_peak_dbfs', 'Peak of the last output block (dBFS).', fn=lambda: self._stats['peak'])
+        reg.counter('figaro_gc_audio_total', 'Garbage collections that interrupted the audio thread.', fn=lambda: self.memory.toJSON()['gc_audio'])
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the channel's counters (and the gate's/master stage's state, if there are any, the garbage collector's and the devices')"""
+        m, g, st = self.master, self.gate, dict(self._stats)
+        st['saved_pct'] = 100 * st['saved_ms'] / (st['dsp_ms'] + st['saved_ms']) if st['saved_ms'] else 0.
+        return dict(st, master=m.toJSON() if m is not None else None, gate=g.toJSON() if g is not None else None,
+                    recorders=[r.toJSON() for r in self.recorders], memory=self.memory.toJSON(),
+                    inputs=[c.toJSON() for c in self._caps], outputs=[p.toJSON() for p in self._outs])
+
+    def add_recorder(self, r: Recorder) -> None:
+        """Start a recorder and add it to the channel"""
+        r.start()
+        self._rec_mut.acquire()
+        self.recorders = self.recorders + [r]
+        self._rec_mut.release()
+
+    def get_recorders(self) -> List[Recorder]:
+        """Get all recorders"""
+        return list(self.recorders)
+
+    def del_recorder(self, i: int) -> None:
+        """Stop a recorder and remove it from the channel"""
+        self._rec_mut.acquire()
+        recs = list(self.recorders)
+        r = recs.pop(i)
+        self.recorders = recs
+        self._rec_mut.release()
+        r.stop()
+
+    def set_gate(self, g: Optional[Gate]) -> None:
+        """Set (or remove, if `None`) the noise gate applied to the input"""
+        self.gate = g
+
+    def set_master(self, m: Optional[Compressor]) -> None:
+        """Set (or remove, if `None`) the limiter/compressor applied to the final mix"""
+        self.master = m
 
     def add_ist(self, i: Device) -> None:
         """Add an input device"""
@@ -106,26 +372,34 @@ class Channel(Thread):
         if i in self.ist:
             self._ist_mut.release()
             raise Exception("Input Stream is already being used!")
-        self.ist.append(i)
+        self.ist = self.ist + (i,)
+        if self._live:
+            self._caps = self._caps + (self._capture(i, not self._caps),)
         self._ist_mut.release()
 
     def get_ists(self) -> List[Device]:
         """Get all input devices"""
-        self._ist_mut.acquire()
-        cp = list(self.ist)
-        self._ist_mut.release()
-        return cp
+        return list(self.ist)
 
     def del_ist(self, dev_ind: int) -> None:
-        """Remove an input device"""
+        """Remove an input device (it's closed as soon as its capture thread is done with it)"""
         self._ist_mut.acquire()
         if dev_ind not in map(lambda d: d.indi, self.ist):
             self._ist_mut.release()
             raise Exception("Input Stream isn't being used!")
-        self.ist = list(filter(lambda i: i.indi != dev_ind, self.ist))
+        old = [i for i in self.ist if i.indi == dev_ind]
+        self.ist = tuple(i for i in self.ist if i.indi != dev_ind)
+        caps = [c for c in self._caps if c.dev.indi == dev_ind]
+        self._caps = tuple(c for c in self._caps if c.dev.indi != dev_ind)
+        if self._caps:
+            self._caps[0].clock = True
         if not self.ist:
-            self.kill()
+            self.pause()
         self._ist_mut.release()
+        for c in caps:
+            c.stop(close=True)
+        if not caps:
+            self._close(old)
 
     def add_ost(self, o: Device) -> None:
         """Add an output device"""
@@ -133,33 +407,57 @@ class Channel(Thread):
         if o in self.ost:
             self._ost_mut.release()
             raise Exception("Output Stream is already being used!")
-        self.ost.append(o)
+        self.ost = self.ost + (o,)
+        if self._live:
+            self._outs = self._outs + (self._playback(o),)
         self._ost_mut.release()
 
     def get_osts(self) -> List[Device]:
         """Get all output devices"""
-        self._ost_mut.acquire()
-        cp = list(self.ost)
-        self._ost_mut.release()
-        return cp
+        return list(self.ost)
 
     def del_ost(self, dev_ind: int) -> None:
-        """Remove an output device"""
+        """Remove an output device (it's closed as soon as its writer thread is done with it)"""
         self._ost_mut.acquire()
         if dev_ind not in map(lambda d: d.indo, self.ost):
             self._ost_mut.release()
             raise Exception("Output Stream isn't being used!")
-        self.ost = list(filter(lambda o: o.indo != dev_ind, self.ost))
+        old = [o for o in self.ost if o.indo == dev_ind]
+        self.ost = tuple(o for o in self.ost if o.indo != dev_ind)
+        outs = [p for p in self._outs if p.dev.indo == dev_ind]
+        self._outs = tuple(p for p in self._outs if p.dev.indo != dev_ind)
         if not self.ost:
-            self.kill()
+            self.pause()
         self._ost_mut.release()
+        for p in outs:
+            p.stop(close=True)
+        if not outs:
+            self._close(old)
+
+    def _close(self, devs: List[Device]) -> None:
+        """Stop and close devices that aren't being used (by any thread)"""
+        for d in devs:
+            d.stop_stream()
+            d.close()
+
+    def pause(self) -> None:
+        """Pause channeling audio - devices, filters and sounds are kept as they are"""
+        self._running = False
+
+    def resume(self) -> None:
+        """Continue channeling audio (with the next block)"""
+        if not self.ist or not self.ost:
+            raise IOError('Missing I/O devices!')
+        self._running = True
+        self._wake.set()
 
     def kill(self) -> None:
-        """Stop channeling audio"""
+        """Stop channeling audio for good"""
         self._sou_mut.acquire()
-        self.sounds = []
+        self.sounds = ()
         self._sou_mut.release()
-        self._running = False
+        self._alive = self._running = False
+        self._wake.set()
 
     def kill_all(self) -> None:
         """Stop all audio channels"""
@@ -173,64 +471,69 @@ class Channel(Thread):
     def add_filter(self, fil: Filter) -> None:
         """Add a filter to the channel"""
         self._fil_mut.acquire()
-        self.filters.append(fil)
+        self.filters = self.filters + (fil,)
         self._fil_mut.release()
 
     def get_filters(self) -> List[Filter]:
         """Get all currently applied filters"""
-        self._fil_mut.acquire()
-        cp = list(self.filters)
-        self._fil_mut.release()
-        return cp
+        return list(self.filters)
 
     def del_filter(self, i: int) -> None:
         """Stop a filter that's currently applied"""
         self._fil_mut.acquire()
-        del self.filters[i]
-        self._fil_mut.release()
+        try:
+            fils = list(self.filters)
+            del fils[i]
+            self.filters = tuple(fils)
+        finally:
+            self._fil_mut.release()
 
     def del_all_filters(self) -> None:
         """Stop all currently applied filters"""
         self._fil_mut.acquire()
-        # self.filters = []
-        for i in range(len(self.filters)-1, -1, -1):
-            del self.filters[i]
+        self.filters = ()
         self._fil_mut.release()
 
     def add_sound(self, sound: Sound) -> None:
-        """Add a sound effect to the channel"""
+        """Add a sound effect to the channel; it starts `latency` seconds after it was triggered (sample-accurately)"""
+        if self._running:
+            t = scheduler.due()
+            sound.start = (t if t is not None else time.perf_counter()) + self.latency
         self._sou_mut.acquire()
-        self.sounds.append(sound)
+        self.sounds = self.sounds + (sound,)
         self._sou_mut.release()
 
     def get_sounds(self) -> List[Sound]:
         """Get all currently playing soundeffects"""
-        self._sou_mut.acquire()
-        cp = list(self.sounds)
-        self._sou_mut.release()
-        return cp
+        return list(self.sounds)
 
     def del_sound(self, i: int) -> None:
         """Stop a sound effect that's currently running"""
         self._sou_mut.acquire()
-        del self.sounds[i]
-        self._sou_mut.release()
+        try:
+            sounds = list(self.sounds)
+            del sounds[i]
+            self.sounds = tuple(sounds)
+        finally:
+            self._sou_mut.release()
 
     def del_all_sounds(self) -> None:
         """Stop all currently running sound effects"""
         self._sou_mut.acquire()
-        # self.sounds = []
-        for i in range(len(self.sounds)-1, -1, -1):
-            del self.sounds[i]
+        self.sounds = ()
         self._sou_mut.release()
 
     def is_running(self) -> bool:
         """Returns `True` if the channel is currently active"""
         return self._running
 
+    def is_paused(self) -> bool:
+        """Returns `True` if the channel has been started, but is paused at the moment"""
+        return self._alive and not self._running
+
     def __str__(self):
         """Returns a string representation of the channel"""
         return 'Channel: {{{}}} --> {{{}}} | {} ... '.format(
                 ', '.join(sorted([str(i.indi) for i in self.ist])) if self.ist else '-', 
                 ', '.join(sorted([str(o.indo) for o in self.ost])) if self.ost else '-', 
-                'running' if self._running else 'stopped')
\ No newline at end of file
+                'running' if self._running else 'paused' if self._alive else 'stopped')
\ No newline at end of file
@@ -1,15 +1,22 @@
 """Handles the interactive shell for the user"""
 
-import os, pyaudio, wave, shutil, numpy as np, time, re, importlib.util, json as JSON
+import os, wave, shutil, threading, numpy as np, time, re, importlib.util, json as JSON
 import pash.shell, pash.cmds, pash.command as pcmd, colorama as cr
 cr.init()
 from asciimatics.screen import Screen
-from typing import List
+from typing import List, Optional, Union
 
 from figaro import params, utils, server, gui, filters
 from figaro.sound import Sound
-from figaro.device import Device
+from figaro.library import Library, PAGE
+from figaro.device import VIRTUAL, Device, open_device, pyaudio
+from figaro.manager import DeviceManager
 from figaro.channel import Channel
+from figaro.dynamics import Compressor
+from figaro.vad import Gate
+from figaro.recorder import Recorder
+from figaro.memory import POLICIES
+from figaro.profiler import Profiler
 from figaro.interpreter import Interpreter
 from figaro.filters.filter import Filter
 from figaro.server import db
@@ -19,25 +26,41 @@ from figaro.server.models.user import User
 BPROMPT: str = cr.Fore.LIGHTBLUE_EX + 'figaro' + cr.Fore.LIGHTBLACK_EX + '$ ' + cr.Fore.RESET
 """The shell itself"""
 sh: pash.shell.Shell = pash.shell.Shell(prompt=BPROMPT)
-"""The main PyAudio object"""
-pa: pyaudio.PyAudio = pyaudio.PyAudio()
+"""The main PyAudio object (`None` without PyAudio - only virtual devices can be used then)"""
+pa: Optional["pyaudio.PyAudio"] = pyaudio.PyAudio() if pyaudio is not None else None
+"""Caches (and refreshes) the list of PyAudio's devices (`None` without PyAudio)"""
+devman: Optional[DeviceManager] = DeviceManager(pa) if pa is not None else None
 """The main audio channel"""
 ch: Channel = Channel()
 """A list of all running interpreters"""
 interpreters: List[Interpreter] = []
+"""The sound library's index (created by `start()`)"""
+lib: Optional[Library] = None
+"""The last (or currently running) profiler"""
+prof: Optional[Profiler] = None
 
 def on_exit(cmd: pcmd.Command, args: List[str]) -> None:
     """Callback for `exit` - quits the shell"""
+    for r in ch.get_recorders():
+        r.stop()
+        r.join()
     if ch.is_alive():
         ch.kill()
+        ch.join()
     ch.kill_all()
-    pa.terminate()
+    if devman is not None:
+        devman.stop()
+    if lib is not None:
+        lib.stop()
+    if pa is not None:
+        pa.terminate()
+    server.stop()
     gui.stop()
     sh.exit()
 
 def on_show_devices(cmd: pcmd.Command, args: List[str], json: bool) -> None:
     """Callback for `show devices` - lists all audio devices"""
-    devs = [pa.get_device_info_by_host_api_device_index(0, i) for i in range(pa.get_host_api_info_by_index(0).get('deviceCount'))]
+    devs = devman.devices() if devman is not None else []
     fil_d = lambda s: [(i, d['name']) for i, d in enumerate(devs) if d[s] > 0]
     if not json:
         print('Devices:\n ', end='')
@@ -45,10 +68,13 @@ def on_show_devices(cmd: pcmd.Command, args: List[str], json: bool) -> None:
         print('\n   '.join(['{:02d}: {}'.format(*inf) for inf in fil_d('maxInputChannels')]))
         print('\r Output:\n   ', end='')
         print('\n   '.join(['{:02d}: {}'.format(*inf) for inf in fil_d('maxOutputChannels')]))
+        print('\r Virtual:\n   ', end='')
+        print('\n   '.join([f'{k}: {v}' for k, v in VIRTUAL.items()]))
         return
     print(JSON.dumps({
         'input': fil_d('maxInputChannels'),
         'output': fil_d('maxOutputChannels'),
+        'virtual': VIRTUAL,
     }))
 
 def on_show_status(cmd: pcmd.Command, args: List[str], json: bool) -> None:
@@ -60,8 +86,49 @@ def on_show_status(cmd: pcmd.Command, args: List[str], json: bool) -> None:
         'input': list(map(lambda d: d.toJSON(), ch.get_ists())),
         'output': list(map(lambda d: d.toJSON(), ch.get_osts())),
         'running': ch.is_running(),
+        'paused': ch.is_paused(),
     }))
 
+def on_show_stats(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `show stats` - shows the audio channel's counters and the master stage's meter"""
+    st = ch.stats()
+    if json:
+        print(JSON.dumps(st))
+        return
+    print(f'Blocks: {st["blocks"]} | Clipped samples: {st["clipped"]} | Peak: {st["peak"]:.1f}dBFS')
+    print(f'Filters: {st["dsp_ms"]:.0f}ms | Silent blocks: {st["silent"]} | Saved: {st["saved_ms"]:.0f}ms ({st["saved_pct"]:.1f}%)')
+    print(f'Gate: {ch.gate or "-"}')
+    print(ch.memory)
+    for i in st['inputs']:
+        gain = 'muted' if i['muted'] else f'{i["gain"]*100:.0f}%'
+        print(f'Input {i["index"]}: {gain} | Buffered: {i["fill"]} frames | '
+              f'Dropped: {i["overruns"]} | Silence inserted: {i["underruns"]} | Reconnects: {i["reconnects"]} (lost: {i["lost"]} frames)'
+              + (f' | Failed: {i["error"]}' if i['error'] else ''))
+    for o in st['outputs']:
+        print(f'Output {o["index"]}: Queued: {o["queued"]} blocks | Dropped: {o["overruns"]} blocks | Underruns: {o["underruns"]} | '
+              f'Reconnects: {o["reconnects"]}'
+              + (f' | Failed: {o["error"]}' if o['error'] else ''))
+    m = st['master']
+    if m is None:
+        print('Master: -')
+        return
+    print(f'Master: {ch.master}')
+    print(f'  In: {m["meter"]["peak_in"]:.1f}dBFS | Out: {m["meter"]["peak_out"]:.1f}dBFS | '
+          f'Gain reduction: {m["meter"]["gr"]:.1f}dB (max: {m["meter"]["gr_max"]:.1f}dB)')
+
+def on_show_recordings(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `show recordings` - lists everything that's being recorded"""
+    recs = ch.get_recorders()
+    if json:
+        print(JSON.dumps({ 'recordings': [r.toJSON() for r in recs], }))
+        return
+    if not recs:
+        utils.printwrn('Nothing is being recorded at the moment ... ')
+        return
+    print('Recordings: ')
+    for i, r in enumerate(recs):
+        print(' #{:02d} | {}'.format(i, str(r)))
+
 def on_show_audio(cmd: pcmd.Command, args: List[str], scale: float, char: str) -> None:
     """Callback for `show audio` - shows the detected input"""
     if not ch.is_alive():
@@ -72,7 +139,7 @@ def on_show_audio(cmd: pcmd.Command, args: List[str], scale: float, char: str) -
     def disp_audio(screen: Screen) -> None:
         while True:
             screen.clear()
-            b = ch.buff
+            b = ch.buff.mean(axis=1)
             sw = len(b)//bw
             b = np.asarray([np.average(b[i:i+sw]) for i in range(0, len(b), sw)])
             for i, v in enumerate(b):
@@ -102,16 +169,16 @@ def on_show_sounds(cmd: pcmd.Command, args: List[str], json: bool) -> None:
         'sounds': list(map(lambda s: s.toJSON(), ch.get_sounds())),
     }))
 
-def on_show_all_sounds(cmd: pcmd.Command, args: List[str], json: bool) -> None:
-    """Callback for `show sounds all` - shows all available sounds"""
-    spath = os.path.join(params.BPATH, 'res', 'sounds')
+def on_show_all_sounds(cmd: pcmd.Command, args: List[str], prefix: str, tags: Optional[List[str]], page: int, limit: int, json: bool) -> None:
+    """Callback for `show sounds all` - shows (a page of) all available sounds, optionally only those starting with a prefix / with certain tags"""
+    spath = lib.root
     if not os.path.isdir(spath):
         if not json:
             utils.printerr(f'Directory "{spath}" doesn\'t exist ... ')
         else:
             print(JSON.dumps({ 'error': f'Directory "{spath}" doesn\'t exist ... '}))
         return
-    sounds = [s for s in os.listdir(spath) if os.path.isfile(os.path.join(spath, s)) and s.split('.')[-1] in params.ALLOWED_EXTS]
+    total, sounds = lib.search(prefix, tuple(tags or ()), page*limit, limit)
     if not sounds:
         if not json:
             utils.printwrn('No sounds available ... ')
@@ -120,12 +187,32 @@ def on_show_all_sounds(cmd: pcmd.Command, args: List[str], json: bool) -> None:
         return
     if not json:
         print('Available sounds:\n - ', end='')
-        print('\n - '.join(sounds))
+        print('\n - '.join(s['name'] + (f' ({s["duration"]:.1f}s)' if s['duration'] is not None else '')
+                            + (f' [{", ".join(s["tags"])}]' if s['tags'] else '') for s in sounds))
+        if limit > 0 and total > limit:
+            print(f'Page {page+1}/{(total+limit-1)//limit} ({total} sounds) ... ')
         return
     print(JSON.dumps({
-        'sounds': sounds,
+        'sounds': [s['name'] for s in sounds],
+        'details': sounds,
+        'total': total,
+        'page': page,
+        'limit': limit,
     }))
 
+def on_show_profile(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `show profile` - shows the (running or last) profile's summary"""
+    if prof is None:
+        if not json:
+            utils.printwrn('Nothing has been profiled yet ... ')
+        else:
+            print(JSON.dumps({ 'error': 'Nothing has been profiled yet ... ', }))
+        return
+    if json:
+        print(JSON.dumps(prof.toJSON()))
+        return
+    print(prof)
+
 def on_show_interpreters(cmd: pcmd.Command, args: List[str]) -> None:
     """Callback for `show interpreters` - shows all running interpreters"""
     if not interpreters:
@@ -180,7 +267,7 @@ def on_start_sound(cmd: pcmd.Command, args: List[str], parameters: List[str], js
         if re.match(r'^[\d\.]*$', a):
             continue
         if not os.path.isfile(a):
-            a = os.path.join(params.BPATH, 'res', 'sounds', a)
+            a = lib.resolve(a) or a
         if not os.path.isfile(a):
             if not json:
                 utils.printerr(f'File "{a}" doesn\'t exist ... ')
@@ -201,10 +288,18 @@ def on_start_sound(cmd: pcmd.Command, args: List[str], parameters: List[str], js
         if json:
             print(JSON.dumps({}))
 
-def on_start_output(cmd: pcmd.Command, args: List[str], indo: int, json: bool) -> None:
+def _dev_ind(ind: str) -> Union[int, str]:
+    """Converts a device index argument - PyAudio's indices are numbers, virtual devices are specified by strings"""
+    return int(ind) if ind.isdigit() else ind
+
+def _open(ind: str, output: bool) -> Device:
+    """Opens a device (through the device manager, if there is one)"""
+    return devman.open(_dev_ind(ind), output) if devman is not None else open_device(_dev_ind(ind), output, pa)
+
+def on_start_output(cmd: pcmd.Command, args: List[str], indo: str, json: bool) -> None:
     """Callback for `start output` - adds an output device"""
     try:
-        ch.add_ost(Device(pa, format=pyaudio.paFloat32, channels=1, rate=params.SMPRATE, output=True, output_device_index=indo))
+        ch.add_ost(_open(indo, True))
         if json:
             print(JSON.dumps({}))
     except Exception as e:
@@ -213,10 +308,10 @@ def on_start_output(cmd: pcmd.Command, args: List[str], indo: int, json: bool) -
         else:
             print(JSON.dumps({ 'error': str(e), }))
 
-def on_start_input(cmd: pcmd.Command, args: List[str], indi: int, json: bool) -> None:
+def on_start_input(cmd: pcmd.Command, args: List[str], indi: str, json: bool) -> None:
     """Callback for `start input` - adds an input device"""
     try:
-        ch.add_ist(Device(pa, format=pyaudio.paFloat32, channels=1, rate=params.SMPRATE, input=True, input_device_index=indi))
+        ch.add_ist(_open(indi, False))
         if json:
             print(JSON.dumps({}))
     except Exception as e:
@@ -225,10 +320,10 @@ def on_start_input(cmd: pcmd.Command, args: List[str], indi: int, json: bool) ->
         else:
             print(JSON.dumps({ 'error': str(e), }))
 
-def on_start_interpreter(cmd: pcmd.Command, args: List[str], fname: str) -> None:
+def on_start_interpreter(cmd: pcmd.Command, args: List[str], fname: str, watch: bool = False) -> None:
     """Callback for `start interpreter` - interprets a .fig file"""
     try:
-        interpreters.append(Interpreter(fname, ch, sh))
+        interpreters.append(Interpreter(fname, ch, sh, watch=watch))
         interpreters[-1].exec()
     except Exception as e:
         utils.printerr(str(e))
@@ -250,8 +345,96 @@ def on_start_filter(cmd: pcmd.Command, args: List[str], name: str, cargs: List[s
         utils.printerr('Error: Filter init error ... ')
         utils.printerr(str(e))
 
+def _start_master(cargs: List[str], json: bool, limiter: bool) -> None:
+    """Puts a limiter/compressor on the channel's output"""
+    try:
+        ch.set_master(Compressor.start(cargs, limiter=limiter))
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_start_limiter(cmd: pcmd.Command, args: List[str], cargs: List[str], json: bool) -> None:
+    """Callback for `start limiter` - limits the channel's output"""
+    _start_master(cargs, json, True)
+
+def on_start_compressor(cmd: pcmd.Command, args: List[str], cargs: List[str], json: bool) -> None:
+    """Callback for `start compressor` - compresses the channel's output"""
+    _start_master(cargs, json, False)
+
+def on_start_gate(cmd: pcmd.Command, args: List[str], cargs: List[str], json: bool) -> None:
+    """Callback for `start gate` - gates the channel's input"""
+    try:
+        ch.set_gate(Gate.start(cargs))
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_start_record(cmd: pcmd.Command, args: List[str], fname: str, tap: str, json: bool) -> None:
+    """Callback for `start record` - records the channel's audio to a file"""
+    try:
+        if not os.path.splitext(fname)[1]:
+            fname += '.wav'
+        ch.add_recorder(Recorder(fname, int(tap) if tap.isdigit() else tap.lower()))
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_start_profile(cmd: pcmd.Command, args: List[str], seconds: float, output: Optional[str], every: bool, json: bool) -> None:
+    """Callback for `start profile` - samples what the audio thread (or every thread) is doing for a while"""
+    global prof
+    try:
+        if prof is not None and prof.is_running():
+            raise Exception('Already profiling ... ')
+        if not ch.is_alive():
+            raise Exception('The audio channel isn\'t running at the moment ... ')
+        thrs = { ch.ident: 'channel' }
+        if every:
+            for t in threading.enumerate():
+                if t.ident not in thrs and t is not threading.current_thread() and t is not threading.main_thread():
+                    thrs[t.ident] = t.name if type(t) is threading.Thread else f'{type(t).__name__.lower()}-{t.ident}'
+        prof = Profiler(thrs, seconds, output or time.strftime('figaro-%Y%m%d-%H%M%S.folded'))
+        prof.start()
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({ 'file': prof.fname, }))
+
+def on_stop_profile(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `stop profile` - stops profiling early"""
+    if prof is None or not prof.is_running():
+        if not json:
+            utils.printwrn('Not profiling at the moment ... ')
+        else:
+            print(JSON.dumps({ 'error': 'Not profiling at the moment ... ', }))
+        return
+    prof.stop()
+    prof.join()
+    if json:
+        print(JSON.dumps(prof.toJSON()))
+        return
+    print(prof)
+
 def on_start_server(cmd: pcmd.Command, args: List[str]) -> None:
-    """Callback for `start server` - starts the websocket server"""
+    """Callback for `start server` - starts the server (GUI & websocket API)"""
     if not os.path.isfile(params.DB_PATH):
         db.setup()
         print('== SETUP ' + '='*(shutil.get_terminal_size().columns-len('== SETUP ')-1))
@@ -285,8 +468,9 @@ def on_stop_sound(cmd: pcmd.Command, args: List[str], ind: str, json: bool) -> N
     if json:
         print(JSON.dumps({}))
 
-def on_stop_output(cmd: pcmd.Command, args: List[str], indo: int, json: bool) -> None:
+def on_stop_output(cmd: pcmd.Command, args: List[str], indo: str, json: bool) -> None:
     """Callback for `stop output` - removes an output device"""
+    indo = _dev_ind(indo)
     if not indo in [d.indo for d in ch.get_osts()]:
         if not json:
             utils.printwrn('Device isn\'t currently being used ... ')
@@ -297,8 +481,9 @@ def on_stop_output(cmd: pcmd.Command, args: List[str], indo: int, json: bool) ->
     if json:
         print(JSON.dumps({}))
 
-def on_stop_input(cmd: pcmd.Command, args: List[str], indi: int, json: bool) -> None:
+def on_stop_input(cmd: pcmd.Command, args: List[str], indi: str, json: bool) -> None:
     """Callback for `stop input` - removes an input device"""
+    indi = _dev_ind(indi)
     if not indi in [d.indi for d in ch.get_ists()]:
         if not json:
             utils.printwrn('Device isn\'t currently being used ... ')
@@ -344,19 +529,160 @@ def on_stop_filter(cmd: pcmd.Command, args: List[str], ind: str) -> None:
         return
     ch.del_filter(ind)
 
+def on_stop_master(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `stop master` - removes the limiter/compressor"""
+    if ch.master is None:
+        if not json:
+            utils.printwrn('There\'s no limiter/compressor ... ')
+        else:
+            print(JSON.dumps({ 'error': 'There\'s no limiter/compressor ... ', }))
+        return
+    ch.set_master(None)
+    if json:
+        print(JSON.dumps({}))
+
+def on_stop_gate(cmd: pcmd.Command, args: List[str], json: bool) -> None:
+    """Callback for `stop gate` - removes the noise gate"""
+    if ch.gate is None:
+        if not json:
+            utils.printwrn('There\'s no gate ... ')
+        else:
+            print(JSON.dumps({ 'error': 'There\'s no gate ... ', }))
+        return
+    ch.set_gate(None)
+    if json:
+        print(JSON.dumps({}))
+
+def on_stop_record(cmd: pcmd.Command, args: List[str], ind: str, json: bool) -> None:
+    """Callback for `stop record` - stops recording"""
+    recs = ch.get_recorders()
+    if ind.lower() in ('a', 'all'):
+        for _ in recs:
+            ch.del_recorder(0)
+    elif not ind.isdigit() or int(ind) >= len(recs):
+        if not json:
+            utils.printerr(f'"{ind}" is not a valid index (max: {len(recs)-1})!')
+        else:
+            print(JSON.dumps({ 'error': f'"{ind}" is not a valid index (max: {len(recs)-1})!' }))
+        return
+    else:
+        ch.del_recorder(int(ind))
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_filter(cmd: pcmd.Command, args: List[str], ind: int, name: str, value: str, json: bool) -> None:
+    """Callback for `set filter` - changes a parameter of a running filter"""
+    filters = ch.get_filters()
+    if ind < 0 or ind >= len(filters):
+        if not json:
+            utils.printerr(f'Index {ind} is out of bounds (max: {len(filters)-1})!')
+        else:
+            print(JSON.dumps({ 'error': f'Index {ind} is out of bounds (max: {len(filters)-1})!' }))
+        return
+    try:
+        filters[ind].set(name, value)
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_master(cmd: pcmd.Command, args: List[str], name: str, value: str, json: bool) -> None:
+    """Callback for `set master` - changes a parameter of the limiter/compressor"""
+    m = ch.master
+    try:
+        if m is None:
+            raise Exception('There\'s no limiter/compressor ... ')
+        m.set(name, value)
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_gate(cmd: pcmd.Command, args: List[str], name: str, value: str, json: bool) -> None:
+    """Callback for `set gate` - changes a parameter of the noise gate"""
+    g = ch.gate
+    try:
+        if g is None:
+            raise Exception('There\'s no gate ... ')
+        g.set(name, value)
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_input(cmd: pcmd.Command, args: List[str], indi: str, name: str, value: str, json: bool) -> None:
+    """Callback for `set input` - changes an input device's gain or mutes/unmutes it"""
+    try:
+        devs = [d for d in ch.get_ists() if d.indi == _dev_ind(indi)]
+        if not devs:
+            raise Exception('Device isn\'t currently being used ... ')
+        if name == 'gain':
+            devs[0].gain = utils.parse_perc(value)
+        elif name == 'mute':
+            if value.lower() not in ('on', 'off'):
+                raise Exception('Expected "on" or "off" ... ')
+            devs[0].muted = value.lower() == 'on'
+        else:
+            raise Exception(f'Unknown parameter "{name}" (available: gain, mute) ... ')
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_gc(cmd: pcmd.Command, args: List[str], policy: str, json: bool) -> None:
+    """Callback for `set gc` - changes the garbage collector policy"""
+    try:
+        ch.memory.set_policy(policy.lower())
+    except Exception as e:
+        if not json:
+            utils.printerr(str(e))
+        else:
+            print(JSON.dumps({ 'error': str(e), }))
+        return
+    if json:
+        print(JSON.dumps({}))
+
+def on_set_trace(cmd: pcmd.Command, args: List[str], value: str, json: bool) -> None:
+    """Callback for `set trace` - starts/stops tracing the audio thread's allocations"""
+    if value.lower() not in ('on', 'off'):
+        if not json:
+            utils.printerr('Expected "on" or "off" ... ')
+        else:
+            print(JSON.dumps({ 'error': 'Expected "on" or "off" ... ', }))
+        return
+    ch.memory.set_trace(value.lower() == 'on')
+    if json:
+        print(JSON.dumps({}))
+
 def on_start(cmd: pcmd.Command, args: List[str], json: bool) -> None:
-    """Callback for `start` - starts the channel"""
-    global ch
-    if ch.is_alive():
+    """Callback for `start` - starts the channel (or resumes it, if it's paused)"""
+    if ch.is_running():
         if not json:
             utils.printwrn('Already running ... ')
         else:
             print(JSON.dumps({ 'error': 'Already running ... ', }))
         return
-    ch = Channel(ch.transf, ch.ist, ch.ost)
-    server.ch = ch
     try:
-        ch.start()
+        if ch.is_paused():
+            ch.resume()
+        else:
+            ch.start()
         if json:
             print(JSON.dumps({}))
     except IOError as e:
@@ -366,14 +692,14 @@ def on_start(cmd: pcmd.Command, args: List[str], json: bool) -> None:
             print(JSON.dumps({ 'error': str(e), }))
 
 def on_stop(cmd: pcmd.Command, args: List[str], json: bool) -> None:
-    """Callback for `stop` - stops the channel"""
-    if not ch.is_alive():
+    """Callback for `stop` - pauses the channel (devices, filters and sounds are kept)"""
+    if not ch.is_running():
         if not json:
             utils.printwrn('Not running ... ')
         else:
             print(JSON.dumps({ 'error': 'Not running ... ', }))
         return
-    ch.kill()
+    ch.pause()
     if json:
         print(JSON.dumps({}))
 
@@ -383,6 +709,11 @@ def _with_json(c: pcmd.Command) -> pcmd.Command:
 
 def start() -> None:
     """Start prompting the user for input."""
+    global lib
+    if devman is not None:
+        devman.start()
+    lib = Library()
+    lib.start()
     # ---------------------------------------------------------------------------------------------------------------------- #
     sh.add_cmd(pcmd.Command('clear', 'cls', callback=pash.cmds.clear, hint='Clear the console ... '))
     # ---------------------------------------------------------------------------------------------------------------------- # 
@@ -391,14 +722,22 @@ def start() -> None:
     show_audio = pcmd.Command('audio', callback=on_show_audio, hint='Show what audio input is detected ... ')
     show_audio.add_arg('-s', '--scale', type=float, dest='scale', default=5., help='Specify output scale ... ')
     show_audio.add_arg('-c', '--char', type=str, dest='char', default='▬', help='Specify the character to be used for the graph ... ')
+    show_all_sounds = pcmd.Command('all', 'a', callback=on_show_all_sounds, hint='List all available sounds ... ')
+    show_all_sounds.add_arg('prefix', type=str, nargs='?', default='', help='Only list sounds whose name starts with this ... ')
+    show_all_sounds.add_arg('-t', '--tag', type=str, action='append', dest='tags', default=None, help='Only list sounds with this tag (a subdirectory; repeatable) ... ')
+    show_all_sounds.add_arg('-p', '--page', type=int, dest='page', default=0, help='Specify the page (starting at 0) ... ')
+    show_all_sounds.add_arg('-n', '--limit', type=int, dest='limit', default=PAGE, help='Specify the sounds per page (0 = all) ... ')
     sh.add_cmd(pcmd.CascCommand('show', 'sh', cmds=[
         _with_json(pcmd.Command('devices', 'dev', callback=on_show_devices, hint='List all devices ... ')),
         show_audio,
         _with_json(pcmd.Command('status', 'stat', callback=on_show_status, hint='Show the audio channel\'s status ... ')),
+        _with_json(pcmd.Command('recordings', 'rec', callback=on_show_recordings, hint='List everything that\'s being recorded ... ')),
+        _with_json(pcmd.Command('stats', callback=on_show_stats, hint='Show the audio channel\'s counters & output meter ... ')),
         _with_json(pcmd.CascCommand('sounds', cmds=[
-            _with_json(pcmd.Command('all', 'a', callback=on_show_all_sounds, hint='List all available sounds ... ')),
+            _with_json(show_all_sounds),
         ], callback=on_show_sounds, hint='List all currently playing sounds ... ')),
         pcmd.Command('interpreters', 'in', callback=on_show_interpreters, hint='List all running/available interpreters ... '),
+        _with_json(pcmd.Command('profile', 'prof', callback=on_show_profile, hint='Show the hottest filters & functions of the last profile ... ')),
         _with_json(pcmd.CascCommand('filters', 'fil', cmds=[
             _with_json(pcmd.Command('all', 'a', callback=on_show_all_filters, hint='List all available voice filters ... ')),
         ], callback=on_show_running_filters, hint='List all running/available voice filters ... ')),
@@ -407,39 +746,91 @@ def start() -> None:
     start_sound = pcmd.Command('sound', callback=on_start_sound, hint='Play a soundeffect ... ')
     start_sound.add_arg('parameters', type=str, nargs='*', help='Specify the filenames & volumes ... ')
     start_output = pcmd.Command('output', 'ost', callback=on_start_output, hint='Add an output device ... ')
-    start_output.add_arg('indo', type=int, help='Specify the output device\'s index ... ')
+    start_output.add_arg('indo', type=str, help='Specify the output device\'s index (or a virtual device, e.g. "sine:440") ... ')
     start_input = pcmd.Command('input', 'ist', callback=on_start_input, hint='Add an input device ... ')
-    start_input.add_arg('indi', type=int, help='Specify the input device\'s index ... ')
+    start_input.add_arg('indi', type=str, help='Specify the input device\'s index (or a virtual device, e.g. "sine:440") ... ')
     start_interpreter = pcmd.Command('interpreter', 'in', callback=on_start_interpreter, hint='Interpret a .fig file ... ')
     start_interpreter.add_arg('fname', type=str, help='Specify the filenames ... ')
+    start_interpreter.add_arg('-w', '--watch', action='store_true', help='Reload the file whenever it changes ... ')
     start_filter = pcmd.Command('filter', 'fil', callback=on_start_filter, hint='Add a filter to your audio input ... ')
     start_filter.add_arg('name', type=str, help='Specify the filter\'s name ... ')
     start_filter.add_arg('cargs', nargs='*', help='Specify the filter\'s arguments ... ')
+    start_limiter = pcmd.Command('limiter', 'lim', callback=on_start_limiter, hint='Limit the channel\'s output ... ')
+    start_limiter.add_arg('cargs', nargs='*', help='Specify [threshold-dB] [lookahead-ms] [release-ms] ... ')
+    start_compressor = pcmd.Command('compressor', 'comp', callback=on_start_compressor, hint='Compress the channel\'s output ... ')
+    start_compressor.add_arg('cargs', nargs='*', help='Specify <threshold-dB> <ratio> [attack-ms] [release-ms] [makeup-dB] ... ')
+    start_gate = pcmd.Command('gate', callback=on_start_gate, hint='Mute the input (and skip most processing) while nobody\'s talking ... ')
+    start_gate.add_arg('cargs', nargs='*', help='Specify [threshold-dB] [hold-ms] ... ')
+    start_record = pcmd.Command('record', 'rec', callback=on_start_record, hint='Record audio to a .wav/.flac file ... ')
+    start_record.add_arg('fname', type=str, help='Specify the filename ... ')
+    start_record.add_arg('-t', '--tap', type=str, dest='tap', default='output', help='Record the "input", the "output" or what comes out of the filter with the given index ... ')
+    start_profile = pcmd.Command('profile', 'prof', callback=on_start_profile, hint='Sample what the audio thread is doing (while it keeps running) ... ')
+    start_profile.add_arg('seconds', type=float, help='Specify for how many seconds ... ')
+    start_profile.add_arg('-o', '--output', type=str, dest='output', default=None, help='Specify the file the collapsed stacks are written to (for flame graphs) ... ')
+    start_profile.add_arg('-a', '--all', action='store_true', dest='every', help='Profile every thread (server, interpreters, devices, ...), not just the audio thread ... ')
     sh.add_cmd(_with_json(pcmd.CascCommand('start', cmds=[
         _with_json(start_sound),
         _with_json(start_output),
         _with_json(start_input),
         start_interpreter,
         start_filter,
+        _with_json(start_limiter),
+        _with_json(start_compressor),
+        _with_json(start_gate),
+        _with_json(start_record),
+        _with_json(start_profile),
         pcmd.Command('server', 'srv', callback=on_start_server, hint='Start the websocket server ... ')
     ], callback=on_start, hint='Start channeling audio / other things ... ')))
     # ---------------------------------------------------------------------------------------------------------------------- #
     stop_sound = pcmd.Command('sound', callback=on_stop_sound, hint='Remove a soundeffect ... ')
     stop_sound.add_arg('ind', type=str, help='Specify the sound effect\'s index ... ')
     stop_output = pcmd.Command('output', 'ost', callback=on_stop_output, hint='Remove an output device ... ')
-    stop_output.add_arg('indo', type=int, help='Specify the output device\'s index ... ')
+    stop_output.add_arg('indo', type=str, help='Specify the output device\'s index (or a virtual device, e.g. "sine:440") ... ')
     stop_input = pcmd.Command('input', 'ist', callback=on_stop_input, hint='Remove an input device ... ')
-    stop_input.add_arg('indi', type=int, help='Specify the input device\'s index ... ')
+    stop_input.add_arg('indi', type=str, help='Specify the input device\'s index (or a virtual device, e.g. "sine:440") ... ')
     stop_interpreter = pcmd.Command('interpreter', 'in', callback=on_stop_interpreter, hint='Stop a running interpreter ... ')
     stop_interpreter.add_arg('ind', type=str, help='Specify the interpreter\'s index ... ')
     stop_filter = pcmd.Command('filter', 'fil', callback=on_stop_filter, hint='Stop a running filter ... ')
     stop_filter.add_arg('ind', type=str, help='Specify the filter\'s index ... ')
+    stop_record = pcmd.Command('record', 'rec', callback=on_stop_record, hint='Stop recording ... ')
+    stop_record.add_arg('ind', type=str, nargs='?', default='all', help='Specify the recording\'s index (default: all) ... ')
     sh.add_cmd(_with_json(pcmd.CascCommand('stop', 'kill', cmds=[
         _with_json(stop_sound),
         _with_json(stop_output),
         _with_json(stop_input),
         stop_interpreter,
         stop_filter,
+        _with_json(pcmd.Command('master', 'limiter', 'compressor', callback=on_stop_master, hint='Remove the limiter/compressor ... ')),
+        _with_json(stop_record),
+        _with_json(pcmd.Command('profile', 'prof', callback=on_stop_profile, hint='Stop profiling early ... ')),
+        _with_json(pcmd.Command('gate', callback=on_stop_gate, hint='Remove the noise gate ... ')),
     ], callback=on_stop, hint='Stop channeling audio / other things ... ')))
     # ---------------------------------------------------------------------------------------------------------------------- #
+    set_filter = pcmd.Command('filter', 'fil', callback=on_set_filter, hint='Change a parameter of a running filter ... ')
+    set_filter.add_arg('ind', type=int, help='Specify the filter\'s index ... ')
+    set_filter.add_arg('name', type=str, help='Specify the parameter\'s name ... ')
+    set_filter.add_arg('value', type=str, help='Specify the parameter\'s new value ... ')
+    set_master = pcmd.Command('master', callback=on_set_master, hint='Change a parameter of the limiter/compressor ... ')
+    set_master.add_arg('name', type=str, help='Specify the parameter\'s name ... ')
+    set_master.add_arg('value', type=str, help='Specify the parameter\'s new value ... ')
+    set_gate = pcmd.Command('gate', callback=on_set_gate, hint='Change a parameter of the noise gate ... ')
+    set_gate.add_arg('name', type=str, help='Specify the parameter\'s name ... ')
+    set_gate.add_arg('value', type=str, help='Specify the parameter\'s new value ... ')
+    set_input = pcmd.Command('input', 'ist', callback=on_set_input, hint='Change an input device\'s gain or mute it ... ')
+    set_input.add_arg('indi', type=str, help='Specify the input device\'s index ... ')
+    set_input.add_arg('name', type=str, help='Specify "gain" or "mute" ... ')
+    set_input.add_arg('value', type=str, help='Specify the gain (e.g. "50%") or "on"/"off" ... ')
+    set_gc = pcmd.Command('gc', callback=on_set_gc, hint='Change the garbage collector policy while the channel is running ... ')
+    set_gc.add_arg('policy', type=str, help=f'Specify the policy ({", ".join(POLICIES)}) ... ')
+    set_trace = pcmd.Command('trace', callback=on_set_trace, hint='Trace the audio thread\'s allocations (slow) ... ')
+    set_trace.add_arg('value', type=str, help='Specify "on" or "off" ... ')
+    sh.add_cmd(pcmd.CascCommand('set', cmds=[
+        _with_json(set_filter),
+        _with_json(set_master),
+        _with_json(set_gate),
+        _with_json(set_input),
+        _with_json(set_gc),
+        _with_json(set_trace),
+    ], hint='Change settings while running ... '))
+    # ---------------------------------------------------------------------------------------------------------------------- #
     sh.prompt_until_exit()
\ No newline at end of file
@@ -1,39 +1,359 @@
-"""Extends the pyaudio.Stream class for further info"""
+"""Audio I/O devices - sound cards (PyAudio) and virtual devices (files, generators, null sink)"""
 
-import pyaudio
-from typing import Optional, Dict, Any
+import time, numpy as np
+from typing import Optional, Union, Dict, Any
 
-class Device(pyaudio.Stream):
+from figaro import params
+from figaro.resample import Resampler
+from figaro.sound import Sound, fit
+from figaro.recorder import writer
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+"""A device's index - PyAudio's device index or a virtual device's spec (e.g. "sine:440")"""
+Index = Union[int, str]
+"""How long (in seconds) to wait before trying to reopen a failed device - doubles with every failed attempt"""
+RETRY: float = .5
+"""The longest time (in seconds) between two attempts to reopen a failed device"""
+MAX_RETRY: float = 8.
+
+class Device(object):
     """
-    Extends the pyaudio.Stream class and represents an Audio I/O device.
+    An audio I/O device.
+
+    Backends only implement `_read`/`_write` (and `_fill`, if they buffer
+    audio on their own clock); everything else - resampling to the internal
+    rate, drift compensation - is done here.
 
     ...
 
     Attributes
     ----------
-    indi : Optional[int]
+    indi : Optional[Index]
         The input device's index.
-    indo : Optional[int]
+    indo : Optional[Index]
         The output device's index.
     name : str
         The device's name.
+    channels : int
+        The number of (interleaved) channels the device works with.
+    rate : int
+        The device's (native) sampling rate.
+    gain : float
+        The factor an input device's frames are mixed in with.
+    muted : bool
+        Is the input device muted?
+    realtime : bool
+        Does the device run in real time (otherwise, it's read/written as fast as possible - and audio is never dropped)?
+    _rs : Optional[Resampler]
+        Converts between the device's and the internal rate (`params.SMPRATE`) - only
+        if they differ or the device's clock drift is being compensated.
+    _fifo : np.ndarray
+        Frames (internal rate) that were read from the device, but not yet used.
+
+    Methods
+    -------
+    read_frames(n, steer, fill)
+        Reads `n` frames at the internal rate.
+    write_frames(data, steer)
+        Writes frames given at the internal rate.
+    reopen()
+        Reopens the device after it failed.
+    stop_stream()
+        Stops the device.
+    close()
+        Releases the device.
     """
 
-    def __init__(self, pa: pyaudio.PyAudio, rate: int, channels: int, format: int, *args, input_device_index: Optional[int] = None, output_device_index: Optional[int] = None, **kwargs):
-        self.indi: Optional[int] = input_device_index
-        self.indo: Optional[int] = output_device_index
-        self.name: str = pa.get_device_info_by_host_api_device_index(0, self.indi or self.indo)['name']
-        super(Device, self).__init__(pa, *args, rate=rate, channels=channels, format=format, *args, input_device_index=input_device_index, output_device_index=output_device_index, **kwargs)
-        pa._streams.add(self)
+    def __init__(self, rate: int, channels: int, name: str, indi: Optional[Index] = None, indo: Optional[Index] = None):
+        self.indi: Optional[Index] = indi
+        self.indo: Optional[Index] = indo
+        self.name: str = name
+        self.channels: int = channels
+        self.rate: int = rate
+        self.gain: float = 1.
+        self.muted: bool = False
+        self.realtime: bool = True
+        self._rs: Optional[Resampler] = None
+        self._fifo: np.ndarray = np.zeros((0, channels))
+
+    def _read(self, n: int) -> np.ndarray:
+        """Reads `n` frames at the device's rate, `(frames, channels)`"""
+        raise NotImplementedError()
+
+    def _write(self, data: np.ndarray) -> None:
+        """Writes frames at the device's rate, `(frames, channels)`"""
+        raise NotImplementedError()
+
+    def _fill(self) -> Optional[int]:
+        """Gets the number of frames buffered in the device (`None` if the device doesn't have a clock of its own)"""
+        return None
+
+    def _resampler(self, steer: bool) -> Optional[Resampler]:
+        """Gets the device's resampler (creates it, if it's needed from now on)"""
+        if self._rs is None and (steer or self.rate != params.SMPRATE):
+            self._rs = Resampler(self.rate, params.SMPRATE) if self.indi is not None else Resampler(params.SMPRATE, self.rate)
+        return self._rs
+
+    def read_frames(self, n: int, steer: bool = False, fill: Optional[int] = None) -> np.ndarray:
+        """Reads `n` frames (at the internal rate) as `(frames, channels)`; if `steer`, compensates the device's clock drift (keeps `fill` - the level of the buffer the frames go to - or else the device's buffer stable)"""
+        fill = (fill if fill is not None else self._fill()) if steer else None
+        rs = self._resampler(fill is not None)
+        if rs is None:
+            return self._read(n)
+        if fill is not None:
+            rs.steer(fill)
+        while len(self._fifo) < n:
+            self._fifo = np.concatenate((self._fifo, rs.process(self._read(rs.needed(n - len(self._fifo))))))
+        data, self._fifo = self._fifo[:n], self._fifo[n:]
+        return data
+
+    def write_frames(self, data: np.ndarray, steer: bool = False) -> None:
+        """Writes frames (at the internal rate, `(frames, channels)`); if `steer`, compensates the device's clock drift"""
+        fill = self._fill() if steer else None
+        rs = self._resampler(fill is not None)
+        if rs is None:
+            self._write(data)
+            return
+        if fill is not None:
+            rs.steer(fill)
+        self._write(rs.process(data))
+
+    def drift(self) -> float:
+        """Gets the current drift correction in ppm"""
+        return (self._rs.adjust - 1) * 1e6 if self._rs is not None else 0.
+
+    def reopen(self) -> None:
+        """Reopens the device after it failed (e.g. because it was unplugged) - raises, if that's not possible (yet)"""
+        raise Exception(f'{self.name} can\'t be reopened ... ')
+
+    def stop_stream(self) -> None:
+        """Stops the device"""
+        pass
+
+    def close(self) -> None:
+        """Releases the device"""
+        pass
 
     def toJSON(self) -> Dict[str, Any]:
         """Gets the device into a JSON-compatible format"""
-        return dict(type='input' if self.indi else 'output', index=self.indi or self.indo, name=self.name)
+        d = dict(type='input' if self.indi is not None else 'output', index=self.indi if self.indi is not None else self.indo,
+                 name=self.name, channels=self.channels, rate=self.rate, drift=self.drift())
+        return dict(d, gain=self.gain, muted=self.muted) if self.indi is not None else d
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Device):
             return False
-        return (self.indi == other.indi and self.indi) or (self.indo == other.indo and self.indo)
+        return self.indi == other.indi and self.indo == other.indo
 
     def __hash__(self) -> int:
-        return (1 + self.indi if self.indi else 0) ^ (1 + self.indo if self.indo else 0)
\ No newline at end of file
+        return hash((self.indi, self.indo))
+
+class PyAudioDevice(Device):
+    """
+    A sound card's input/output (through PyAudio), opened at its default rate.
+
+    ...
+
+    Attributes
+    ----------
+    stream : pyaudio.Stream
+        The PyAudio stream.
+    _pa : pyaudio.PyAudio
+        The PyAudio object the stream was opened with.
+    _manager : Optional[DeviceManager]
+        Where the device's info comes from (and where it's looked up by name again, if it has to be reopened).
+    _index : int
+        PyAudio's current index of the device (it might change after the device was unplugged).
+    """
+
+    def __init__(self, pa: "pyaudio.PyAudio", index: int, output: bool = False, manager: Optional["DeviceManager"] = None):
+        inf = manager.info(index) if manager is not None else pa.get_device_info_by_host_api_device_index(0, index)
+        chs = min(params.CHNNLS, inf['maxOutputChannels' if output else 'maxInputChannels']) or 1
+        rate = int(inf['defaultSampleRate'])
+        super(PyAudioDevice, self).__init__(rate, chs, inf['name'], indi=None if output else index, indo=index if output else None)
+        self._pa: pyaudio.PyAudio = pa
+        self._manager: Optional["DeviceManager"] = manager
+        self._index: int = index
+        self.stream: pyaudio.Stream = self._open(index)
+
+    def _open(self, index: int) -> "pyaudio.Stream":
+        """Opens a stream on the device with the given index"""
+        output = self.indo is not None
+        return self._pa.open(format=pyaudio.paFloat32, channels=self.channels, rate=self.rate, input=not output, output=output,
+                             input_device_index=None if output else index, output_device_index=index if output else None)
+
+    def reopen(self) -> None:
+        """Reopens the stream - on the device with the same name (its index might have changed)"""
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+        index = self._index
+        if self._manager is not None:
+            self._manager.refresh()
+            index = self._manager.find(self.name, self.indo is not None)
+            if index is None:
+                raise Exception(f'{self.name} isn\'t available ... ')
+        self.stream = self._open(index)
+        self._index = index
+        self._rs, self._fifo = None, np.zeros((0, self.channels))
+
+    def _read(self, n: int) -> np.ndarray:
+        return np.frombuffer(self.stream.read(n), dtype=np.float32).reshape(-1, self.channels)
+
+    def _write(self, data: np.ndarray) -> None:
+        self.stream.write(data.astype(np.float32).tobytes())
+
+    def _fill(self) -> Optional[int]:
+        return self.stream.get_read_available() if self.indi is not None else -self.stream.get_write_available()
+
+    def stop_stream(self) -> None:
+        self.stream.stop_stream()
+
+    def close(self) -> None:
+        self.stream.close()
+
+class Virtual(Device):
+    """
+    A device that only exists in software; runs at the internal rate and
+    either keeps pace with real time or runs as fast as it's being used.
+
+    ...
+
+    Attributes
+    ----------
+    realtime : bool
+        Is the device paced to real time?
+    _pos : int
+        The number of frames read/written so far.
+    _t0 : Optional[float]
+        When pacing started (or last resynced).
+    _clk : int
+        The number of frames read/written since `_t0`.
+    """
+
+    def __init__(self, spec: str, channels: int, name: str, output: bool, realtime: bool = True):
+        super(Virtual, self).__init__(params.SMPRATE, channels, name, indi=None if output else spec, indo=spec if output else None)
+        self.realtime: bool = realtime
+        self._pos: int = 0
+        self._t0: Optional[float] = None
+        self._clk: int = 0
+
+    def _pace(self, n: int) -> None:
+        """Waits until `n` more frames would have been played/recorded in real time (resyncs after long hiccups)"""
+        self._pos += n
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        self._clk += n
+        if self._t0 is None or now - (self._t0 + self._clk / self.rate) > 1:
+            self._t0, self._clk = now, n
+        time.sleep(max(0., self._t0 + self._clk / self.rate - now))
+
+class Sine(Virtual):
+    """A sine wave generator (input)"""
+
+    def __init__(self, spec: str, freq: float = 440., amp: float = .5, realtime: bool = True):
+        super(Sine, self).__init__(spec, 1, f'Sine ({freq:.0f}Hz)', False, realtime)
+        self.freq: float = freq
+        self.amp: float = amp
+
+    def _read(self, n: int) -> np.ndarray:
+        w = 2*np.pi*self.freq/self.rate
+        x = self.amp * np.sin(w * (self._pos + np.arange(n)))
+        self._pace(n)
+        return x.reshape(-1, 1)
+
+class Noise(Virtual):
+    """A white noise generator (input); the same seed generates the same noise"""
+
+    def __init__(self, spec: str, amp: float = .1, seed: int = 0, realtime: bool = True):
+        super(Noise, self).__init__(spec, params.CHNNLS, 'Noise', False, realtime)
+        self.amp: float = amp
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+    def _read(self, n: int) -> np.ndarray:
+        x = self._rng.standard_normal((n, self.channels)) * self.amp
+        self._pace(n)
+        return x
+
+class FileReader(Virtual):
+    """Plays an audio file as input (in a loop, or followed by silence)"""
+
+    def __init__(self, spec: str, fname: str, loop: bool = False, realtime: bool = True):
+        self.data: np.ndarray = Sound(fname).samples()
+        super(FileReader, self).__init__(spec, self.data.shape[1], fname, False, realtime)
+        self.loop: bool = loop
+
+    def _read(self, n: int) -> np.ndarray:
+        k = len(self.data)
+        if self.loop and k:
+            x = self.data.take(np.arange(self._pos, self._pos + n) % k, axis=0)
+        else:
+            x = self.data[self._pos:self._pos+n]
+            x = np.concatenate((x, np.zeros((n - len(x), self.channels))))
+        self._pace(n)
+        return x
+
+class FileWriter(Virtual):
+    """Writes the output to a .wav/.flac file"""
+
+    def __init__(self, spec: str, fname: str):
+        super(FileWriter, self).__init__(spec, params.CHNNLS, fname, True, False)
+        self._w, self._close = writer(fname, self.channels)
+
+    def _write(self, data: np.ndarray) -> None:
+        self._w(data)
+        self._pace(len(data))
+
+    def close(self) -> None:
+        self._close()
+
+class Null(Virtual):
+    """Discards the output"""
+
+    def __init__(self, spec: str, realtime: bool = True):
+        super(Null, self).__init__(spec, params.CHNNLS, 'Null', True, realtime)
+
+    def _write(self, data: np.ndarray) -> None:
+        self._pace(len(data))
+
+"""The virtual devices (and their arguments) - `<kind>:<arg0>:...`, a trailing `:fast` turns off real-time pacing"""
+VIRTUAL: Dict[str, str] = {
+    'sine': 'input, [freq] [amp]',
+    'noise': 'input, [amp] [seed]',
+    'file': 'input/output, <filename> [:loop]',
+    'null': 'output',
+}
+
+def open_device(spec: Index, output: bool, pa: Optional["pyaudio.PyAudio"] = None, manager: Optional["DeviceManager"] = None) -> Device:
+    """Opens a device - a PyAudio device's index or a virtual device's spec (see `VIRTUAL`)"""
+    if isinstance(spec, int) or spec.isdigit():
+        if pa is None:
+            raise Exception('PyAudio isn\'t available - only virtual devices can be used ... ')
+        return PyAudioDevice(pa, int(spec), output, manager)
+    kind, *args = spec.split(':')
+    kind = kind.lower()
+    flags = set()
+    while args and args[-1] in ('fast', 'loop'):
+        flags.add(args.pop())
+    rt = 'fast' not in flags
+    if kind not in VIRTUAL:
+        raise Exception(f'Unknown device "{kind}" (available: {", ".join(VIRTUAL)}) ... ')
+    if kind == 'file':
+        if not args:
+            raise Exception('Missing filename ("file:<filename>") ... ')
+        if output:
+            return FileWriter(spec, ':'.join(args))
+        return FileReader(spec, ':'.join(args), 'loop' in flags, rt)
+    if (kind == 'null') != output:
+        raise Exception(f'"{kind}" can only be used as {"an output" if kind == "null" else "an input"} ... ')
+    if kind == 'sine':
+        return Sine(spec, *map(float, args[:2]), realtime=rt)
+    if kind == 'noise':
+        return Noise(spec, *map(float, args[:1]), *map(int, args[1:2]), realtime=rt)
+    return Null(spec, rt)
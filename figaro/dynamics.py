@@ -0,0 +1,125 @@
+"""Dynamics processing (compressor/limiter) for the channel's output"""
+
+import numpy as np
+from typing import List, Dict, Any
+
+from figaro import params
+from figaro.filters.filter import Filter
+
+class Compressor(Filter.Filter):
+    """
+    A look-ahead compressor; with an infinite ratio, it's a (brickwall)
+    limiter.
+
+    Everything is computed per block, vectorized: the detector's gain curve is
+    faded in over the look-ahead window (a sliding minimum, so the gain always
+    reaches its target right at the peak), and the release is an exponential
+    return to 0dB, computed as a running minimum (in chunks of at most
+    `SPAN` release time constants, so the decay factors can't underflow on
+    long blocks). The audio is delayed by the
+    look-ahead; the delay line and the envelope carry over from block to block.
+
+    ...
+
+    Attributes
+    ----------
+    SPAN : float
+        How many release time constants the release is computed over at once (`exp(-SPAN)` is still a normal float).
+    threshold : float
+        The level (dBFS) above which the gain is reduced.
+    ratio : float
+        The compression ratio (`inf` for a limiter).
+    attack : float
+        The look-ahead/attack time in ms.
+    release : float
+        The release time (constant) in ms.
+    makeup : float
+        Gain (dB) applied after compression.
+    meter : Dict[str, float]
+        Meter readings of the last block (peak in/out in dBFS, gain reduction in dB).
+    _env : float
+        The gain (dB) at the end of the last block.
+    _hist : np.ndarray
+        The detector's target gains of the last `attack` ms.
+    _delay : np.ndarray
+        The audio of the last `attack` ms (the delay line).
+
+    Methods
+    -------
+    apply(data: np.ndarray)
+        Compresses the data and returns the result.
+    """
+
+    SPAN: float = 200.
+    PARAMS = dict(threshold=float, ratio=float, release=float, makeup=float)
+
+    def __init__(self, threshold: float = -1., ratio: float = float('inf'), attack: float = 5., release: float = 100., makeup: float = 0.):
+        if ratio < 1:
+            raise Exception('The ratio has to be at least 1 ... ')
+        if attack < 0 or release < 1:
+            raise Exception('Attack has to be >= 0ms, release >= 1ms ... ')
+        self.threshold: float = threshold
+        self.ratio: float = ratio
+        self.attack: float = attack
+        self.release: float = release
+        self.makeup: float = makeup
+        self.meter: Dict[str, float] = dict(peak_in=-180., peak_out=-180., gr=0., gr_max=0.)
+        n = int(round(attack * params.SMPRATE / 1000))
+        self._env: float = 0.
+        self._hist: np.ndarray = np.zeros(n)
+        self._delay: np.ndarray = np.zeros(0)
+        self._fade: np.ndarray = 1 - np.arange(n+1) / (n+1)
+
+    def _update(self, name: str) -> None:
+        if self.ratio < 1 or self.release < 1:
+            raise Exception('The ratio has to be at least 1, release >= 1ms ... ')
+
+    def apply(self, data: np.ndarray) -> np.ndarray:
+        n, d = len(data), len(self._hist)
+        if self._delay.shape[1:] != data.shape[1:] or len(self._delay) != d:
+            self._delay = np.zeros((d,) + data.shape[1:])
+        peak = np.abs(data).reshape(n, -1).max(axis=1)
+        lvl = 20*np.log10(np.maximum(peak, 1e-9))
+        slope = 1 - 1/self.ratio
+        target = np.minimum(0., (self.threshold - lvl) * slope)
+        g = np.concatenate((self._hist, target))
+        if d:
+            g = (np.lib.stride_tricks.sliding_window_view(g, d+1) * self._fade).min(axis=1)
+            self._hist = target[-d:] if n >= d else np.concatenate((self._hist[n:], target))
+        tau = self.release * params.SMPRATE / 1000
+        k = max(1, int(Compressor.SPAN * tau))
+        c = np.exp(-np.arange(min(n, k)+1) / tau)
+        for i in range(0, n, k):
+            m = min(k, n-i) + 1
+            g[i:i+m-1] = (np.minimum.accumulate(np.concatenate(([self._env], g[i:i+m-1])) / c[:m]) * c[:m])[1:]
+            self._env = g[i+m-2]
+        audio = np.concatenate((self._delay, data))
+        self._delay = audio[n:]
+        out = audio[:n] * (10**((g + self.makeup)/20)).reshape((-1,) + (1,)*(data.ndim-1))
+        self.meter = dict(
+            peak_in=float(lvl.max()),
+            peak_out=float(20*np.log10(max(np.abs(out).max(), 1e-9))),
+            gr=float(-g.min()),
+            gr_max=max(self.meter['gr_max'], float(-g.min())),
+        )
+        return out
+
+    def toJSON(self) -> Dict[str, Any]:
+        lim = self.ratio == float('inf')
+        return dict(name='limiter' if lim else 'compressor', threshold=self.threshold, ratio=None if lim else self.ratio,
+                    attack=self.attack, release=self.release, makeup=self.makeup, meter=self.meter)
+
+    def __str__(self) -> str:
+        if self.ratio == float('inf'):
+            return f'Limiter({self.threshold:.1f}dB, {self.release:.0f}ms release)'
+        return f'Compressor({self.threshold:.1f}dB, {self.ratio:.1f}:1, {self.attack:.0f}/{self.release:.0f}ms)'
+
+    @classmethod
+    def start(cls, args: List[str], limiter: bool = False) -> "Compressor":
+        """Creates a compressor (or limiter) from command line arguments"""
+        args = [float(a) for a in args if a.strip()]
+        if limiter:
+            return Compressor(**dict(zip(('threshold', 'attack', 'release'), args)))
+        if len(args) < 2:
+            raise Exception('Missing parameters <threshold-dB> <ratio> [attack-ms] [release-ms] [makeup-dB] ... ')
+        return Compressor(*args[:5])
@@ -0,0 +1,71 @@
+"""Uniformly partitioned FFT convolution, e.g. for convolution reverbs"""
+
+import numpy as np
+from typing import Optional
+
+def spectra(ir: np.ndarray, bsize: int) -> np.ndarray:
+    """Splits an impulse response into partitions of `bsize` samples and returns their spectra, `(n_partitions, bsize+1)`"""
+    k = max(1, -(-len(ir) // bsize))
+    parts = np.zeros((k, 2*bsize))
+    parts[:, :bsize].flat[:len(ir)] = ir
+    return np.fft.rfft(parts, axis=1)
+
+class Convolver(object):
+    """
+    Convolves a stream of blocks with a (long) impulse response, using
+    uniformly partitioned overlap-save convolution: the IR is split into
+    partitions of one block each, whose spectra are computed once, and every
+    block only costs one FFT, one inverse FFT and one multiply-accumulate per
+    partition in the frequency domain.
+
+    ...
+
+    Attributes
+    ----------
+    H : np.ndarray
+        The spectra of the IR's partitions, `(n_partitions, bsize+1)`.
+    bsize : int
+        The block (= partition) size.
+    _prev : Optional[np.ndarray]
+        The previous input block, `(bsize, n_channels)`.
+    _fdl : Optional[np.ndarray]
+        The frequency-domain delay line; holds every input spectrum twice,
+        so the last `n_partitions` spectra are always a contiguous view.
+    _pos : int
+        The current position in the delay line.
+
+    Methods
+    -------
+    process(x)
+        Convolve the next block.
+    reset()
+        Clear the convolver's state.
+    """
+
+    def __init__(self, H: np.ndarray):
+        self.H: np.ndarray = H[::-1]
+        self.bsize: int = (H.shape[1] - 1)
+        self._prev: Optional[np.ndarray] = None
+        self._fdl: Optional[np.ndarray] = None
+        self._pos: int = 0
+
+    def reset(self) -> None:
+        """Clears the convolver's state (i.e. the tail)"""
+        self._prev = None
+        self._fdl = None
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Convolves the next block (`(bsize,)` or `(bsize, channels)`) and returns the result"""
+        shape = x.shape
+        x = x.reshape(shape[0], -1)
+        k, b = self.H.shape
+        if self._fdl is None or self._prev.shape != x.shape:
+            self._prev = np.zeros(x.shape)
+            self._fdl = np.zeros((2*k, b, x.shape[1]), dtype=np.complex128)
+        X = np.fft.rfft(np.concatenate((self._prev, x)), axis=0)
+        self._prev = x.copy()
+        self._pos = (self._pos + 1) % k
+        self._fdl[self._pos] = X
+        self._fdl[self._pos+k] = X
+        Y = np.einsum('kbc,kb->bc', self._fdl[self._pos+1:self._pos+k+1], self.H)
+        return np.fft.irfft(Y, axis=0)[self.bsize:].reshape(shape)
@@ -1,29 +1,96 @@
 """The base class for all filters"""
 
 import numpy as np
+from threading import Lock
 from yapsy.IPlugin import IPlugin
 
-from typing import List, Dict, Any
+from typing import List, Tuple, Dict, Any, Callable
+
+from figaro import params
 
 class Filter(IPlugin):
     class Filter(object):
         """
         A filter for raw voice data.
 
+        Parameters listed in `PARAMS` can be changed while the filter is
+        running (`set`). Every parameter is a plain attribute, so an update is
+        a single, atomic assignment - the audio thread reads it once per block
+        and never has to wait for a lock. Parameters that would cause zipper
+        noise (gains, ...) are ramped towards their new value per sample
+        (`_ramp`).
+
         ...
 
+        Attributes
+        ----------
+        PARAMS : Dict[str, Callable[[str], Any]]
+            The filter's live-adjustable parameters and the functions parsing their values.
+        RAMP : float
+            How long (in seconds) it takes a ramped parameter to reach its new value.
+        _cur : Dict[str, Tuple[float, float, float]]
+            Current value, per-sample step and target of all ramped parameters (only used by the audio thread).
+
         Methods
         -------
         apply(data: np.ndarray)
             Applies the filter and returns the result.
+        idle(data: np.ndarray)
+            Used instead of `apply` while the input is silent.
+        set(name: str, value: str)
+            Changes one of the filter's parameters while it's running.
         """
 
+        PARAMS: Dict[str, Callable[[str], Any]] = {}
+        RAMP: float = .05
+        _set_mut: Lock = Lock()
+
         def __init__(self):
             raise NotImplementedError()
 
         def apply(self, data: np.ndarray) -> np.ndarray:
             raise NotImplementedError()
 
+        def idle(self, data: np.ndarray) -> np.ndarray:
+            """Used instead of `apply` while the (gated) input is silent - filters without a tail can skip all work, others only have to let their tail ring out"""
+            return self.apply(data)
+
+        def set(self, name: str, value: str) -> None:
+            """Changes one of the filter's parameters (picked up by the audio thread with the next block)"""
+            if name not in self.PARAMS:
+                raise Exception(f'Unknown parameter "{name}" (available: {", ".join(self.PARAMS) or "-"}) ... ')
+            v = self.PARAMS[name](value)
+            Filter.Filter._set_mut.acquire()
+            old = getattr(self, name)
+            setattr(self, name, v)
+            try:
+                self._update(name)
+            except Exception:
+                setattr(self, name, old)
+                raise
+            finally:
+                Filter.Filter._set_mut.release()
+
+        def _update(self, name: str) -> None:
+            """Called after parameter `name` has been changed (e.g. to recompute coefficients); raise to reject the value"""
+            pass
+
+        def _ramp(self, name: str, data: np.ndarray) -> Any:
+            """Gets the value of parameter `name` for every sample of `data` - ramps it towards its target, if it changed"""
+            if '_cur' not in self.__dict__:
+                self._cur: Dict[str, Tuple[float, float, float]] = {}
+            target = getattr(self, name)
+            cur, step, tgt = self._cur.get(name, (target, 0., target))
+            if tgt != target:
+                step, tgt = (target - cur) / (self.RAMP * params.SMPRATE), target
+            if cur == tgt:
+                self._cur[name] = (cur, 0., tgt)
+                return cur
+            r = cur + step * np.arange(1, len(data)+1)
+            r = np.minimum(r, tgt) if step > 0 else np.maximum(r, tgt)
+            self._cur[name] = (r[-1], step, tgt)
+            return r.reshape((-1,) + (1,)*(data.ndim-1))
+
         def toJSON(self) -> Dict[str, Any]:
             raise NotImplementedError()
 
@@ -32,7 +99,7 @@ class Filter(IPlugin):
 
         def __str__(self) -> str:
             raise NotImplementedError()
-    
+
     @classmethod
     def start(cls, args: List[str]) -> "Filter.Filter":
         """Accepts a list of command line arguments and returns the filter created from those arguments"""
@@ -41,4 +108,4 @@ class Filter(IPlugin):
     @classmethod
     def html(cls) -> str:
         """Returns the HTML necessary for a configuration form"""
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,199 @@
+"""Streaming cascades of second-order IIR sections (biquads), e.g. for EQs"""
+
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+
+import figaro.filters.filter
+
+try:
+    from scipy import signal as _signal
+except ImportError:
+    _signal = None
+
+"""All section types that can be designed"""
+KINDS: List[str] = ['lowpass', 'highpass', 'lowshelf', 'highshelf', 'peak']
+
+def design(kind: str, freq: float, rate: float, q: float = .5**.5, gain: float = 0.) -> np.ndarray:
+    """
+    Designs a single biquad (RBJ audio EQ cookbook).
+
+    Parameters
+    ----------
+    kind : str
+        One of `KINDS`.
+    freq : float
+        The cutoff/center frequency in Hz.
+    rate : float
+        The sampling rate in Hz.
+    q : float
+        The section's quality factor.
+    gain : float
+        The gain in dB (shelves and peaks only).
+
+    Returns
+    -------
+    np.ndarray
+        The section as `[b0, b1, b2, 1, a1, a2]`.
+    """
+    if kind not in KINDS:
+        raise Exception(f'Unknown filter type "{kind}" (available: {", ".join(KINDS)}) ... ')
+    if not 0 < freq < rate/2:
+        raise Exception(f'Frequency has to be between 0 and {rate/2:.0f}Hz ... ')
+    if q <= 0:
+        raise Exception('Q has to be positive ... ')
+    A = 10**(gain/40)
+    w = 2*np.pi*freq/rate
+    cw, alpha = np.cos(w), np.sin(w)/(2*q)
+    if kind == 'lowpass':
+        b, a = [(1-cw)/2, 1-cw, (1-cw)/2], [1+alpha, -2*cw, 1-alpha]
+    elif kind == 'highpass':
+        b, a = [(1+cw)/2, -1-cw, (1+cw)/2], [1+alpha, -2*cw, 1-alpha]
+    elif kind == 'peak':
+        b, a = [1+alpha*A, -2*cw, 1-alpha*A], [1+alpha/A, -2*cw, 1-alpha/A]
+    else:
+        s = 1 if kind == 'lowshelf' else -1
+        r = 2*A**.5*alpha
+        b = [A*((A+1)-s*(A-1)*cw+r), s*2*A*((A-1)-s*(A+1)*cw), A*((A+1)-s*(A-1)*cw-r)]
+        a = [(A+1)+s*(A-1)*cw+r, -s*2*((A-1)+s*(A+1)*cw), (A+1)+s*(A-1)*cw-r]
+    return np.array(b + a) / a[0]
+
+class Cascade(object):
+    """
+    A cascade of biquads that keeps its state across blocks.
+
+    Uses `scipy.signal.sosfilt` if SciPy is available. Otherwise, every
+    section processes a whole block at once: within a block, a section's
+    output is the (FFT) convolution of the block with the section's truncated
+    impulse response plus the response to the section's state, and the state
+    at the end of the block is a linear function of both (state-space form of
+    the transposed direct form II). All of that is precomputed per section and
+    block size, whenever the section changes.
+
+    ...
+
+    Attributes
+    ----------
+    sos : np.ndarray
+        The sections, `(n_sections, 6)`.
+    _coef : Tuple[np.ndarray, Dict[Tuple[int, int], Tuple[np.ndarray, ...]]]
+        The sections and their precomputed block kernels per (section, block
+        size) - swapped as a whole, so the audio thread never sees a mix of
+        old and new coefficients.
+    _zi : Optional[np.ndarray]
+        The filter state, `(n_sections, 2, n_channels)`.
+
+    Methods
+    -------
+    update(sos)
+        Swap in new sections (keeps the state - no clicks).
+    process(x)
+        Filter a block of audio.
+    reset()
+        Clear the filter state.
+    silent()
+        Has the filter's output decayed completely?
+    """
+
+    def __init__(self, sos: np.ndarray):
+        self._coef: Tuple[np.ndarray, Dict[Tuple[int, int], Tuple[np.ndarray, ...]]] = (np.atleast_2d(np.asarray(sos, dtype=np.float64)), {})
+        self._zi: Optional[np.ndarray] = None
+
+    @property
+    def sos(self) -> np.ndarray:
+        return self._coef[0]
+
+    def update(self, sos: np.ndarray) -> None:
+        """Swaps in new sections (same number of them), keeping the filter's state and the kernels of unchanged sections"""
+        sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        old, kern = self._coef
+        if sos.shape != old.shape:
+            raise Exception('The number of sections can\'t change ... ')
+        # the audio thread may add kernels meanwhile - iterate over a snapshot (one added after it is just recomputed)
+        self._coef = (sos, {k: v for k, v in list(kern.items()) if np.array_equal(old[k[0]], sos[k[0]])})
+
+    def reset(self) -> None:
+        """Clears the filter's state"""
+        self._zi = None
+
+    def silent(self) -> bool:
+        """Checks whether the filter's state (and therefore its output for silent input) has decayed below -180dB"""
+        zi = self._zi
+        return zi is None or not np.abs(zi).max() > 1e-9
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filters a block of audio (`(frames,)` or `(frames, channels)`) and returns the result"""
+        shape = x.shape
+        x = x.reshape(shape[0], -1)
+        sos, kern = self._coef
+        if self._zi is None or self._zi.shape[2] != x.shape[1]:
+            self._zi = np.zeros((len(sos), 2, x.shape[1]))
+        if _signal is not None:
+            y, self._zi = _signal.sosfilt(sos, x, axis=0, zi=self._zi)
+            return y.reshape(shape)
+        for i in range(len(sos)):
+            x = self._section(i, x, sos, kern)
+        return x.reshape(shape)
+
+    def _section(self, i: int, x: np.ndarray, sos: np.ndarray, kern: Dict[Tuple[int, int], Tuple[np.ndarray, ...]]) -> np.ndarray:
+        """Runs a block through the `i`-th section (NumPy path)"""
+        n = x.shape[0]
+        if (i, n) not in kern:
+            kern[(i, n)] = self._kernels(sos[i], n)
+        H, r, AN, T, nfft = kern[(i, n)]
+        z = self._zi[i]
+        y = np.fft.irfft(np.fft.rfft(x, nfft, axis=0) * H[:, None], nfft, axis=0)[:n]
+        y += r @ z
+        self._zi[i] = AN @ z + T @ x
+        return y
+
+    @staticmethod
+    def _kernels(sec: np.ndarray, n: int) -> Tuple[np.ndarray, ...]:
+        """Precomputes everything a section needs to process blocks of `n` frames"""
+        b0, b1, b2, _, a1, a2 = sec
+        A = np.array([[-a1, 1.], [-a2, 0.]])
+        B = np.array([b1 - a1*b0, b2 - a2*b0])
+        P = np.empty((n+1, 2, 2))
+        P[0] = np.eye(2)
+        l = 1
+        while l <= n:
+            c = min(l, n+1-l)
+            P[l:l+c] = P[:c] @ (P[l-1] @ A)
+            l += c
+        PB = P[:n] @ B
+        h = np.concatenate(([b0], PB[:n-1, 0]))
+        nfft = 1 << int(np.ceil(np.log2(2*n)))
+        return np.fft.rfft(h, nfft), P[:n, 0, :], P[n], PB[::-1].T, nfft
+
+class Filter(figaro.filters.filter.Filter.Filter):
+    """
+    Base for filters that are a cascade of biquads; subclasses design their
+    sections in `_design`, which is called again whenever a parameter changes.
+
+    ...
+
+    Attributes
+    ----------
+    cascade : Cascade
+        The biquads.
+
+    Methods
+    -------
+    apply(data: np.ndarray)
+        Applies the filter and returns the result.
+    """
+
+    def __init__(self):
+        self.cascade: Cascade = Cascade(self._design())
+
+    def _design(self) -> np.ndarray:
+        """Designs the filter's sections from its current parameters"""
+        raise NotImplementedError()
+
+    def _update(self, name: str) -> None:
+        self.cascade.update(self._design())
+
+    def apply(self, data: np.ndarray) -> np.ndarray:
+        return self.cascade.process(data)
+
+    def idle(self, data: np.ndarray) -> np.ndarray:
+        return data if self.cascade.silent() else self.cascade.process(data)
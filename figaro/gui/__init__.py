@@ -1,46 +1,153 @@
-"""Serves the compiled React frontend locally for the GUI"""
+"""Keeps the compiled React frontend in memory and answers requests for it (the server serves it alongside the websocket API)"""
 
-import http.server, socketserver, threading, os, json
-from typing import Tuple, Optional
+import os, re, gzip, hashlib, mimetypes
+from urllib.parse import urlsplit, unquote
+from typing import Tuple, Optional, Dict, List
 
 from figaro import utils, params
 
-"""The actual HTTP daemon"""
-httpd: socketserver.TCPServer = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 """The path to the GUI package directory"""
 bpath: str = os.path.join(params.BPATH, 'figaro', 'gui')
-"""The config for the HTTP server"""
-conf: object = {}
-
-class FigaroHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, request: bytes, client_address: Tuple[str, int], server: socketserver.BaseServer):
-        super(FigaroHandler, self).__init__(request, client_address, server, directory=os.path.join(bpath, 'web', 'public'))
-
-    def log_message(self, format, *args):
-        return
-
-def _start():
-    """The function that will actually start the server"""
-    global httpd
-    httpd = socketserver.TCPServer((conf['host'], conf['port']), FigaroHandler)
-    # print(f'Server listening on {params.GUI_HOST}:{params.GUI_PORT} ... ')
-    httpd.serve_forever()
-
-def start():
-    """Start the server hosting the static files"""
-    global conf
-    cpath = os.path.join(bpath, 'dist', 'config', 'conf.json')
-    if not os.path.isfile(cpath):
-        utils.printwrn(f'Config file ("{cpath}") missing ... trying to (re)compile GUI ... ')
-        os.system(f'cd {bpath} && npm run build')
-    if not os.path.isfile(cpath):
-        utils.printerr(f'Config file "{cpath}" doesn\'t exist ... ')
-        os._exit(1)
-    with open(cpath, 'r') as f:
-        conf = json.load(f)
-    threading.Thread(target=_start).start()
-
-def stop():
-    """Stops the server hosting the static files"""
-    if httpd:
-        httpd.shutdown()
\ No newline at end of file
+"""Files smaller than this (in bytes) aren't compressed"""
+MIN_COMPRESS: int = 256
+"""The MIME types (besides text/*) that are worth compressing"""
+COMPRESSIBLE: Tuple[str, ...] = ('application/javascript', 'application/json', 'application/xml', 'image/svg+xml', 'application/wasm')
+"""Matches the files whose name contains a content hash (Gatsby's `static/` folder, `app-<hash>.js`, ...) - they never change"""
+HASHED: re.Pattern = re.compile(r'(?:^static/|[-.][0-9a-f]{16,}\.[a-z0-9]+$)')
+"""`Cache-Control` for files whose name contains a content hash"""
+IMMUTABLE: str = 'public, max-age=31536000, immutable'
+"""`Cache-Control` for all other files (cached, but always revalidated)"""
+REVALIDATE: str = 'no-cache'
+
+class Asset(object):
+    """
+    A static file, loaded into memory - along with its precompressed variants.
+
+    ...
+
+    Attributes
+    ----------
+    body : bytes
+        The file's contents.
+    ctype : str
+        The file's MIME type.
+    etag : str
+        The (quoted) hash of the file's contents.
+    cache : str
+        The file's `Cache-Control` header.
+    variants : Dict[str, bytes]
+        The compressed contents (by content coding, e.g. "br" or "gzip"); only the ones that are actually smaller.
+
+    Methods
+    -------
+    pick(accept)
+        Picks the best variant for an `Accept-Encoding` header.
+    """
+
+    def __init__(self, rel: str, body: bytes):
+        self.body: bytes = body
+        self.ctype: str = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        self.etag: str = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.cache: str = IMMUTABLE if HASHED.search(rel) else REVALIDATE
+        self.variants: Dict[str, bytes] = {}
+        if len(body) < MIN_COMPRESS or not (self.ctype.startswith('text/') or self.ctype in COMPRESSIBLE):
+            return
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+        self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        self.variants = { k: v for k, v in self.variants.items() if len(v) < len(body) }
+
+    def pick(self, accept: str) -> Tuple[Optional[str], bytes]:
+        """Picks the smallest variant the client accepts (`None` = uncompressed)"""
+        ok = _codings(accept)
+        best = (None, self.body)
+        for k, v in self.variants.items():
+            if ok.get(k, ok.get('*', 0.)) > 0 and len(v) < len(best[1]):
+                best = (k, v)
+        return best
+
+def _codings(accept: str) -> Dict[str, float]:
+    """Parses an `Accept-Encoding` header into the content codings and their q-values"""
+    res = {}
+    for part in (accept or '').split(','):
+        name, *prms = [s.strip() for s in part.split(';')]
+        if not name:
+            continue
+        q = 1.
+        for p in prms:
+            if p.startswith('q='):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.
+        res[name.lower()] = q
+    return res
+
+def _matches(inm: Optional[str], etag: str) -> bool:
+    """Does an `If-None-Match` header match the ETag (of any of the asset's variants)?"""
+    if not inm:
+        return False
+    tags = [t.strip() for t in inm.split(',')]
+    tags = [t[2:] if t.startswith('W/') else t for t in tags]
+    return '*' in tags or any(t.strip('"').split('-')[0] == etag.strip('"') for t in tags)
+
+"""All static files (by URL path), loaded by `load()`"""
+assets: Dict[str, Asset] = {}
+
+def load(root: str) -> Dict[str, Asset]:
+    """Loads every file below `root` into memory (and compresses it); returns them by their URL path"""
+    res = {}
+    for d, _, fs in os.walk(root):
+        for f in fs:
+            p = os.path.join(d, f)
+            rel = os.path.relpath(p, root).replace(os.sep, '/')
+            with open(p, 'rb') as fh:
+                res['/' + rel] = Asset(rel, fh.read())
+    return res
+
+def lookup(path: str) -> Optional[Asset]:
+    """Finds the asset for a URL path (`/foo/` and `/foo` are `/foo/index.html`)"""
+    path = unquote(urlsplit(path).path)
+    for p in (path, path.rstrip('/') + '/index.html'):
+        if p in assets:
+            return assets[p]
+    return None
+
+def respond(method: str, path: str, headers: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """Answers a request for a static file; returns the status, the headers and the body"""
+    if method not in ('GET', 'HEAD'):
+        return 405, [('Allow', 'GET, HEAD'), ('Content-Length', '0')], b''
+    a, status = lookup(path), 200
+    if a is None:
+        a, status = assets.get('/404.html'), 404
+        if a is None:
+            return 404, [('Content-Type', 'text/plain'), ('Content-Length', '9')], b'Not found' if method == 'GET' else b''
+    coding, body = a.pick(headers.get('Accept-Encoding', ''))
+    etag = a.etag if coding is None else a.etag[:-1] + '-' + coding + '"'
+    hdrs = [('Content-Type', a.ctype), ('ETag', etag), ('Cache-Control', a.cache if status == 200 else REVALIDATE)]
+    if a.variants:
+        hdrs.append(('Vary', 'Accept-Encoding'))
+    if status == 200 and _matches(headers.get('If-None-Match'), a.etag):
+        return 304, hdrs, b''
+    if coding is not None:
+        hdrs.append(('Content-Encoding', coding))
+    hdrs.append(('Content-Length', str(len(body))))
+    return status, hdrs, body if method == 'GET' else b''
+
+def start() -> None:
+    """Loads the compiled frontend into memory (the server serves it from there)"""
+    global assets
+    root = os.path.join(bpath, 'web', 'public')
+    assets = load(root)
+    if not assets:
+        utils.printwrn(f'There are no files in "{root}" - build the frontend ("npm run build:web") ... ')
+
+def stop() -> None:
+    """Drops the loaded frontend"""
+    global assets
+    assets = {}
@@ -68,7 +68,7 @@ interface AppProviderState extends AppContextProps {
 
 export class AppProvider extends React.Component<AppProviderProps, AppProviderState> {
   public static id: string = Date.now() + Math.random().toString(36).substr(1,8);
-  public static dURL: string = 'ws://localhost:51966';
+  public static dURL: string = 'ws://localhost:51966/ws';
 
   private sock: WebSocket;
   private resolvers: { [key: string]: (res: object)=>void } = {};
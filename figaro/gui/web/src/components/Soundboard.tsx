@@ -23,7 +23,7 @@ export default class Soundboard extends React.Component<SoundboardProps, Soundbo
     interface SoundsResponse extends Response {
       sounds: string[];
     }
-    this.context.onLogin(() => this.context.req<SoundsResponse>('sh sounds a', {})
+    this.context.onLogin(() => this.context.req<SoundsResponse>('sh sounds a -n 0', {})
       .then(res => {
         if (!res.success) return;
         this.setState({
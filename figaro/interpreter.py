@@ -3,12 +3,17 @@
 import os, re, time, threading
 from pash.shell import Shell
 from pynput import keyboard as kb
-from typing import List, Dict, Union, Optional, Set, Callable
+from typing import List, Dict, Tuple, Union, Optional, Set, FrozenSet, Callable
 
-from figaro import utils
+from figaro import utils, scheduler
 from figaro.sound import Sound
 from figaro.channel import Channel
 
+"""A single, pre-split line of a hotkey block (line number, raw line, arguments)"""
+Line = Tuple[int, str, List[str]]
+"""A compiled hotkey block (the hotkey's keys and its lines)"""
+Block = Tuple[FrozenSet[Union[kb.Key, kb.KeyCode]], List[Line]]
+
 class Interpreter(object):
     """
     The interpreter for .fig files
@@ -23,34 +28,91 @@ class Interpreter(object):
         A Figaro channel.
     sh : Shell
         The shell used for command interpretation.
-    keys : List[Set[Union[pynput.keyboard.Key, pynput.keyboard.KeyCode]]]
-        List of all mapped hotkeys.
-    cmds : List[Tuple[int, List[str]]]
-        List of all commands.
-    builtins : Map[str, Callable[[int, List[str]], None]]
-        Mapping of all builtin functions.
+    watch : bool
+        Should the file be reloaded whenever it changes?
+    table : Dict[FrozenSet[Union[pynput.keyboard.Key, pynput.keyboard.KeyCode]], List[Line]]
+        The dispatch table; maps each hotkey to its (compiled) lines.
+    builtins : Map[str, Callable[[int, List[str], Dict[str, float]], None]]
+        Mapping of all builtin functions (they get passed the line, its arguments and the timing context).
     lstn : pynput.keyboard.Listener
         The keystroke listener.
     cu : Set[Union[kb.Key, kb.KeyCode]]
         The currently pressed keys.
+    _cache : Dict[Tuple[str, Tuple[str, ...]], Tuple[int, Block]]
+        Compiled blocks (and the line they were compiled at), keyed by their source.
+    _mtime : float
+        The modification time of the currently loaded version of the file.
+    _stop : threading.Event
+        Signals the watcher thread to stop.
+
+    Methods
+    -------
+    exec()
+        Interpret the file and start listening for keystrokes.
+    reload()
+        Recompile the file and swap in the new dispatch table.
+    kill()
+        Stop the interpreter.
     """
-    
-    def __init__(self, fname: str, chnnl: Channel, sh: Shell):
+
+    """How often (in seconds) a watched file is checked for changes"""
+    WATCH_INTERVAL: float = .5
+
+    def __init__(self, fname: str, chnnl: Channel, sh: Shell, watch: bool = False):
         self.fname: str = fname
         self.chnnl: Channel = chnnl
         self.sh: Shell = sh
+        self.watch: bool = watch
         if not os.path.isfile(self.fname):
             raise OSError('File "{}" doesn\'t exist!'.format(self.fname))
-        self.keys: List[Set[Union[kb.Key, kb.KeyCode]]] = []
-        self.cmds: List[Tuple[int, List[str]]] = []
-        self.builtins: Map[str, Callbale[[int, List[str]], None]] = {
+        self.table: Dict[FrozenSet[Union[kb.Key, kb.KeyCode]], List[Line]] = {}
+        self.builtins: Map[str, Callbale[[int, List[str], Dict[str, float]], None]] = {
             'pause': self._cmd_pause,
+            'at': self._cmd_at,
+            'after': self._cmd_after,
+            'every': self._cmd_every,
+            'cancel': self._cmd_cancel,
         }
         self.lstn: kb.Listener = kb.Listener(on_press=self._on_press, on_release=self._on_release)
         self.cu: Set[Union[kb.Key, kb.KeyCode]] = set()
+        self._cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, Block]] = {}
+        self._mtime: float = 0.
+        self._stop: threading.Event = threading.Event()
 
     def exec(self) -> None:
         """Interpret the commands in the file, and start listening for keystrokes"""
+        self.reload()
+        self.lstn.start()
+        if self.watch:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def reload(self) -> None:
+        """Recompile the file (only blocks that changed) and atomically swap in the new dispatch table"""
+        mtime = os.path.getmtime(self.fname)
+        cache = {}
+        table = {}
+        for lc, head, body in self._scan():
+            src = (head, tuple(l.rstrip('\r\n') for l in body))
+            if src in self._cache:
+                olc, (keys, lns) = self._cache[src]
+                blk = (keys, [(c+lc-olc, l, a) for c, l, a in lns])
+            else:
+                blk = self._compile(lc, head, body)
+            cache[src] = (lc, blk)
+            table[blk[0]] = blk[1]
+        self._cache = cache
+        self._mtime = mtime
+        self.table = table
+
+    def kill(self) -> None:
+        """Stop the Interpreter"""
+        self._stop.set()
+        scheduler.sched.cancel(self)
+        self.lstn.stop()
+
+    def _scan(self) -> List[Tuple[int, str, List[str]]]:
+        """Split the file into its raw hotkey blocks (line number, hotkey definition, body)"""
+        blocks = []
         with open(self.fname, 'r', encoding='utf-8') as f:
             lc = 0
             while True:
@@ -63,7 +125,6 @@ class Interpreter(object):
                     continue
                 if not l.endswith('::'):
                     raise SyntaxError('{}:{} Syntax Error: Missing "::" after key definitions ... '.format(self.fname, lc))
-                l = l[:-2]
                 lns = [f.readline(),]
                 while not lns[-1].strip() == 'return':
                     cl = f.readline()
@@ -72,41 +133,70 @@ class Interpreter(object):
                     lns.append(cl)
                 if lns[-1].strip() != 'return':
                     raise SyntaxError('{}:{} Syntax Error: Missing "return" statement ... '.format(self.fname, lc))
-                m = {
-                    ' ': kb.Key.space,
-                    '!': kb.Key.alt,
-                    '^': kb.Key.ctrl,
-                    '+': kb.Key.shift,
-                }
-                s = set()
-                for c in l:
-                    if c in m.keys():
-                        s.add(m[c])
-                        continue
-                    if re.match(r'(?:\w|\d)+', c):
-                        s.add(kb.KeyCode(char=c.lower()))
-                self.keys.append(s)
-                self.cmds.append((lc+1, lns))
+                blocks.append((lc, l[:-2], lns))
                 lc += len(lns)
-        self.lstn.start()
-
-    def kill(self) -> None:
-        """Stop the Interpreter"""
-        self.lstn.stop()
+        return blocks
 
-    def _run(self, lc: int, lines: List[str]) -> None:
-        """Run a couple of .fig lines"""
-        for i, l in enumerate(lines):
+    def _compile(self, lc: int, head: str, body: List[str]) -> Block:
+        """Compile a single hotkey block - parse its keys and pre-split its lines"""
+        m = {
+            ' ': kb.Key.space,
+            '!': kb.Key.alt,
+            '^': kb.Key.ctrl,
+            '+': kb.Key.shift,
+        }
+        s = set()
+        for c in head:
+            if c in m.keys():
+                s.add(m[c])
+                continue
+            if re.match(r'(?:\w|\d)+', c):
+                s.add(kb.KeyCode(char=c.lower()))
+        lns = []
+        for i, l in enumerate(body):
             l = l.strip()
             if not l or l.startswith('//') or l == 'return':
                 continue
             if not l.count('"') % 2 == 0:
-                raise SyntaxError('{}:{} Syntax Error: Unmatched " ... '.format(self.fname, lc+i))
+                raise SyntaxError('{}:{} Syntax Error: Unmatched " ... '.format(self.fname, lc+1+i))
             args = [a.replace('"', '') for a in re.split(r'\s(?:(?=(?:[^"]*"[^"]*")+[^"]*$)|(?=[^"]*$))', l)]
-            if not args[0] in self.builtins.keys():
-                self.sh.parse(l)
+            if args[0] in ('pause', 'at', 'after', 'every'):
+                self._parse_ms(lc+1+i, args[1:])
+            if args[0] in ('at', 'after', 'every') and len(args) < 3:
+                raise SyntaxError('{}:{} Semantic Error: Missing command '.format(self.fname, lc+1+i))
+            lns.append((lc+1+i, l, args))
+        return (frozenset(s), lns)
+
+    def _watch(self) -> None:
+        """Poll the file for changes and reload it; keeps the last good version on errors"""
+        while not self._stop.wait(Interpreter.WATCH_INTERVAL):
+            try:
+                if os.path.getmtime(self.fname) == self._mtime:
+                    continue
+            except OSError:
                 continue
-            self.builtins[args[0]](lc+i, args[1:])
+            try:
+                self.reload()
+            except SyntaxError as e:
+                self._mtime = os.path.getmtime(self.fname)
+                utils.printerr(str(e))
+                utils.printwrn(f'{self.fname}: keeping the last working version ... ')
+            except OSError as e:
+                utils.printerr(str(e))
+
+    def _run(self, lines: List[Line], t0: float) -> None:
+        """Run a couple of (compiled) .fig lines; `t0` is when the hotkey was triggered"""
+        ctx = dict(t0=t0, cur=t0)
+        for lc, l, args in lines:
+            self._dispatch(lc, l, args, ctx)
+
+    def _dispatch(self, lc: int, l: str, args: List[str], ctx: Dict[str, float]) -> None:
+        """Run a single .fig line - either a builtin or a shell command"""
+        if not args[0] in self.builtins.keys():
+            scheduler.set_due(ctx['cur'])
+            self.sh.parse(l)
+            return
+        self.builtins[args[0]](lc, args[1:], ctx)
 
     def _parse_key(self, key: Union[kb.Key, kb.KeyCode]) -> Union[kb.Key, kb.KeyCode]:
         """Parses a given key/keycode"""
@@ -121,15 +211,16 @@ class Interpreter(object):
         elif isinstance(key, kb.KeyCode) and key.vk >= 32 and key.vk <= 126:
             key = kb.KeyCode(char=chr(key.vk).lower())
         return key
-        
+
     def _on_press(self, key: Optional[Union[kb.Key, kb.KeyCode]]) -> None:
         """Callback for the key pressed event"""
         if not key:
             return
         key = self._parse_key(key)
         self.cu.add(key)
-        if self.cu in self.keys:
-            threading.Thread(target=self._run, args=(*self.cmds[self.keys.index(self.cu)],)).start()
+        lines = self.table.get(frozenset(self.cu))
+        if lines is not None:
+            threading.Thread(target=self._run, args=(lines, time.perf_counter(),)).start()
 
     def _on_release(self, key: Optional[Union[kb.Key, kb.KeyCode]]) -> None:
         """Callback for the key released event"""
@@ -141,13 +232,48 @@ class Interpreter(object):
         except KeyError:
             self.cu.clear()
 
-    def _cmd_pause(self, lc: int, args: List[str]) -> None:
-        """Builtin `pause` - waits for the given amount of ms"""
+    def _parse_ms(self, lc: int, args: List[str]) -> float:
+        """Parses the amount of ms a builtin was given and returns it in seconds"""
         if not args:
             raise SyntaxError('{}:{} Semantic Error: Missing arguments '.format(self.fname, lc))
-        if not re.match(r'\d+', args[0]):
+        if not re.match(r'^\d+$', args[0]):
             raise SyntaxError('{}:{} Syntax Error: "{}" is not of type integer ... '.format(self.fname, lc, args[0]))
-        time.sleep(int(args[0])/1000)
+        return int(args[0])/1000
+
+    def _schedule(self, lc: int, args: List[str], due: float, period: Optional[float] = None) -> None:
+        """Schedule the command following a builtin's time argument"""
+        if len(args) < 2:
+            raise SyntaxError('{}:{} Semantic Error: Missing command '.format(self.fname, lc))
+        cargs = args[1:]
+        l = ' '.join('"{}"'.format(a) if re.search(r'\s', a) else a for a in cargs)
+        scheduler.sched.add(due, lambda d: self._dispatch(lc, l, cargs, dict(t0=d, cur=d)), period, owner=self)
+
+    def _cmd_pause(self, lc: int, args: List[str], ctx: Dict[str, float]) -> None:
+        """Builtin `pause` - waits for the given amount of ms"""
+        s = self._parse_ms(lc, args)
+        ctx['cur'] += s
+        time.sleep(s)
+
+    def _cmd_at(self, lc: int, args: List[str], ctx: Dict[str, float]) -> None:
+        """Builtin `at` - runs a command the given amount of ms after the hotkey was triggered"""
+        ctx['cur'] = ctx['t0'] + self._parse_ms(lc, args)
+        self._schedule(lc, args, ctx['cur'])
+
+    def _cmd_after(self, lc: int, args: List[str], ctx: Dict[str, float]) -> None:
+        """Builtin `after` - runs a command the given amount of ms after the previously scheduled one"""
+        ctx['cur'] += self._parse_ms(lc, args)
+        self._schedule(lc, args, ctx['cur'])
+
+    def _cmd_every(self, lc: int, args: List[str], ctx: Dict[str, float]) -> None:
+        """Builtin `every` - runs a command repeatedly, every given amount of ms (until `cancel`)"""
+        p = self._parse_ms(lc, args)
+        if p <= 0:
+            raise SyntaxError('{}:{} Semantic Error: Period has to be positive '.format(self.fname, lc))
+        self._schedule(lc, args, ctx['cur'] + p, p)
+
+    def _cmd_cancel(self, lc: int, args: List[str], ctx: Dict[str, float]) -> None:
+        """Builtin `cancel` - cancels all commands this interpreter has scheduled"""
+        scheduler.sched.cancel(self)
 
     def __str__(self) -> str:
-        return self.fname
\ No newline at end of file
+        return self.fname + (' (watching)' if self.watch else '')
@@ -0,0 +1,208 @@
+"""Indexes the sound library - names, metadata and tags of all sound files, kept in an SQLite database"""
+
+import os, wave
+import pydub.utils
+from threading import Thread, Lock, Event
+from typing import List, Dict, Tuple, Optional, Any
+
+from figaro import utils, params
+from figaro.server import db
+
+"""The directory the sounds live in"""
+SPATH: str = os.path.join(params.BPATH, 'res', 'sounds')
+"""Where the index is stored (next to the server's database)"""
+LIB_PATH: str = os.path.join(os.path.dirname(params.DB_PATH), 'sounds.db')
+"""How often (in seconds) the directory is checked for changes (in the background)"""
+RESCAN: float = 5.
+"""The default page size for searches"""
+PAGE: int = 100
+
+class Library(Thread):
+    """
+    The sound library: every sound file below `SPATH` (in subdirectories,
+    too), indexed in an SQLite database along with its size, modification
+    time, duration, sampling rate, number of channels and tags (the names of
+    the subdirectories it's in, e.g. "memes/bruh.mp3" is tagged "memes").
+
+    The index is updated incrementally: scanning only stats the files, and
+    only new or modified files (different size/modification time) are probed
+    for their metadata - decoding happens once per file, not per request.
+    Names (relative paths, e.g. "bruh.mp3" or "memes/bruh.mp3") are resolved
+    from an in-memory dictionary; a sound's file name alone works as well, as
+    long as it's unique. Searching by prefix matches names and file names.
+
+    Once started, the library rescans the directory in the background every
+    `RESCAN` seconds, so looking sounds up never waits for a scan. A name
+    that isn't in the index (yet) is still found, if there's a file with
+    that name below `root`.
+
+    ...
+
+    Attributes
+    ----------
+    root : str
+        The directory the sounds live in.
+    path : str
+        The index database.
+    _paths : Dict[str, str]
+        The sounds' paths (by name and by unique file name).
+    interval : float
+        How often (in seconds) the directory is rescanned.
+    _mut : Lock
+        Held while scanning (only one scan runs at a time).
+    _quit : Event
+        Set to stop rescanning.
+
+    Methods
+    -------
+    scan()
+        Updates the index.
+    resolve(name)
+        Gets a sound's path.
+    search(prefix, tags, offset, limit)
+        Gets a page of sounds.
+    tags()
+        Gets all tags (and how many sounds have them).
+    stop()
+        Stops rescanning.
+    """
+
+    def __init__(self, root: str = SPATH, path: str = LIB_PATH, interval: float = RESCAN):
+        super(Library, self).__init__(daemon=True, name='library')
+        self.root: str = root
+        self.path: str = path
+        self.interval: float = interval
+        self._paths: Dict[str, str] = {}
+        self._mut: Lock = Lock()
+        self._quit: Event = Event()
+        con, c = db.connect(self.path)
+        c.execute('''CREATE TABLE IF NOT EXISTS sounds (
+                        name        TEXT PRIMARY KEY,
+                        lname       TEXT NOT NULL,
+                        lbase       TEXT NOT NULL,
+                        size        INTEGER NOT NULL,
+                        mtime       REAL NOT NULL,
+                        duration    REAL,
+                        rate        INTEGER,
+                        channels    INTEGER
+                     )''')
+        c.execute('CREATE INDEX IF NOT EXISTS sounds_lname ON sounds (lname)')
+        c.execute('CREATE INDEX IF NOT EXISTS sounds_lbase ON sounds (lbase)')
+        c.execute('''CREATE TABLE IF NOT EXISTS tags (
+                        tag         TEXT NOT NULL,
+                        name        TEXT NOT NULL REFERENCES sounds (name) ON DELETE CASCADE,
+                        PRIMARY KEY (tag, name)
+                     )''')
+        c.execute('CREATE INDEX IF NOT EXISTS tags_name ON tags (name)')
+        self._paths = self._index([n for n, in db.fetchall('SELECT name FROM sounds', con=con)])
+        db.close(con)
+
+    def _connect(self) -> Tuple[Any, Any]:
+        """Connects to the index (with foreign keys enforced)"""
+        con, c = db.connect(self.path)
+        c.execute('PRAGMA foreign_keys = ON')
+        return con, c
+
+    def run(self) -> None:
+        """Scans the directory right away and then every `interval` seconds until stopped"""
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                utils.printwrn(f'Couldn\'t scan the sound library: {e}')
+            if self._quit.wait(self.interval):
+                return
+
+    def scan(self) -> None:
+        """Updates the index - adds new, reprobes modified and removes deleted files (unless another scan is running)"""
+        if not self._mut.acquire(False):
+            return
+        try:
+            files = {}
+            for d, _, fs in os.walk(self.root):
+                for f in fs:
+                    if f.split('.')[-1].lower() not in params.ALLOWED_EXTS:
+                        continue
+                    p = os.path.join(d, f)
+                    try:
+                        st = os.stat(p)
+                    except OSError:
+                        continue
+                    files[os.path.relpath(p, self.root).replace(os.sep, '/')] = (st.st_size, st.st_mtime)
+            con, c = self._connect()
+            old = { n: (s, m) for n, s, m in db.fetchall('SELECT name, size, mtime FROM sounds', con=con) }
+            for n in old.keys() - files.keys():
+                db.exec('DELETE FROM sounds WHERE name = ?', n, con=con)
+            for n, (size, mtime) in files.items():
+                if old.get(n) == (size, mtime):
+                    continue
+                duration, rate, channels = _probe(os.path.join(self.root, n))
+                db.exec('INSERT OR REPLACE INTO sounds (name, lname, lbase, size, mtime, duration, rate, channels) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        n, n.lower(), n.split('/')[-1].lower(), size, mtime, duration, rate, channels, con=con)
+                db.exec('DELETE FROM tags WHERE name = ?', n, con=con)
+                for t in n.split('/')[:-1]:
+                    db.exec('INSERT OR IGNORE INTO tags (tag, name) VALUES (?, ?)', t.lower(), n, con=con)
+            db.close(con)
+            self._paths = self._index(files)
+        finally:
+            self._mut.release()
+
+    def _index(self, names: List[str]) -> Dict[str, str]:
+        """Maps the sounds' names (and unique file names) to their paths"""
+        paths, bases = {}, {}
+        for n in names:
+            paths[n] = os.path.join(self.root, n)
+            b = n.split('/')[-1]
+            bases[b] = None if b in bases else paths[n]
+        return dict({ b: p for b, p in bases.items() if p is not None }, **paths)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Gets the path of the sound with the given name (or unique file name); `None`, if there's none (names that aren't indexed yet are looked up in `root`)"""
+        p = self._paths.get(name.replace(os.sep, '/'))
+        if p is None and os.path.isfile(os.path.join(self.root, name)):
+            p = os.path.join(self.root, name)
+        return p
+
+    def search(self, prefix: str = '', tags: Tuple[str, ...] = (), offset: int = 0, limit: int = PAGE) -> Tuple[int, List[Dict[str, Any]]]:
+        """Gets the sounds whose name or file name starts with `prefix` (case-insensitive) and that have all `tags`, sorted by name - `limit` of them (0 = all), starting at `offset`; returns the total number of matches as well"""
+        where, args = [], []
+        if prefix:
+            lo, hi = prefix.lower(), prefix.lower() + '\U0010ffff'
+            where.append('((lname >= ? AND lname < ?) OR (lbase >= ? AND lbase < ?))')
+            args += [lo, hi, lo, hi]
+        tags = tuple({ t.lower() for t in tags })
+        if tags:
+            where.append(f'name IN (SELECT name FROM tags WHERE tag IN ({", ".join("?" * len(tags))}) GROUP BY name HAVING COUNT(*) = ?)')
+            args += [*tags, len(tags)]
+        con, _ = self._connect()
+        cond = f'WHERE {" AND ".join(where)}' if where else ''
+        total = db.fetchone(f'SELECT COUNT(*) FROM sounds {cond}', *args, con=con)[0]
+        rows = db.fetchall(f'''SELECT name, size, mtime, duration, rate, channels,
+                                      (SELECT GROUP_CONCAT(tag) FROM tags WHERE tags.name = sounds.name)
+                               FROM sounds {cond} ORDER BY lname LIMIT ? OFFSET ?''',
+                           *args, limit if limit > 0 else -1, max(offset, 0), con=con)
+        db.close(con)
+        return total, [dict(name=n, size=s, mtime=m, duration=d, rate=r, channels=ch, tags=sorted(t.split(',')) if t else [])
+                       for n, s, m, d, r, ch, t in rows]
+
+    def tags(self) -> Dict[str, int]:
+        """Gets all tags (and how many sounds have them)"""
+        con, _ = self._connect()
+        res = dict(db.fetchall('SELECT tag, COUNT(*) FROM tags GROUP BY tag ORDER BY tag', con=con))
+        db.close(con)
+        return res
+
+    def stop(self) -> None:
+        """Stops rescanning the directory"""
+        self._quit.set()
+
+def _probe(fname: str) -> Tuple[Optional[float], Optional[int], Optional[int]]:
+    """Gets a sound file's duration, sampling rate and number of channels (from the header, if it's a .wav file - otherwise via ffprobe)"""
+    try:
+        if fname.lower().endswith('.wav'):
+            with wave.open(fname, 'rb') as w:
+                return w.getnframes() / w.getframerate(), w.getframerate(), w.getnchannels()
+        inf = pydub.utils.mediainfo(fname)
+        return float(inf['duration']), int(inf['sample_rate']), int(inf['channels'])
+    except Exception:
+        return None, None, None
@@ -0,0 +1,111 @@
+"""Keeps track of the sound cards PortAudio knows about"""
+
+from threading import Thread, Lock, Event
+from typing import List, Dict, Optional, Any
+
+from figaro import utils
+from figaro.device import Index, Device, open_device, pyaudio
+
+"""How often (in seconds) the list of devices is refreshed"""
+INTERVAL: float = 5.
+
+class DeviceManager(Thread):
+    """
+    Caches PortAudio's list of devices (of the default host API) and
+    refreshes it in the background every `INTERVAL` seconds - so listing and
+    opening devices doesn't query PortAudio every time, and a device that
+    was unplugged can be found again (by its name) when it's reopened.
+
+    Note that, depending on the host API, PortAudio might only notice
+    devices that were plugged in after it was initialized once it's
+    restarted; devices that reappear under their old name are found either
+    way.
+
+    ...
+
+    Attributes
+    ----------
+    pa : pyaudio.PyAudio
+        The PyAudio object.
+    interval : float
+        How often (in seconds) the list is refreshed.
+    _devs : List[Dict[str, Any]]
+        The cached device infos (by index).
+    _mut : Lock
+        Mutex for the cache.
+    _quit : Event
+        Set to stop refreshing.
+
+    Methods
+    -------
+    devices()
+        Gets all (cached) device infos.
+    info(index)
+        Gets a device's (cached) info.
+    find(name, output)
+        Finds a device's index by its name.
+    refresh()
+        Updates the cache.
+    open(spec, output)
+        Opens a device.
+    stop()
+        Stops refreshing.
+    """
+
+    def __init__(self, pa: "pyaudio.PyAudio", interval: float = INTERVAL):
+        super(DeviceManager, self).__init__(daemon=True)
+        self.pa: pyaudio.PyAudio = pa
+        self.interval: float = interval
+        self._devs: List[Dict[str, Any]] = []
+        self._mut: Lock = Lock()
+        self._quit: Event = Event()
+        self.refresh()
+
+    def run(self) -> None:
+        """Refreshes the cache every `interval` seconds until stopped"""
+        while not self._quit.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                utils.printwrn(f'Couldn\'t refresh the list of devices: {e}')
+
+    def refresh(self) -> None:
+        """Queries PortAudio for all devices and updates the cache"""
+        n = self.pa.get_host_api_info_by_index(0).get('deviceCount')
+        devs = [self.pa.get_device_info_by_host_api_device_index(0, i) for i in range(n)]
+        self._mut.acquire()
+        self._devs = devs
+        self._mut.release()
+
+    def devices(self) -> List[Dict[str, Any]]:
+        """Gets the infos of all devices (as of the last refresh)"""
+        self._mut.acquire()
+        cp = list(self._devs)
+        self._mut.release()
+        return cp
+
+    def info(self, index: int) -> Dict[str, Any]:
+        """Gets the info of the device with the given index (refreshes the cache, if it doesn't know the device)"""
+        devs = self.devices()
+        if not 0 <= index < len(devs):
+            self.refresh()
+            devs = self.devices()
+            if not 0 <= index < len(devs):
+                raise Exception(f'There\'s no device with index {index} ... ')
+        return devs[index]
+
+    def find(self, name: str, output: bool) -> Optional[int]:
+        """Finds the index of the input/output device with the given name (as of the last refresh)"""
+        key = 'maxOutputChannels' if output else 'maxInputChannels'
+        for i, d in enumerate(self.devices()):
+            if d['name'] == name and d[key] > 0:
+                return i
+        return None
+
+    def open(self, spec: Index, output: bool) -> Device:
+        """Opens a device - a PyAudio device's index or a virtual device's spec"""
+        return open_device(spec, output, self.pa, self)
+
+    def stop(self) -> None:
+        """Stops refreshing the cache"""
+        self._quit.set()
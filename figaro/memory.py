@@ -0,0 +1,170 @@
+"""Watches the audio thread's allocations and garbage collector pauses; keeps the garbage collector out of its way"""
+
+import gc, time, threading, tracemalloc
+from typing import Optional, Dict, Any
+
+"""The garbage collector policies (applied while a channel is running)"""
+POLICIES: Dict[str, str] = {
+    'auto': 'Python\'s default - collections happen whenever (and on whichever thread) allocations trigger them',
+    'off': 'no automatic collections at all (reference cycles pile up until the channel stops)',
+    'quiet': 'no automatic collections - the audio thread collects in quiet moments instead (silent blocks or plenty of time left)',
+}
+"""How much of a block's time (at most) may have been used for the rest of it to count as a quiet moment"""
+SLACK: float = .5
+
+class Monitor(object):
+    """
+    Keeps track of the memory the audio thread allocates per block and of
+    all garbage collector pauses (`gc.callbacks`), and applies the garbage
+    collector policy while the channel is running.
+
+    Collections that interrupt the audio thread are what causes dropouts:
+    a full collection of a big heap easily takes longer than a block. With
+    the `quiet` policy, the automatic collections are disabled and the audio
+    thread does them itself right after a block has been written - if the
+    block was silent or left at least `1 - SLACK` of its time unused - and
+    only for the generations that are due anyway.
+
+    Tracing allocations (`tracemalloc`) is expensive and therefore off by
+    default; it counts the allocations of all threads that happen while a
+    block is being processed.
+
+    ...
+
+    Attributes
+    ----------
+    policy : str
+        The garbage collector policy (see `POLICIES`).
+    trace : bool
+        Are allocations being traced?
+    _stats : Dict[str, Any]
+        Collections (count, total/longest pause, how many interrupted the audio thread, how many were done in quiet moments) and allocations per block.
+    _ident : Optional[int]
+        The audio thread's id (while it's running).
+    _gc : bool
+        Was the garbage collector enabled before the channel started?
+    _tgc : float
+        When the current collection started.
+    _quiet : bool
+        Is the audio thread collecting in a quiet moment right now?
+    _cur : Optional[int]
+        The traced memory at the start of the current block.
+
+    Methods
+    -------
+    attach()
+        Starts watching the calling (audio) thread and applies the policy.
+    detach()
+        Stops watching and restores the garbage collector.
+    begin()
+        Marks the start of a block.
+    end(used, budget, silent)
+        Marks the end of a block; collects, if it's a quiet moment.
+    """
+
+    def __init__(self, policy: str = 'auto', trace: bool = False):
+        if policy not in POLICIES:
+            raise Exception(f'Unknown policy "{policy}" (available: {", ".join(POLICIES)}) ... ')
+        self.policy: str = policy
+        self.trace: bool = False
+        self._stats: Dict[str, Any] = dict(gc=0, gc_ms=0., gc_max_ms=0., gc_audio=0, gc_audio_ms=0., gc_quiet=0,
+                                           alloc_blocks=0, alloc_kb=0., alloc_max_kb=0.)
+        self._ident: Optional[int] = None
+        self._gc: bool = gc.isenabled()
+        self._tgc: float = 0.
+        self._quiet: bool = False
+        self._cur: Optional[int] = None
+        self.set_trace(trace)
+
+    def _on_gc(self, phase: str, info: Dict[str, int]) -> None:
+        """Garbage collector callback - times every collection"""
+        now = time.perf_counter()
+        if phase == 'start':
+            self._tgc = now
+            return
+        dt = (now - self._tgc) * 1000
+        self._stats['gc'] += 1
+        self._stats['gc_ms'] += dt
+        self._stats['gc_max_ms'] = max(self._stats['gc_max_ms'], dt)
+        if self._quiet:
+            self._stats['gc_quiet'] += 1
+        elif threading.get_ident() == self._ident:
+            self._stats['gc_audio'] += 1
+            self._stats['gc_audio_ms'] += dt
+
+    def _apply(self) -> None:
+        """Enables/disables automatic collections according to the policy (only while the channel is running)"""
+        if self._ident is not None and self.policy != 'auto':
+            gc.disable()
+        elif self._gc:
+            gc.enable()
+
+    def _collect(self) -> None:
+        """Collects the generations that are due (i.e. the ones the garbage collector would have collected by now)"""
+        counts, thresholds = gc.get_count(), gc.get_threshold()
+        due = [g for g in range(3) if thresholds[g] and counts[g] > thresholds[g]]
+        if not due:
+            return
+        self._quiet = True
+        gc.collect(due[-1])
+        self._quiet = False
+
+    def attach(self) -> None:
+        """Starts watching the calling thread (the audio thread) and applies the policy"""
+        self._ident = threading.get_ident()
+        self._gc = gc.isenabled()
+        if self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        self._apply()
+
+    def detach(self) -> None:
+        """Stops watching the audio thread and restores the garbage collector"""
+        self._ident = None
+        self._apply()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def set_policy(self, policy: str) -> None:
+        """Changes the garbage collector policy (takes effect immediately)"""
+        if policy not in POLICIES:
+            raise Exception(f'Unknown policy "{policy}" (available: {", ".join(POLICIES)}) ... ')
+        self.policy = policy
+        self._apply()
+
+    def set_trace(self, trace: bool) -> None:
+        """Starts/stops tracing allocations"""
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not trace and self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace = trace
+
+    def begin(self) -> None:
+        """Marks the start of a block"""
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._cur = tracemalloc.get_traced_memory()[0]
+
+    def end(self, used: float, budget: float, silent: bool) -> None:
+        """Marks the end of a block (that took `used` of `budget` seconds); collects garbage, if it's a quiet moment"""
+        if self._cur is not None:
+            kb = (tracemalloc.get_traced_memory()[1] - self._cur) / 1024 if tracemalloc.is_tracing() else 0.
+            self._cur = None
+            st = self._stats
+            st['alloc_blocks'] += 1
+            st['alloc_kb'] += (kb - st['alloc_kb']) / min(st['alloc_blocks'], 100)
+            st['alloc_max_kb'] = max(st['alloc_max_kb'], kb)
+        if self.policy == 'quiet' and (silent or used < budget * SLACK):
+            self._collect()
+
+    def toJSON(self) -> Dict[str, Any]:
+        """Gets the monitor's policy and counters into a JSON-compatible format"""
+        return dict(self._stats, policy=self.policy, trace=self.trace, pending=list(gc.get_count()))
+
+    def __str__(self) -> str:
+        st = self._stats
+        s = (f'GC: {self.policy} | Collections: {st["gc"]} ({st["gc_ms"]:.1f}ms, max: {st["gc_max_ms"]:.1f}ms) | '
+             f'On the audio thread: {st["gc_audio"]} ({st["gc_audio_ms"]:.1f}ms) | In quiet moments: {st["gc_quiet"]}')
+        if self.trace:
+            s += f'\nAllocations: {st["alloc_kb"]:.1f}KiB/block (max: {st["alloc_max_kb"]:.1f}KiB)'
+        return s
@@ -0,0 +1,251 @@
+"""Counters, gauges and histograms for monitoring - exported in Prometheus' text format"""
+
+import bisect, math
+from threading import Lock
+from typing import List, Dict, Tuple, Optional, Callable, Union
+
+"""The default histogram buckets (in seconds)"""
+BUCKETS: Tuple[float, ...] = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.)
+"""The content type of `Registry.render`'s output"""
+CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+"""What a callback metric returns - a single value or the values by their labels"""
+Sample = Union[float, Dict[Tuple[str, ...], float]]
+
+class Metric(object):
+    """
+    A metric (and its children - one per combination of label values).
+
+    Updating a metric never takes a lock: every metric is meant to be updated
+    by a single thread (the audio thread, the server's event loop, ...),
+    while scraping only reads. A scrape might see a histogram that's one
+    observation ahead in one place - that's all. Only creating a new child
+    (`labels`) takes the registry's lock, which happens once per label value.
+
+    A metric can also be a callback (`fn`) that's only evaluated when it's
+    scraped - that costs nothing at all in between.
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        The metric's name.
+    help : str
+        What it measures.
+    labelnames : Tuple[str, ...]
+        The names of its labels.
+    fn : Optional[Callable[[], Sample]]
+        Gets the current value(s) when it's scraped (if it's a callback metric).
+    _children : Dict[Tuple[str, ...], Metric]
+        The children (by label values).
+    _mut : Lock
+        Mutex for creating children.
+
+    Methods
+    -------
+    labels(*values)
+        Gets the child for the given label values.
+    samples()
+        Gets all samples (name suffix, labels, value).
+    """
+
+    TYPE: str = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), fn: Optional[Callable[[], Sample]] = None):
+        self.name: str = name
+        self.help: str = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self.fn: Optional[Callable[[], Sample]] = fn
+        self._children: Dict[Tuple[str, ...], Metric] = {}
+        self._mut: Lock = Lock()
+
+    def labels(self, *values: str) -> "Metric":
+        """Gets the child for the given label values (creates it, if necessary)"""
+        c = self._children.get(values)
+        if c is not None:
+            return c
+        if len(values) != len(self.labelnames):
+            raise Exception(f'{self.name} expects the labels {", ".join(self.labelnames)} ... ')
+        self._mut.acquire()
+        c = self._children.get(values)
+        if c is None:
+            c = self._child()
+            self._children = {**self._children, values: c}
+        self._mut.release()
+        return c
+
+    def _child(self) -> "Metric":
+        """Creates a child (without labels)"""
+        return type(self)(self.name, self.help)
+
+    def _own(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Gets the samples of this very metric (without its children)"""
+        return []
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Gets all samples - (name suffix, labels, value)"""
+        if self.fn is not None:
+            v = self.fn()
+            if not isinstance(v, dict):
+                return [('', {}, float(v))]
+            return [('', dict(zip(self.labelnames, k)), float(x)) for k, x in v.items()]
+        if not self.labelnames:
+            return self._own()
+        res = []
+        for k, c in self._children.items():
+            res += [(s, dict(zip(self.labelnames, k), **l), v) for s, l, v in c._own()]
+        return res
+
+class Counter(Metric):
+    """A value that only ever goes up (e.g. the number of blocks processed)"""
+
+    TYPE: str = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super(Counter, self).__init__(*args, **kwargs)
+        self.value: float = 0.
+
+    def inc(self, n: float = 1.) -> None:
+        """Increments the counter"""
+        self.value += n
+
+    def _own(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [('', {}, self.value)]
+
+class Gauge(Metric):
+    """A value that goes up and down (e.g. the number of sounds playing)"""
+
+    TYPE: str = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super(Gauge, self).__init__(*args, **kwargs)
+        self.value: float = 0.
+
+    def set(self, v: float) -> None:
+        """Sets the gauge"""
+        self.value = v
+
+    def inc(self, n: float = 1.) -> None:
+        """Increments the gauge"""
+        self.value += n
+
+    def dec(self, n: float = 1.) -> None:
+        """Decrements the gauge"""
+        self.value -= n
+
+    def _own(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [('', {}, self.value)]
+
+class Histogram(Metric):
+    """Counts observations (e.g. how long blocks take) in buckets"""
+
+    TYPE: str = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS):
+        super(Histogram, self).__init__(name, help, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self._sum: float = 0.
+
+    def _child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, v: float) -> None:
+        """Records an observation"""
+        self._counts[bisect.bisect_left(self.buckets, v)] += 1
+        self._sum += v
+
+    def _own(self) -> List[Tuple[str, Dict[str, str], float]]:
+        res, n = [], 0
+        for b, c in zip(self.buckets + (math.inf,), list(self._counts)):
+            n += c
+            res.append(('_bucket', { 'le': _fmt(b) }, n))
+        return res + [('_sum', {}, self._sum), ('_count', {}, n)]
+
+def _fmt(v: float) -> str:
+    """Formats a value the way Prometheus expects it"""
+    if math.isinf(v):
+        return '+Inf' if v > 0 else '-Inf'
+    if math.isnan(v):
+        return 'NaN'
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+def _esc(v: str) -> str:
+    """Escapes a label value"""
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Registry(object):
+    """
+    All metrics (by name).
+
+    ...
+
+    Attributes
+    ----------
+    _metrics : Dict[str, Metric]
+        The metrics (by name).
+    _mut : Lock
+        Mutex for registering metrics.
+
+    Methods
+    -------
+    counter(name, help, labelnames, fn)
+        Gets/creates a counter.
+    gauge(name, help, labelnames, fn)
+        Gets/creates a gauge.
+    histogram(name, help, labelnames, buckets)
+        Gets/creates a histogram.
+    render()
+        Exports all metrics in Prometheus' text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._mut: Lock = Lock()
+
+    def _get(self, cls: type, name: str, *args, fn: Optional[Callable[[], Sample]] = None, **kwargs) -> Metric:
+        """Gets the metric with the given name - creates it, if there's none (or replaces its callback)"""
+        self._mut.acquire()
+        try:
+            m = self._metrics.get(name)
+            if m is None:
+                m = cls(name, *args, **kwargs)
+                self._metrics[name] = m
+            elif type(m) is not cls:
+                raise Exception(f'{name} is already registered as a {m.TYPE} ... ')
+            if fn is not None:
+                m.fn = fn
+            return m
+        finally:
+            self._mut.release()
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = (), fn: Optional[Callable[[], Sample]] = None) -> Counter:
+        """Gets/creates a counter (a callback counter, if `fn` is given)"""
+        return self._get(Counter, name, help, labelnames, fn=fn)
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = (), fn: Optional[Callable[[], Sample]] = None) -> Gauge:
+        """Gets/creates a gauge (a callback gauge, if `fn` is given)"""
+        return self._get(Gauge, name, help, labelnames, fn=fn)
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS) -> Histogram:
+        """Gets/creates a histogram"""
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Exports all metrics in Prometheus' text format"""
+        out = []
+        for name, m in sorted(self._metrics.items()):
+            try:
+                smps = m.samples()
+            except Exception:
+                continue
+            out.append(f'# HELP {name} {m.help}')
+            out.append(f'# TYPE {name} {m.TYPE}')
+            for sfx, lbls, v in smps:
+                l = ','.join(f'{k}="{_esc(x)}"' for k, x in lbls.items())
+                out.append(f'{name}{sfx}{"{" + l + "}" if l else ""} {_fmt(v)}')
+        return '\n'.join(out) + '\n'
+
+"""The registry all of Figaro's metrics live in"""
+REGISTRY: Registry = Registry()
@@ -0,0 +1,158 @@
+"""Writes to every output device on a thread of its own, so a slow output never holds up the others"""
+
+import time, numpy as np
+from collections import deque
+from threading import Thread, Condition, Event
+from typing import Optional, Dict, Any, Deque
+
+from figaro import params
+from figaro.device import Device, fit, RETRY, MAX_RETRY
+
+"""How many blocks an output's queue holds"""
+QUEUE: int = 4
+
+class Playback(Thread):
+    """
+    Writes the channel's blocks to an output device.
+
+    The channel only appends a copy of every block to a bounded queue
+    (`push`); the thread takes them out and does the (blocking) write. If the
+    device doesn't keep up and the queue is full, the oldest block is
+    dropped (`overruns`) - one slow output costs nothing but its own audio.
+    If the device is ready for more, but there's nothing queued for more than
+    a block, that's an underrun (it's playing silence).
+
+    Devices that don't run in real time (e.g. a file written as fast as
+    possible) are never dropped from - the channel waits for them instead.
+
+    If writing fails (e.g. the device was unplugged), the thread tries to
+    reopen the device - after `RETRY` seconds at first, twice as long after
+    every failed attempt (up to `MAX_RETRY`). Meanwhile, the queue keeps
+    dropping the oldest blocks.
+
+    ...
+
+    Attributes
+    ----------
+    dev : Device
+        The output device.
+    overruns : int
+        The number of blocks dropped because the queue was full.
+    underruns : int
+        How often the device had to wait for more than a block.
+    error : Optional[str]
+        Why writing to the device fails (while it does).
+    reconnects : int
+        How often the device was reopened after it failed.
+    _q : Deque[np.ndarray]
+        The blocks waiting to be written.
+    _cond : Condition
+        Guards the queue; notified whenever a block is queued or written.
+    _running : bool
+        Is the device still being written to?
+    _quit : Event
+        Set when the thread is stopped (ends the wait between attempts to reopen the device).
+    _close : bool
+        Should the device be closed once the thread is done?
+    _primed : bool
+        Has a block been written since the channel was (re)started? (Waiting for the first one isn't an underrun.)
+
+    Methods
+    -------
+    push(data)
+        Queues a block (called by the channel).
+    hold()
+        Tells the thread that the channel is paused.
+    stop(close)
+        Stops writing (and closes the device).
+    """
+
+    def __init__(self, dev: Device):
+        super(Playback, self).__init__(daemon=True)
+        self.dev: Device = dev
+        self.overruns: int = 0
+        self.underruns: int = 0
+        self.error: Optional[str] = None
+        self.reconnects: int = 0
+        self._q: Deque[np.ndarray] = deque()
+        self._cond: Condition = Condition()
+        self._running: bool = True
+        self._quit: Event = Event()
+        self._close: bool = False
+        self._primed: bool = False
+
+    def run(self) -> None:
+        """Writes the queued blocks until stopped and the queue is empty (reopens the device, if it fails)"""
+        blk = params.BUF/params.SMPRATE
+        try:
+            while self._running or self._q:
+                self._cond.acquire()
+                t = time.perf_counter()
+                while not self._q and self._running:
+                    self._cond.wait(blk)
+                late = self._primed and time.perf_counter() - t > blk
+                data = self._q.popleft() if self._q else None
+                self._cond.notify_all()
+                self._cond.release()
+                if data is None:
+                    continue
+                if late:
+                    self.underruns += 1
+                try:
+                    self.dev.write_frames(data, steer=True)
+                except Exception as e:
+                    self._recover(e)
+                    continue
+                self._primed = True
+        finally:
+            if self._close:
+                self.dev.stop_stream()
+                self.dev.close()
+
+    def _recover(self, e: Exception) -> None:
+        """Tries to reopen the failed device (until it works or the thread is stopped)"""
+        delay = RETRY
+        while self._running:
+            self.error = str(e)
+            if self._quit.wait(delay):
+                return
+            try:
+                self.dev.reopen()
+            except Exception as ex:
+                e, delay = ex, min(2*delay, MAX_RETRY)
+                continue
+            self.error, self._primed = None, False
+            self.reconnects += 1
+            return
+
+    def push(self, data: np.ndarray) -> None:
+        """Queues a copy of a block (`(frames, channels)`, fitted to the device); drops the oldest one, if the queue is full"""
+        data = fit(data, self.dev.channels).astype(np.float32)
+        self._cond.acquire()
+        if not self.dev.realtime:
+            while len(self._q) >= QUEUE and self._running and self.is_alive() and self.error is None:
+                self._cond.wait(params.BUF/params.SMPRATE)
+        if len(self._q) >= QUEUE:
+            self._q.popleft()
+            self.overruns += 1
+        self._q.append(data)
+        self._cond.notify_all()
+        self._cond.release()
+
+    def hold(self) -> None:
+        """Tells the thread that the channel is paused (so waiting for the next block isn't an underrun)"""
+        self._primed = False
+
+    def stop(self, close: bool = False) -> None:
+        """Stops writing to the device (once the queue is empty); closes it afterwards, if `close`"""
+        self._close = close
+        self._running = False
+        self._quit.set()
+        self._cond.acquire()
+        self._cond.notify_all()
+        self._cond.release()
+
+    def toJSON(self) -> Dict[str, Any]:
+        """Gets the output's state and counters into a JSON-compatible format"""
+        return dict(self.dev.toJSON(), queued=len(self._q), overruns=self.overruns, underruns=self.underruns,
+                    error=self.error, reconnects=self.reconnects)
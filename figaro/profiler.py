@@ -0,0 +1,186 @@
+"""Samples the stacks of running threads (above all the audio thread) to find out what they spend their time on"""
+
+import os, sys, time
+from threading import Thread
+from typing import Optional, Dict, List, Tuple, Any
+
+from figaro import params
+
+"""How often (in seconds) the stacks are sampled"""
+INTERVAL: float = .002
+"""How many filters/functions the summary lists"""
+TOP: int = 10
+"""Where the filter plugins live (frames in there are attributed to the filter)"""
+FPATH: str = os.path.join(params.BPATH, 'res', 'filters')
+"""The modules that are stages of the channel themselves (and are attributed like filters)"""
+STAGES: Dict[str, str] = {
+    os.path.join(params.BPATH, 'figaro', 'dynamics.py'): 'master',
+    os.path.join(params.BPATH, 'figaro', 'vad.py'): 'gate',
+    os.path.join(params.BPATH, 'figaro', 'transformer.py'): 'transformer',
+}
+
+class Profiler(Thread):
+    """
+    A sampling profiler: every `INTERVAL` seconds, it takes a snapshot of the
+    stacks of the profiled threads (`sys._current_frames`) and counts how
+    often every stack was seen. The profiled threads never notice - there's no
+    tracing hook; all they pay for is the profiler holding the GIL for a few
+    microseconds per sample.
+
+    Once it's done, it writes the stacks in the "collapsed" format (one
+    `thread;outermost;...;innermost count` line per stack), which
+    flamegraph.pl, speedscope & co. turn into flame graphs, and summarizes
+    which filters and functions took up most of the time.
+
+    ...
+
+    Attributes
+    ----------
+    threads : Dict[int, str]
+        The profiled threads (their names, by their idents).
+    seconds : float
+        How long to profile.
+    interval : float
+        How often to sample.
+    fname : str
+        The file the collapsed stacks are written to.
+    samples : int
+        How many samples were taken so far.
+    error : Optional[str]
+        Why writing the file failed (if it did).
+    _stacks : Dict[Tuple[int, Tuple[Any, ...]], int]
+        How often every stack (thread ident, code objects from innermost to outermost) was seen.
+    _labels : Dict[Any, str]
+        The labels of all code objects seen so far.
+    _running : bool
+        Is it still sampling?
+    _t0 : float
+        When it started sampling.
+    _t1 : Optional[float]
+        When it stopped sampling.
+
+    Methods
+    -------
+    stop()
+        Stops sampling early (the results are written anyway).
+    is_running()
+        Is it still sampling?
+    collapsed()
+        Gets the stacks in the collapsed format.
+    summary()
+        Gets the hottest filters and functions.
+    """
+
+    def __init__(self, threads: Dict[int, str], seconds: float, fname: str, interval: float = INTERVAL):
+        super(Profiler, self).__init__(daemon=True)
+        if seconds <= 0:
+            raise Exception('The duration has to be positive ... ')
+        if not threads:
+            raise Exception('There\'s nothing to profile ... ')
+        self.threads: Dict[int, str] = dict(threads)
+        self.seconds: float = seconds
+        self.interval: float = interval
+        self.fname: str = fname
+        self.samples: int = 0
+        self.error: Optional[str] = None
+        self._stacks: Dict[Tuple[int, Tuple[Any, ...]], int] = {}
+        self._labels: Dict[Any, str] = {}
+        self._running: bool = True
+        self._t0: float = 0.
+        self._t1: Optional[float] = None
+
+    def run(self) -> None:
+        """Samples the threads' stacks until the time's up (or it's stopped), then writes the results"""
+        self._t0 = time.perf_counter()
+        end, nxt = self._t0 + self.seconds, self._t0
+        while self._running and time.perf_counter() < end:
+            self._sample()
+            nxt += self.interval
+            time.sleep(max(0., nxt - time.perf_counter()))
+        self._t1 = time.perf_counter()
+        self._running = False
+        try:
+            with open(self.fname, 'w') as f:
+                f.write(self.collapsed())
+        except Exception as e:
+            self.error = str(e)
+
+    def _sample(self) -> None:
+        """Takes a snapshot of the profiled threads' stacks"""
+        frames = sys._current_frames()
+        for ident in self.threads:
+            f = frames.get(ident)
+            if f is None:
+                continue
+            st = []
+            while f is not None:
+                st.append(f.f_code)
+                f = f.f_back
+            key = (ident, tuple(st))
+            self._stacks[key] = self._stacks.get(key, 0) + 1
+        self.samples += 1
+        del frames
+
+    def _label(self, code: Any) -> str:
+        """Gets a code object's label - `<file relative to Figaro>:<function>`"""
+        l = self._labels.get(code)
+        if l is None:
+            fn = code.co_filename
+            rel = os.path.relpath(fn, params.BPATH) if fn.startswith(params.BPATH) else os.path.basename(fn)
+            l = f'{rel}:{getattr(code, "co_qualname", code.co_name)}'.replace(';', ':').replace(' ', '_')
+            self._labels[code] = l
+        return l
+
+    def _stage(self, code: Any) -> Optional[str]:
+        """Gets the filter (or stage of the channel) a code object belongs to, if any"""
+        fn = code.co_filename
+        if fn.startswith(FPATH):
+            return os.path.splitext(os.path.basename(fn))[0]
+        return STAGES.get(fn)
+
+    def stop(self) -> None:
+        """Stops sampling (the results are written anyway)"""
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Is it still sampling?"""
+        return self._running
+
+    def collapsed(self) -> str:
+        """Gets the stacks in the collapsed format (`thread;outermost;...;innermost count`)"""
+        lines = [';'.join([self.threads[i]] + [self._label(c) for c in reversed(st)]) + f' {n}'
+                 for (i, st), n in list(self._stacks.items())]
+        return '\n'.join(sorted(lines)) + '\n'
+
+    def summary(self) -> Dict[str, List[Tuple[Any, ...]]]:
+        """Gets the hottest filters (share of all samples they're on the stack) and functions (share of samples they're running / on the stack)"""
+        total = sum(self._stacks.values()) or 1
+        fils, own, incl = {}, {}, {}
+        for (_, st), n in list(self._stacks.items()):
+            for s in {s for s in map(self._stage, st) if s is not None}:
+                fils[s] = fils.get(s, 0) + n
+            if st:
+                l = self._label(st[0])
+                own[l] = own.get(l, 0) + n
+            for l in set(map(self._label, st)):
+                incl[l] = incl.get(l, 0) + n
+        return dict(
+            filters=[(k, 100*v/total) for k, v in sorted(fils.items(), key=lambda x: -x[1])[:TOP]],
+            functions=[(k, 100*v/total, 100*incl[k]/total) for k, v in sorted(own.items(), key=lambda x: -x[1])[:TOP]],
+        )
+
+    def toJSON(self) -> Dict[str, Any]:
+        """Gets the profiler's state and summary into a JSON-compatible format"""
+        t = (self._t1 or time.perf_counter()) - self._t0 if self._t0 else 0.
+        return dict(running=self._running, seconds=t, samples=self.samples, threads=list(self.threads.values()),
+                    file=self.fname, error=self.error, **self.summary())
+
+    def __str__(self) -> str:
+        js = self.toJSON()
+        s = (f'Profile: {"running" if js["running"] else "done"} | {js["seconds"]:.1f}s | {js["samples"]} samples | '
+             f'Threads: {", ".join(js["threads"])} | File: {self.fname}' + (f' (failed: {self.error})' if self.error else ''))
+        if js['filters']:
+            s += '\nFilters:\n' + '\n'.join(f'  {p:5.1f}% {k}' for k, p in js['filters'])
+        if js['functions']:
+            s += '\nFunctions (self | total):\n' + '\n'.join(f'  {p:5.1f}% | {q:5.1f}% {k}' for k, p, q in js['functions'])
+        return s
@@ -0,0 +1,142 @@
+"""Records audio from the channel to disk without blocking the audio thread"""
+
+import os, time, wave, numpy as np
+from collections import deque
+from threading import Thread
+from typing import Union, Optional, Dict, Any, Deque, Tuple, Callable
+
+from figaro import params
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+"""Where audio can be tapped: the (mixed) input, the output or after the filter with the given index"""
+Tap = Union[str, int]
+
+def check(fname: str) -> None:
+    """Makes sure audio can be written to a file with that name (.wav or, if `soundfile` is available, .flac)"""
+    ext = os.path.splitext(fname)[1].lower()
+    if ext not in ('.wav', '.flac'):
+        raise Exception('Recordings have to be .wav or .flac files ... ')
+    if ext == '.flac' and soundfile is None:
+        raise Exception('Recording to FLAC needs the `soundfile` package ... ')
+
+def writer(fname: str, channels: int) -> Tuple[Callable[[np.ndarray], None], Callable[[], None]]:
+    """Opens an audio file for writing; returns a function writing frames (`(frames, channels)`) and one closing the file"""
+    check(fname)
+    if fname.lower().endswith('.flac'):
+        f = soundfile.SoundFile(fname, 'w', samplerate=params.SMPRATE, channels=channels, format='FLAC', subtype='PCM_24')
+        return f.write, f.close
+    fh = open(fname, 'wb')
+    f = wave.open(fh, 'wb')
+    f.setnchannels(channels)
+    f.setsampwidth(2)
+    f.setframerate(params.SMPRATE)
+    return lambda d: f.writeframes((np.clip(d, -1, 1 - 2**-15) * 2**15).astype('<i2').tobytes()), lambda: (f.close(), fh.close())
+
+class Recorder(Thread):
+    """
+    Records audio blocks to a WAV or FLAC file.
+
+    The audio thread only appends a copy of every block to a bounded queue
+    (`push`) - `deque.append`/`popleft` are atomic, so there's no lock it
+    could wait for. If the queue is full, the block is dropped (and counted)
+    instead. The recorder's own thread collects the blocks and writes them
+    in chunks of about a second. The file is opened right away, so a
+    recording that can't even be started fails before it's added anywhere;
+    if writing fails later on (e.g. the disk is full), the recorder stops
+    and keeps the reason (`error`).
+
+    ...
+
+    Attributes
+    ----------
+    MAXLEN : int
+        How many blocks the queue can hold.
+    fname : str
+        The file being written (`.wav` = 16 bit PCM, `.flac` = 24 bit, needs `soundfile`).
+    tap : Tap
+        Where the audio is taken from.
+    channels : int
+        The number of channels.
+    frames : int
+        The number of frames written so far.
+    dropped : int
+        The number of frames dropped because the queue was full.
+    error : Optional[str]
+        Why writing to the file failed (if it did).
+    _write : Callable[[np.ndarray], None]
+        Writes frames to the file.
+    _close : Callable[[], None]
+        Closes the file.
+    _q : Deque[np.ndarray]
+        The blocks waiting to be written.
+    _running : bool
+        Is the recorder accepting new blocks?
+
+    Methods
+    -------
+    push(data)
+        Queues a block (called by the audio thread).
+    stop()
+        Stops recording (everything queued so far is still written).
+    """
+
+    MAXLEN: int = 256
+
+    def __init__(self, fname: str, tap: Tap = 'output', channels: Optional[int] = None):
+        super(Recorder, self).__init__(daemon=True)
+        self.fname: str = fname
+        self.tap: Tap = tap
+        self.channels: int = channels or params.CHNNLS
+        self.frames: int = 0
+        self.dropped: int = 0
+        self.error: Optional[str] = None
+        self._write, self._close = writer(fname, self.channels)
+        self._q: Deque[np.ndarray] = deque()
+        self._running: bool = True
+
+    def push(self, data: np.ndarray) -> None:
+        """Queues a copy of a block (`(frames, channels)`); drops it if the queue is full"""
+        if not self._running:
+            return
+        if len(self._q) >= Recorder.MAXLEN:
+            self.dropped += len(data)
+            return
+        self._q.append(data.astype(np.float32))
+
+    def run(self) -> None:
+        """Writes the queued blocks to the file until the recorder is stopped and the queue is empty (or writing fails)"""
+        try:
+            while self._running or self._q:
+                blks, n = [], 0
+                while self._q and n < params.SMPRATE:
+                    blks.append(self._q.popleft())
+                    n += len(blks[-1])
+                if not blks:
+                    time.sleep(params.BUF/params.SMPRATE/2)
+                    continue
+                data = np.concatenate(blks).reshape(-1, self.channels)
+                self._write(data)
+                self.frames += len(data)
+        except Exception as e:
+            self.error = str(e)
+            self._running = False
+            self._q.clear()
+        finally:
+            self._close()
+
+    def stop(self) -> None:
+        """Stops recording; the thread finishes writing what's queued and closes the file"""
+        self._running = False
+
+    def toJSON(self) -> Dict[str, Any]:
+        """Gets the recorder into a JSON-compatible format"""
+        return dict(file=self.fname, tap=self.tap, seconds=self.frames/params.SMPRATE, dropped=self.dropped, running=self._running, error=self.error)
+
+    def __str__(self) -> str:
+        s = f'{os.path.basename(self.fname)} [{self.tap}] {self.frames/params.SMPRATE:.1f}s'
+        s += f' ({self.dropped} frames dropped)' if self.dropped else ''
+        return s + (f' (failed: {self.error})' if self.error else '')
@@ -0,0 +1,114 @@
+"""Streaming sample-rate conversion between the devices' rates and the internal rate"""
+
+import numpy as np
+from typing import Optional
+
+from figaro import params
+
+"""The largest relative correction of the rate ratio drift compensation may apply"""
+MAX_DRIFT: float = .005
+"""How strongly drift compensation reacts to the fill level (relative correction per block of excess fill)"""
+DRIFT_GAIN: float = 2e-3
+
+class Resampler(object):
+    """
+    A streaming polyphase resampler for an arbitrary (and slowly changing)
+    rate ratio.
+
+    The anti-aliasing filter (a Blackman-windowed sinc) is stored as a bank
+    of `phases` sub-filters; every output sample picks the two sub-filters
+    around its fractional position and interpolates between them. All output
+    samples of a block are computed at once (one gather, one `matmul`). The
+    last `taps` input frames and the fractional position carry over from
+    block to block.
+
+    The ratio can be adjusted by up to `MAX_DRIFT` to compensate for clock
+    drift between devices (`steer`): whenever the fill level of the device's
+    buffer moves away from where it started, a bit more/less input is consumed
+    per output frame, so the level is kept stable.
+
+    ...
+
+    Attributes
+    ----------
+    rin : int
+        The input rate.
+    rout : int
+        The output rate.
+    taps : int
+        The length of every sub-filter.
+    adjust : float
+        The current drift correction factor of the ratio.
+    _bank : np.ndarray
+        The sub-filters, `(phases+1, taps)` (the last one is the first one, shifted by a frame).
+    _hist : Optional[np.ndarray]
+        The last `taps` input frames, `(taps, channels)`.
+    _t : float
+        The position of the next output frame, relative to `_hist`'s start.
+    _fill : Optional[float]
+        The (smoothed) fill level of the device's buffer.
+    _target : Optional[float]
+        The fill level drift compensation is trying to keep.
+
+    Methods
+    -------
+    process(x)
+        Resamples the next block.
+    needed(n)
+        How many input frames are needed for the next `n` output frames.
+    steer(fill)
+        Adjusts the ratio to the device's current fill level.
+    """
+
+    def __init__(self, rin: int, rout: int, taps: int = 64, phases: int = 256):
+        self.rin: int = rin
+        self.rout: int = rout
+        self.taps: int = taps
+        self.adjust: float = 1.
+        h = taps // 2
+        c = min(1., rout / rin) * .92
+        d = np.arange(1-h, h+1)[None, :] - np.arange(phases+1)[:, None] / phases
+        w = np.where(np.abs(d) < h, .42 + .5*np.cos(np.pi*d/h) + .08*np.cos(2*np.pi*d/h), 0.)
+        bank = c * np.sinc(c * d) * w
+        self._bank: np.ndarray = bank / bank.sum(axis=1, keepdims=True)
+        self._phases: int = phases
+        self._hist: Optional[np.ndarray] = None
+        self._t: float = float(h)
+        self._fill: Optional[float] = None
+        self._target: Optional[float] = None
+
+    @property
+    def step(self) -> float:
+        """The number of input frames per output frame"""
+        return self.rin / self.rout * self.adjust
+
+    def needed(self, n: int) -> int:
+        """Returns the number of input frames `process` needs to return (at least) `n` frames"""
+        return max(0, int(np.floor(self._t + (n-1) * self.step)) + self.taps//2 + 1 - self.taps)
+
+    def steer(self, fill: float) -> None:
+        """Adjusts the ratio to the current fill level (in frames) of the device's buffer - more than at the start, more input is consumed"""
+        if self._target is None:
+            self._fill = self._target = float(fill)
+            return
+        self._fill += (fill - self._fill) * .1
+        self.adjust = 1 + float(np.clip(DRIFT_GAIN * (self._fill - self._target) / params.BUF, -MAX_DRIFT, MAX_DRIFT))
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Resamples the next block (`(frames, channels)`) and returns the result"""
+        if self._hist is None or self._hist.shape[1] != x.shape[1]:
+            self._hist = np.zeros((self.taps, x.shape[1]))
+        h, step = self.taps // 2, self.step
+        buf = np.concatenate((self._hist, x))
+        L = len(buf)
+        k = max(0, int(np.ceil((L - h - self._t) / step)))
+        pos = self._t + step * np.arange(k)
+        i = pos.astype(int)
+        ph = (pos - i) * self._phases
+        p = ph.astype(int)
+        w = (ph - p)[:, None]
+        coef = self._bank[p] * (1 - w) + self._bank[p+1] * w
+        y = np.matmul(coef[:, None, :], buf[i[:, None] + np.arange(1-h, h+1)])[:, 0]
+        self._t += step * k - (L - self.taps)
+        self._hist = buf[L-self.taps:]
+        return y
@@ -0,0 +1,152 @@
+"""A timer-heap shared by all interpreters for precisely timed commands"""
+
+import heapq, itertools, time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Condition, local
+from typing import Any, List, Dict, Tuple, Callable, Optional
+
+from figaro import utils
+
+class Job(object):
+    """
+    A single scheduled job.
+
+    ...
+
+    Attributes
+    ----------
+    due : float
+        When the job is due (`time.perf_counter()` timestamp).
+    fn : Callable[[float], None]
+        The job itself; gets passed its due time.
+    period : Optional[float]
+        The job's period in seconds (if it's repeating).
+    owner : Any
+        Whoever scheduled the job (used for cancelling).
+    cancelled : bool
+        Has the job been cancelled?
+    """
+
+    def __init__(self, due: float, fn: Callable[[float], None], period: Optional[float] = None, owner: Any = None):
+        self.due: float = due
+        self.fn: Callable[[float], None] = fn
+        self.period: Optional[float] = period
+        self.owner: Any = owner
+        self.cancelled: bool = False
+
+    def cancel(self) -> None:
+        """Cancel the job (it's dropped lazily, once it's due)"""
+        self.cancelled = True
+
+class Scheduler(Thread):
+    """
+    Runs jobs at given points in time, using a single thread and a heap - no
+    thread has to sleep per scheduled command. The scheduler thread only
+    dispatches due jobs; they run on a worker thread per owner (in the order
+    they were due), so a slow job (e.g. decoding a sound, or a `pause`) only
+    holds up its own owner's later jobs, never anyone else's.
+
+    A job's due time (not the time it actually woke up at) is made available
+    to the commands it runs (see `due()`), so the channel can start sounds at
+    the exact sample they were scheduled for.
+
+    ...
+
+    Attributes
+    ----------
+    lookahead : float
+        How long (in seconds) before its due time a job is dispatched.
+    _heap : List[Tuple[float, int, Job]]
+        The heap of pending jobs.
+    _seq : itertools.count
+        Tie-breaker for jobs that are due at the same time.
+    _cv : Condition
+        Guards the heap (and the workers) & wakes the scheduler thread.
+    _workers : Dict[Any, ThreadPoolExecutor]
+        The (single-threaded) workers running the jobs, by owner.
+
+    Methods
+    -------
+    add(due, fn, period, owner)
+        Schedule a new job.
+    cancel(owner)
+        Cancel all jobs of the given owner.
+    """
+
+    def __init__(self, lookahead: float = 0.):
+        super(Scheduler, self).__init__(daemon=True)
+        self.lookahead: float = lookahead
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._seq: itertools.count = itertools.count()
+        self._cv: Condition = Condition()
+        self._workers: Dict[Any, ThreadPoolExecutor] = {}
+
+    def add(self, due: float, fn: Callable[[float], None], period: Optional[float] = None, owner: Any = None) -> Job:
+        """Schedule `fn` to be run at `due` (and every `period` seconds after that, if given)"""
+        job = Job(due, fn, period, owner)
+        self._cv.acquire()
+        if not self.is_alive():
+            self.start()
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+        self._cv.notify()
+        self._cv.release()
+        return job
+
+    def cancel(self, owner: Any) -> None:
+        """Cancel all jobs scheduled by `owner` (and let its worker go, once it's done)"""
+        self._cv.acquire()
+        for _, _, j in self._heap:
+            if j.owner is owner:
+                j.cancel()
+        w = self._workers.pop(owner, None)
+        self._cv.release()
+        if w is not None:
+            w.shutdown(wait=False)
+
+    def run(self) -> None:
+        """Pop jobs off the heap as soon as they're (almost) due and hand them to their owner's worker"""
+        while True:
+            self._cv.acquire()
+            while True:
+                wait = self._heap[0][0] - self.lookahead - time.perf_counter() if self._heap else None
+                if wait is not None and wait <= 0:
+                    break
+                self._cv.wait(wait)
+            _, _, job = heapq.heappop(self._heap)
+            if job.period and not job.cancelled:
+                job.due += job.period
+                heapq.heappush(self._heap, (job.due, next(self._seq), job))
+                due = job.due - job.period
+            else:
+                due = job.due
+            if not job.cancelled:
+                w = self._workers.get(job.owner)
+                if w is None:
+                    w = self._workers[job.owner] = ThreadPoolExecutor(1, thread_name_prefix='scheduler')
+                w.submit(self._run, job, due)
+            self._cv.release()
+
+    def _run(self, job: Job, due: float) -> None:
+        """Runs a job (on its owner's worker), unless it was cancelled meanwhile"""
+        if job.cancelled:
+            return
+        _ctx.due = due
+        try:
+            job.fn(due)
+        except Exception as e:
+            utils.printerr(str(e))
+        finally:
+            _ctx.due = None
+
+"""Per-thread info about the job that's currently being run"""
+_ctx: local = local()
+"""The scheduler shared by all interpreters"""
+sched: Scheduler = Scheduler()
+
+def due() -> Optional[float]:
+    """Returns the due time of the job running on the current thread (if any)"""
+    return getattr(_ctx, 'due', None)
+
+def set_due(t: Optional[float]) -> None:
+    """Sets the time the commands run on the current thread are meant to happen at"""
+    _ctx.due = t
@@ -1,33 +1,73 @@
-"""The entry point for the websocket server"""
+"""The entry point for the server - serves the GUI's static files and the websocket API (on `WS_PATH`) from one asyncio loop"""
 
-import jwt, asyncio, websockets, threading, json, os, hashlib, datetime, sys, time, struct, secrets, base64
+import jwt, asyncio, websockets, threading, json, os, hashlib, datetime, sys, time, secrets, base64, http
 import numpy as np
 import pash.shell
 from io import StringIO
 from getpass import getpass
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set, Tuple, List
 
-from figaro import params, utils
+from figaro import params, utils, gui, metrics
 from figaro.channel import Channel
 from figaro.server.models.user import User
 
+"""The path websocket connections are accepted on (everything else is a static file)"""
+WS_PATH: str = '/ws'
+"""The path the metrics are exported on (in Prometheus' text format)"""
+METRICS_PATH: str = '/metrics'
+"""The maximum number of websocket connections open at the same time"""
+MAX_CONN: int = 32
+"""The maximum size (in bytes) of an incoming websocket message"""
+MAX_MSG: int = 1 << 16
+"""How long (in seconds) a verified token is trusted without checking it again"""
+AUTH_TTL: float = 60.
+
 """The configuration of the websocket server"""
 conf: Dict[str, Any] = dict()
 """The main CLI shell"""
 sh: pash.shell.Shell = None
 """The main audio channel"""
 ch: Channel = None
+"""The server's event loop (while it's running)"""
+loop: Optional[asyncio.AbstractEventLoop] = None
+"""The open websocket connections"""
+clients: Set[websockets.server.WebSocketServerProtocol] = set()
+"""Verified tokens and until when they're trusted"""
+auth_cache: Dict[str, float] = dict()
+"""HTTP requests (static files & metrics), by status"""
+HTTP_REQUESTS: metrics.Counter = metrics.REGISTRY.counter('figaro_http_requests_total', 'HTTP requests (static files & metrics).', ('status',))
+"""Websocket connections accepted so far"""
+WS_CONNECTIONS: metrics.Counter = metrics.REGISTRY.counter('figaro_ws_connections_total', 'Websocket connections accepted.')
+"""Websocket connections turned away (because there were too many)"""
+WS_REJECTED: metrics.Counter = metrics.REGISTRY.counter('figaro_ws_rejected_total', 'Websocket connections rejected (too many open).')
+"""Websocket messages received so far"""
+WS_MESSAGES: metrics.Counter = metrics.REGISTRY.counter('figaro_ws_messages_total', 'Websocket messages received.')
+"""How long verifying a token takes (by whether it was cached)"""
+AUTH_SECONDS: metrics.Histogram = metrics.REGISTRY.histogram('figaro_auth_seconds', 'Time it takes to verify a token (in seconds).', ('cached',))
+metrics.REGISTRY.gauge('figaro_ws_clients', 'Open websocket connections.', fn=lambda: len(clients))
 
 def verify_tkn(req: Dict[str, Any]) -> bool:
     """
-    Checks the JWT of the given request for validity.
+    Checks the JWT of the given request for validity (tokens verified in the last `AUTH_TTL` seconds are trusted).
     """
+    t0, now = time.perf_counter(), time.time()
+    raw = req.get('tkn')
+    if raw is not None and auth_cache.get(raw, 0.) > now:
+        AUTH_SECONDS.labels('yes').observe(time.perf_counter() - t0)
+        return True
     try:
-        tkn = jwt.decode(req['tkn'], conf['secret'], algorithms=['HS256'], options={'require': ['exp', 'uname',]})
-        return bool(User.load(tkn['uname']))
+        tkn = jwt.decode(raw, conf['secret'], algorithms=['HS256'], options={'require': ['exp', 'uname',]})
+        if not User.load(tkn['uname']):
+            return False
     # except (jwt.ExpiredSignatureError, jwt.InvalidAlgorithmError, jwt.InvalidSignatureError, KeyError) as e:
     except Exception:
         return False
+    finally:
+        AUTH_SECONDS.labels('no').observe(time.perf_counter() - t0)
+    if len(auth_cache) >= MAX_CONN * 4:
+        auth_cache.clear()
+    auth_cache[raw] = min(now + AUTH_TTL, float(tkn['exp']))
+    return True
 
 async def send_audio(ws: websockets.server.WebSocketServerProtocol, scale: float):
     """
@@ -35,8 +75,8 @@ async def send_audio(ws: websockets.server.WebSocketServerProtocol, scale: float
     """
     while True:
         try:
-            buff = ch.buff * scale
-            await ws.send(struct.pack('f'*len(buff), *buff))
+            buff = ch.buff.mean(axis=1) * scale
+            await ws.send(buff.astype(np.float32).tobytes())
         except websockets.exceptions.ConnectionClosed:
             return
         await asyncio.sleep(0.05)
@@ -52,12 +92,33 @@ async def send_sounds(ws: websockets.server.WebSocketServerProtocol):
             return
         await asyncio.sleep(0.1)
 
+async def _http(path: str, headers: websockets.http.Headers) -> Optional[Tuple[http.HTTPStatus, List[Tuple[str, str]], bytes]]:
+    """
+    Answers plain HTTP requests with the GUI's static files (or the metrics); lets websocket handshakes on `WS_PATH` through (unless there are too many connections).
+    """
+    path = path.split('?')[0]
+    if path == WS_PATH:
+        if len(clients) >= MAX_CONN:
+            WS_REJECTED.inc()
+            return http.HTTPStatus.SERVICE_UNAVAILABLE, [('Retry-After', '5'), ('Content-Length', '0')], b''
+        return None
+    if path == METRICS_PATH:
+        body = metrics.REGISTRY.render().encode()
+        status, hdrs = 200, [('Content-Type', metrics.CONTENT_TYPE), ('Cache-Control', 'no-store'), ('Content-Length', str(len(body)))]
+    else:
+        status, hdrs, body = gui.respond('GET', path, headers)
+    HTTP_REQUESTS.labels(str(status)).inc()
+    return http.HTTPStatus(status), hdrs, body
+
 async def _srv(ws: websockets.server.WebSocketServerProtocol, path: str) -> None:
     """
     Actually dispatch the websocket-requests.
     """
+    clients.add(ws)
+    WS_CONNECTIONS.inc()
     try:
         async for req in ws:
+            WS_MESSAGES.inc()
             try:
                 req = json.loads(req)
             except json.decoder.JSONDecodeError:
@@ -104,6 +165,7 @@ async def _srv(ws: websockets.server.WebSocketServerProtocol, path: str) -> None
                         'msg': 'Authentication failed!',
                         'rid': rid,
                     }))
+                    continue
                 if req['cmd'] == 'get-conf':
                     await ws.send(json.dumps({
                         'success': True,
@@ -152,13 +214,15 @@ async def _srv(ws: websockets.server.WebSocketServerProtocol, path: str) -> None
                 }))
     except websockets.exceptions.ConnectionClosed:
         return
+    finally:
+        clients.discard(ws)
 
 def __start(l: asyncio.AbstractEventLoop) -> None:
     """
-    Start the websocket-request-polling on a separate thread.
+    Start serving (static files & websockets) on a separate thread.
     """
     asyncio.set_event_loop(l)
-    l.run_until_complete(websockets.serve(_srv, params.HOST, params.PORT))
+    l.run_until_complete(websockets.serve(_srv, params.HOST, params.PORT, process_request=_http, max_size=MAX_MSG))
     l.run_forever()
 
 def create_conf_prompt() -> None:
@@ -188,13 +252,25 @@ def create_conf_prompt() -> None:
 
 def start(shell: pash.shell.Shell, channel: Channel) -> None:
     """
-    Starts the server; starts listening for websocket connections
+    Starts the server; starts listening for HTTP requests and websocket connections
     """
-    global conf, sh, ch
+    global conf, sh, ch, loop
     with open(os.path.join(params.BPATH, 'figaro', 'server', 'conf.json')) as f:
         conf = json.load(f)
+    if loop is not None:
+        utils.printwrn('The server is already running ... ')
+        return
     sh = shell
     ch = channel
     loop = asyncio.new_event_loop()
-    t = threading.Thread(target=__start, args=(loop,), daemon=True)
-    t.start()
\ No newline at end of file
+    t = threading.Thread(target=__start, args=(loop,), name='server', daemon=True)
+    t.start()
+
+def stop() -> None:
+    """
+    Stops the server (if it's running).
+    """
+    global loop
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+        loop = None
\ No newline at end of file
@@ -1,9 +1,12 @@
 """Contains sqlite3 wrapper functions"""
 
-import sqlite3
+import sqlite3, time
 from typing import List, Tuple, Optional, Any, Union
 
-from figaro import params
+from figaro import params, metrics
+
+"""How long queries take (in seconds)"""
+QUERY_SECONDS: metrics.Histogram = metrics.REGISTRY.histogram('figaro_db_query_seconds', 'Time it takes to run an SQLite query (in seconds).')
 
 def connect(db_path: str = params.DB_PATH) -> Tuple[sqlite3.Connection, sqlite3.Cursor]:
     """
@@ -18,6 +21,16 @@ def connect(db_path: str = params.DB_PATH) -> Tuple[sqlite3.Connection, sqlite3.
     con = sqlite3.connect(db_path)
     return (con, con.cursor())
 
+def _execute(c: sqlite3.Cursor, query: str, args: Tuple[Any, ...]) -> None:
+    """
+    Executes the given query (and records how long it took).
+    """
+    t = time.perf_counter()
+    try:
+        c.execute(query, args)
+    finally:
+        QUERY_SECONDS.observe(time.perf_counter() - t)
+
 def close(con: sqlite3.Connection) -> None:
     """
     Closes the connection to the sqlite db.
@@ -48,7 +61,7 @@ def exec(query: str, *args: Any, con: Optional[sqlite3.Connection] = None) -> No
         con, c = connect()
     else:
         c = con.cursor()
-    c.execute(query, (*args, ))
+    _execute(c, query, (*args, ))
     if arti:
         close(con)
 
@@ -75,7 +88,7 @@ def fetchone(query: str, *args: Any, con: Optional[sqlite3.Connection] = None) -
         con, c = connect()
     else:
         c = con.cursor()
-    c.execute(query, (*args, ))
+    _execute(c, query, (*args, ))
     res = c.fetchone()
     if arti:
         close(con)
@@ -104,7 +117,7 @@ def fetchall(query: str, *args: Any, con: Optional[sqlite3.Connection] = None) -
         con, c = connect()
     else:
         c = con.cursor()
-    c.execute(query, (*args, ))
+    _execute(c, query, (*args, ))
     res = c.fetchall()
     if arti:
         close(con)
@@ -133,7 +146,7 @@ def exists(query: str, *args: Any, con: Optional[sqlite3.Connection] = None) ->
         con, c = connect()
     else:
         c = con.cursor()
-    c.execute(query, (*args, ))
+    _execute(c, query, (*args, ))
     res = bool(c.fetchone())
     if arti:
         close(con)
@@ -1,10 +1,19 @@
 """Wrapper class for a playable audio file"""
 
-import os, pydub as pyd
+import os, numpy as np, pydub as pyd
 from typing import Optional, Dict, Any
 
 from figaro import params
 
+def fit(data: np.ndarray, channels: int) -> np.ndarray:
+    """Fits frames `(frames, n)` to `channels` channels - averages down to mono, otherwise repeats/drops channels (no copy if nothing changes)"""
+    n = data.shape[1]
+    if n == channels:
+        return data
+    if channels == 1:
+        return data.mean(axis=1, keepdims=True)
+    return data[:, np.arange(channels) % n]
+
 class Sound(object):
     """
     Wrapper for a playable audio file
@@ -21,12 +30,16 @@ class Sound(object):
         The audio file's format string (16 bit int. = 'h', etc.).
     f_size : int
         The format's size in bytes.
+    channels : int
+        The number of channels it's played with (always `params.CHNNLS` - the file's own are mapped with `fit`).
     srate : int
         The sampling rate.
     name : str
         A name for the sound.
     nframes : int
         The number of frames in the file.
+    start : Optional[float]
+        When the sound should start playing (`time.perf_counter()` timestamp).
     _pos : int
         The position in the audio file (the reading position).
 
@@ -36,6 +49,10 @@ class Sound(object):
         Returns the format string.
     read(buff_s)
         Reads from the audio object.
+    read_frames(buff_s)
+        Reads from the audio object, as floats.
+    samples()
+        Gets all samples as floats.
     get_playtime()
         Gets the remaining playtime as a string.
     """
@@ -43,13 +60,15 @@ class Sound(object):
     def __init__(self, fname: str, amp: float = 1.):
         with open(fname, 'rb') as f:
             self.audio: pydub.AudioSegment = pyd.AudioSegment.from_file(f)
-        self.audio = self.audio.set_frame_rate(params.SMPRATE).set_channels(params.CHNNLS)
+        self.audio = self.audio.set_frame_rate(params.SMPRATE)
         self.amp: float = amp
         self.f_size: int = self.audio.sample_width
         self.format: str = self.get_format(self.f_size)
+        self.channels: int = params.CHNNLS
         self.srate: int = self.audio.frame_rate
         self.name: str = os.path.basename(fname)
         self.nframes: int = self.audio.frame_count()
+        self.start: Optional[float] = None
         self._pos: int = 0
         # print(self.f_size, self.format, self.srate, str(self))
 
@@ -59,12 +78,24 @@ class Sound(object):
         return codes[sampwidth] if sampwidth in codes.keys() else ''
 
     def read(self, buff_s: int) -> bytes:
-        """Reads `buff_s` frames from the wave object"""
+        """Reads `buff_s` frames from the wave object (raw, with the file's own channels)"""
         self.nframes -= buff_s
-        data = self.audio.raw_data[self._pos:self._pos+buff_s*self.f_size]
-        self._pos += buff_s*self.f_size
+        data = self.audio.raw_data[self._pos:self._pos+buff_s*self.f_size*self.audio.channels]
+        self._pos += buff_s*self.f_size*self.audio.channels
         return data
 
+    def read_frames(self, buff_s: int) -> np.ndarray:
+        """Reads `buff_s` frames as floats in [-1, 1), `(frames, channels)` (no frames at all at the end)"""
+        return self._decode(self.read(buff_s))
+
+    def _decode(self, raw: bytes) -> np.ndarray:
+        """Converts interleaved raw samples to floats, `(frames, channels)`"""
+        return fit((np.frombuffer(raw, dtype=f'<i{self.f_size}') / 2**(8*self.f_size-1)).reshape(-1, self.audio.channels), self.channels)
+
+    def samples(self) -> np.ndarray:
+        """Gets all of the sound's samples as floats in [-1, 1), `(frames, channels)`"""
+        return self._decode(self.audio.raw_data)
+
     def get_playtime(self) -> str:
         """Gets the remaining playtime as a string"""
         s = self.nframes/self.srate
@@ -2,7 +2,7 @@
 
 import numpy as np, json
 from threading import Lock
-from typing import List, Optional
+from typing import List, Tuple, Optional
 
 from figaro.filters.filter import Filter
 
@@ -14,10 +14,10 @@ class Transformer(object):
 
     Attributes
     ----------
-    filters : List[Filter]
-        A list containing all filters.
+    filters : Tuple[Filter, ...]
+        All filters (an immutable snapshot - replaced as a whole, so applying them needs no lock).
     _fil_mut : Lock
-        A mutex for the filter list.
+        Serializes changes of the filters.
 
     Methods
     -------
@@ -26,28 +26,30 @@ class Transformer(object):
     """
 
     def __init__(self, filters: Optional[List[Filter]] = None):
-        self.filters: List[Filter] = filters or []
+        self.filters: Tuple[Filter, ...] = tuple(filters or ())
         self._fil_mut: Lock = Lock()
 
     def apply_all(self, data: np.ndarray) -> np.ndarray:
         """Apply all filters and return the result"""
-        self._fil_mut.acquire()
         for f in self.filters:
             data = f(data)
-        self._fil_mut.release()
         return data
 
     def add_filter(self, f: Filter) -> None:
         """Add a filter to the filters list"""
         self._fil_mut.acquire()
-        self.filters.append(f)
+        self.filters = self.filters + (f,)
         self._fil_mut.release()
 
     def del_filter(self, i: int) -> None:
         """Remove the filter with the given index from the filter list"""
         self._fil_mut.acquire()
-        del self.filters[i]
-        self._fil_mut.release()
+        try:
+            fils = list(self.filters)
+            del fils[i]
+            self.filters = tuple(fils)
+        finally:
+            self._fil_mut.release()
 
     def __call__(self, data: np.ndarray) -> np.ndarray:
         """Apply all filters (calls `apply_all`)"""
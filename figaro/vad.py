@@ -0,0 +1,102 @@
+"""Voice activity detection - gates the channel's input, so silence costs (almost) nothing"""
+
+import numpy as np
+from typing import List, Dict, Any
+
+from figaro import params
+from figaro.filters.filter import Filter
+
+class Gate(Filter.Filter):
+    """
+    A noise gate driven by a simple voice activity detector.
+
+    Every block is split into frames of `FRAME` ms (a block shorter than that
+    is a single frame), whose level (RMS) and zero-crossing rate are computed
+    at once. A frame above `threshold` opens the gate; while it's open,
+    frames that are at most `HYST` dB quieter keep it open - as long as they
+    don't cross zero too often (i.e. aren't just noise). After `hold` ms
+    without any of those frames, the gate closes. While it's closed, the input
+    is muted and the channel's filters only run in their cheap idle mode (see
+    `Filter.idle`).
+
+    ...
+
+    Attributes
+    ----------
+    FRAME : float
+        The length of an analysis frame in ms.
+    HYST : float
+        How much quieter (dB) than `threshold` frames keeping the gate open may be.
+    ZCR : float
+        The maximum zero-crossing rate (crossings per sample) of frames keeping the gate open.
+    threshold : float
+        The level (dBFS) that opens the gate.
+    hold : float
+        How long (ms) the gate stays open after the last voiced frame.
+    active : bool
+        Is the gate currently open?
+    silent : bool
+        Was the last block muted completely (i.e. not even faded out)?
+    _hold : float
+        The time (ms) left until the gate closes.
+    _gain : float
+        The gain the last block ended with (gate transitions are faded).
+
+    Methods
+    -------
+    apply(data: np.ndarray)
+        Gates the data and returns the result.
+    """
+
+    FRAME: float = 10.
+    HYST: float = 6.
+    ZCR: float = .3
+    PARAMS = dict(threshold=float, hold=float)
+
+    def __init__(self, threshold: float = -45., hold: float = 250.):
+        if hold < 0:
+            raise Exception('The hold time can\'t be negative ... ')
+        self.threshold: float = threshold
+        self.hold: float = hold
+        self.active: bool = True
+        self.silent: bool = False
+        self._hold: float = hold
+        self._gain: float = 1.
+
+    def _update(self, name: str) -> None:
+        if self.hold < 0:
+            raise Exception('The hold time can\'t be negative ... ')
+
+    def apply(self, data: np.ndarray) -> np.ndarray:
+        n = len(data)
+        m = max(1, min(int(Gate.FRAME * params.SMPRATE / 1000), n))
+        k = n // m
+        x = data.reshape(n, -1)[:k*m].mean(axis=1).reshape(k, m)
+        db = 10*np.log10(np.maximum((x**2).mean(axis=1), 1e-18))
+        zcr = np.count_nonzero(np.signbit(x[:, 1:]) != np.signbit(x[:, :-1]), axis=1) / m
+        voiced = (db > self.threshold) | (self.active & (db > self.threshold - Gate.HYST) & (zcr < Gate.ZCR))
+        if voiced.any():
+            self.active = True
+            self._hold = self.hold - (k - 1 - np.flatnonzero(voiced)[-1]) * m / params.SMPRATE * 1000
+        else:
+            self._hold -= n / params.SMPRATE * 1000
+            if self._hold <= 0:
+                self.active = False
+        gain = 1. if self.active else 0.
+        self.silent = gain == self._gain == 0.
+        if gain == self._gain:
+            return data if self.active else np.zeros(data.shape)
+        g = np.linspace(self._gain, gain, n, endpoint=False).reshape((-1,) + (1,)*(data.ndim-1))
+        self._gain = gain
+        return data * g
+
+    def toJSON(self) -> Dict[str, Any]:
+        return dict(name='gate', threshold=self.threshold, hold=self.hold, active=self.active)
+
+    def __str__(self) -> str:
+        return f'Gate({self.threshold:.1f}dB, {self.hold:.0f}ms hold, {"open" if self.active else "closed"})'
+
+    @classmethod
+    def start(cls, args: List[str]) -> "Gate":
+        """Creates a gate from command line arguments"""
+        return Gate(*[float(a) for a in args if a.strip()][:2])
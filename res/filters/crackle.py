@@ -22,12 +22,17 @@ class Crackle(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
 
+        PARAMS = dict(fac=parse_perc)
+
         def __init__(self, fac: float):
             self.fac: float = fac
 
         def apply(self, data: np.ndarray) -> np.ndarray:
-            ifac = 1 - .9 * self.fac
-            return data.clip(data.min() * ifac, data.max() * ifac) * (.5 / ifac)
+            ifac = 1 - .9 * self._ramp('fac', data)
+            return data.clip(data.min(axis=0) * ifac, data.max(axis=0) * ifac) * (.5 / ifac)
+
+        def idle(self, data: np.ndarray) -> np.ndarray:
+            return data
 
         def toJSON(self) -> Dict[str, Any]:
             return dict(name='crackle', fac=self.fac)
@@ -27,6 +27,8 @@ class Echo(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
 
+        PARAMS = dict(scale=parse_perc, pause=float)
+
         def __init__(self, scale: float, pause: float):
             self.scale: float = scale
             self.pause: float = pause
@@ -40,7 +42,7 @@ class Echo(figaro.filters.filter.Filter):
                     c = self._q[0][1]
                     self._q = self._q[1:]
             data += c
-            self._q.append((now, data * self.scale))
+            self._q.append((now, data * self._ramp('scale', data)))
             return data
 
         def toJSON(self) -> Dict[str, Any]:
@@ -0,0 +1,90 @@
+"""A parametric equalizer for audio"""
+
+import numpy as np
+from typing import List, Tuple, Dict, Any
+
+from figaro import params
+import figaro.filters.filter, figaro.filters.sos
+
+"""A single band of the equalizer (type, frequency, gain, q)"""
+Band = Tuple[str, float, float, float]
+
+class EQ(figaro.filters.filter.Filter):
+    class Filter(figaro.filters.sos.Filter):
+        """
+        A parametric equalizer with any number of bands, all of them run as
+        a single cascade of biquads.
+
+        ...
+
+        Attributes
+        ----------
+        bands : List[Band]
+            The equalizer's bands.
+
+        Methods
+        -------
+        apply(data: np.ndarray)
+            Applies the filter and returns the result.
+        set(name: str, value: str)
+            Changes a band's parameter; `name` is `<band-index>.<freq|gain|q>`.
+        """
+
+        def __init__(self, bands: List[Band]):
+            if not bands:
+                raise Exception('The equalizer needs at least one band ... ')
+            self.bands: List[Band] = bands
+            super(EQ.Filter, self).__init__()
+
+        def _design(self) -> np.ndarray:
+            return np.array([figaro.filters.sos.design(k, f, params.SMPRATE, q, g) for k, f, g, q in self.bands])
+
+        def set(self, name: str, value: str) -> None:
+            fields = ['freq', 'gain', 'q']
+            i, _, field = name.partition('.')
+            if not i.isdigit() or int(i) >= len(self.bands) or field not in fields:
+                raise Exception(f'Unknown parameter "{name}" (available: <0-{len(self.bands)-1}>.<{"|".join(fields)}>) ... ')
+            i = int(i)
+            bands = list(self.bands)
+            b = list(bands[i])
+            b[1+fields.index(field)] = float(value)
+            bands[i] = tuple(b)
+            figaro.filters.filter.Filter.Filter._set_mut.acquire()
+            old, self.bands = self.bands, bands
+            try:
+                self._update('bands')
+            except Exception:
+                self.bands = old
+                raise
+            finally:
+                figaro.filters.filter.Filter.Filter._set_mut.release()
+
+        def toJSON(self) -> Dict[str, Any]:
+            return dict(name='eq', bands=[dict(type=k, freq=f, gain=g, q=q) for k, f, g, q in self.bands])
+
+        def __call__(self, data: np.ndarray) -> np.ndarray:
+            return self.apply(data)
+
+        def __str__(self) -> str:
+            return f'EQ({len(self.bands)} bands)'
+
+    @classmethod
+    def parse_band(cls, s: str) -> Band:
+        """Parses a band definition - `<type>:<frequency>[:<gain-dB>[:<q>]]`"""
+        p = s.split(':')
+        if len(p) < 2 or len(p) > 4:
+            raise Exception(f'Invalid band "{s}" (expected <type>:<frequency>[:<gain-dB>[:<q>]]) ... ')
+        return (p[0].lower(), float(p[1]), float(p[2]) if len(p) > 2 else 0., float(p[3]) if len(p) > 3 else .707)
+
+    @classmethod
+    def start(cls, args: List[str]) -> "EQ.Filter":
+        args = [a.strip() for a in args if a.strip()]
+        if not args:
+            raise Exception('Missing parameters <type>:<frequency>[:<gain-dB>[:<q>]] ... ')
+        return EQ.Filter([EQ.parse_band(a) for a in args])
+
+    @classmethod
+    def html(cls) -> str:
+        return '''
+            <input type="text" value="lowshelf:120:0 peak:1000:0:1 highshelf:8000:0" name="bands" />
+        '''
@@ -0,0 +1,60 @@
+"""High-pass filter for audio"""
+
+import numpy as np
+from typing import List, Dict, Any
+
+from figaro import params
+import figaro.filters.filter, figaro.filters.sos
+
+class Highpass(figaro.filters.filter.Filter):
+    class Filter(figaro.filters.sos.Filter):
+        """
+        Removes frequencies below the cutoff from audio.
+
+        ...
+
+        Attributes
+        ----------
+        freq : float
+            The cutoff frequency in Hz.
+        q : float
+            The filter's quality factor (resonance).
+
+        Methods
+        -------
+        apply(data: np.ndarray)
+            Applies the filter and returns the result.
+        """
+
+        PARAMS = dict(freq=float, q=float)
+
+        def __init__(self, freq: float, q: float = .707):
+            self.freq: float = freq
+            self.q: float = q
+            super(Highpass.Filter, self).__init__()
+
+        def _design(self) -> np.ndarray:
+            return figaro.filters.sos.design('highpass', self.freq, params.SMPRATE, self.q)
+
+        def toJSON(self) -> Dict[str, Any]:
+            return dict(name='highpass', freq=self.freq, q=self.q)
+
+        def __call__(self, data: np.ndarray) -> np.ndarray:
+            return self.apply(data)
+
+        def __str__(self) -> str:
+            return f'Highpass({self.freq:.0f}Hz, Q={self.q:.2f})'
+
+    @classmethod
+    def start(cls, args: List[str]) -> "Highpass.Filter":
+        args = [a.strip() for a in args if a.strip()]
+        if not args:
+            raise Exception('Missing parameters <frequency> [q] ... ')
+        return Highpass.Filter(float(args[0]), *map(float, args[1:2]))
+
+    @classmethod
+    def html(cls) -> str:
+        return '''
+            <input type="range" min="20" max="20000" step="1" value="80" name="freq" />
+            <input type="range" min="0.1" max="10" step="0.01" value="0.707" name="q" />
+        '''
@@ -1,20 +1,60 @@
 """A noise filter for audio"""
 
-import numpy as np
-from typing import List, Dict, Any
+import numpy as np, itertools
+from typing import List, Dict, Any, Optional, Iterator
 
 from figaro.utils import parse_perc
 import figaro.filters.filter
 
+def _onepole(x: np.ndarray, a: float, chunk: int = 64) -> np.ndarray:
+    """Streams `x` through the one-pole filter y[n] = x[n] + a*y[n-1], `chunk` samples at a time"""
+    y = np.empty(len(x))
+    k = np.arange(1, chunk+1)
+    pw, ipw = a**k, a**-(k-1.)
+    prev = 0.
+    for i in range(0, len(x), chunk):
+        c = x[i:i+chunk]
+        m = len(c)
+        y[i:i+m] = pw[:m]*prev + pw[:m]/a*np.cumsum(c*ipw[:m])
+        prev = y[i+m-1]
+    return y
+
 class Noise(figaro.filters.filter.Filter):
+    """The colors of noise that are available"""
+    COLORS: List[str] = ['white', 'pink', 'brown']
+    """The length of the precomputed noise tables"""
+    TABLE_SIZE: int = 1 << 18
+    """The largest block that can be read from a table as a plain view"""
+    GUARD: int = 8192
+
     class Filter(figaro.filters.filter.Filter.Filter):
         """
         Adds noise to audio.
 
+        The noise is precomputed once into a large table (colored noise is
+        generated by streaming white noise through IIR filters) that is then
+        read as a rotating view, so processing a block doesn't allocate. Every
+        channel reads from a different part of the table, so the channels'
+        noise is uncorrelated.
+
         Attributes
         ----------
-        amp : float 
+        amp : float
             The amplitude.
+        color : str
+            The noise's color (white, pink or brown).
+        seed : Optional[int]
+            The seed for the random generator (same seed, same noise).
+        _rng : np.random.Generator
+            The random generator.
+        _table : np.ndarray
+            The precomputed noise (with the first `GUARD` samples repeated at the end).
+        _pos : int
+            The current read position in the table.
+        _jumps : Iterator[int]
+            Precomputed random read positions (white noise jumps around the table).
+        _out : np.ndarray
+            Preallocated buffer for the scaled noise.
 
         Methods
         -------
@@ -22,30 +62,93 @@ class Noise(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
 
-        def __init__(self, amp: float):
+        PARAMS = dict(amp=parse_perc)
+
+        def __init__(self, amp: float, color: str = 'white', seed: Optional[int] = None):
+            if color not in Noise.COLORS:
+                raise Exception(f'Unknown color "{color}" (available: {", ".join(Noise.COLORS)}) ... ')
             self.amp: float = amp
+            self.color: str = color
+            self.seed: Optional[int] = seed
+            self._rng: np.random.Generator = np.random.default_rng(seed)
+            self._table: np.ndarray = Noise.table(self._rng, color)
+            self._pos: int = 0
+            self._jumps: Iterator[int] = itertools.cycle(self._rng.integers(Noise.TABLE_SIZE, size=4099).tolist())
+            self._out: np.ndarray = np.empty(0)
 
         def apply(self, data: np.ndarray) -> np.ndarray:
-            return data + (np.random.rand(*data.shape) - .5) * .05 * self.amp
+            n = len(data)
+            if self._out.shape != data.shape:
+                self._out = np.empty(data.shape)
+            if self.color == 'white':
+                self._pos = next(self._jumps)
+            if self._out.ndim == 1:
+                self._read(self._pos, self._out)
+            else:
+                c = self._out.shape[1]
+                for i in range(c):
+                    self._read((self._pos + i*Noise.TABLE_SIZE//c) % Noise.TABLE_SIZE, self._out[:, i])
+            self._out *= self._ramp('amp', data)
+            self._pos = (self._pos + n) % Noise.TABLE_SIZE
+            data += self._out
+            return data
+
+        def _read(self, pos: int, out: np.ndarray) -> None:
+            """Reads `len(out)` samples of (scaled) noise from the table, starting at `pos`"""
+            n = len(out)
+            if n <= Noise.GUARD:
+                np.multiply(self._table[pos:pos+n], .05, out=out)
+            else:
+                np.multiply(self._table.take(np.arange(pos, pos+n), mode='wrap'), .05, out=out)
 
         def toJSON(self) -> Dict[str, Any]:
-            return dict(name='noise', amp=self.amp)
+            return dict(name='noise', amp=self.amp, color=self.color, seed=self.seed)
 
         def __call__(self, data: np.ndarray) -> np.ndarray:
             return self.apply(data)
 
         def __str__(self) -> str:
-            return f'Noise({self.amp*100:.2f}%)'
+            return f'Noise({self.amp*100:.2f}%, {self.color})'
+
+    @classmethod
+    def table(cls, rng: np.random.Generator, color: str) -> np.ndarray:
+        """Precomputes a (seamlessly looping) noise table of the given color, with the RMS of the classic uniform noise"""
+        n = Noise.TABLE_SIZE
+        if color == 'white':
+            t = rng.random(n) - .5
+        else:
+            w = rng.standard_normal(n + Noise.GUARD)
+            if color == 'pink':
+                # Paul Kellet's refined pink noise filter
+                t = sum(g * _onepole(w, a) for a, g in (
+                    (.99886, .0555179), (.99332, .0750759), (.96900, .1538520),
+                    (.86650, .3104856), (.55000, .5329522), (-.7616, -.0168980),
+                )) + .5362 * w + .115926 * np.concatenate(([0.], w[:-1]))
+            else:
+                t = _onepole(w, .998)
+            t -= t.mean()
+            fade = np.linspace(0., 1., Noise.GUARD)
+            t[:Noise.GUARD] = t[:Noise.GUARD] * fade + t[n:] * (1. - fade)
+            t = t[:n]
+            t *= (1/12)**.5 / t.std()
+        return np.concatenate((t, t[:Noise.GUARD]))
 
     @classmethod
     def start(cls, args: List[str]) -> "Noise.Filter":
         args = [a.strip() for a in args if a.strip()]
         if not args:
-            raise Exception('Missing parameter <amplitude> ... ')
-        return Noise.Filter(parse_perc(args[0]))
+            raise Exception('Missing parameter <amplitude> [color] [seed] ... ')
+        color = args[1].lower() if len(args) > 1 else 'white'
+        seed = int(args[2]) if len(args) > 2 else None
+        return Noise.Filter(parse_perc(args[0]), color, seed)
 
     @classmethod
     def html(cls) -> str:
         return '''
             <input type="range" min="0" max="1" step="0.01" value="0.3" name="amplitude" />
-        '''
\ No newline at end of file
+            <select name="color">
+                <option value="white">white</option>
+                <option value="pink">pink</option>
+                <option value="brown">brown</option>
+            </select>
+        '''
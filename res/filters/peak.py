@@ -0,0 +1,64 @@
+"""Peaking filter for audio"""
+
+import numpy as np
+from typing import List, Dict, Any
+
+from figaro import params
+import figaro.filters.filter, figaro.filters.sos
+
+class Peak(figaro.filters.filter.Filter):
+    class Filter(figaro.filters.sos.Filter):
+        """
+        Boosts or cuts a band of frequencies of audio.
+
+        ...
+
+        Attributes
+        ----------
+        freq : float
+            The band's center frequency in Hz.
+        gain : float
+            The gain in dB.
+        q : float
+            The band's quality factor (narrowness).
+
+        Methods
+        -------
+        apply(data: np.ndarray)
+            Applies the filter and returns the result.
+        """
+
+        PARAMS = dict(freq=float, gain=float, q=float)
+
+        def __init__(self, freq: float, gain: float, q: float = 1.):
+            self.freq: float = freq
+            self.gain: float = gain
+            self.q: float = q
+            super(Peak.Filter, self).__init__()
+
+        def _design(self) -> np.ndarray:
+            return figaro.filters.sos.design('peak', self.freq, params.SMPRATE, self.q, self.gain)
+
+        def toJSON(self) -> Dict[str, Any]:
+            return dict(name='peak', freq=self.freq, gain=self.gain, q=self.q)
+
+        def __call__(self, data: np.ndarray) -> np.ndarray:
+            return self.apply(data)
+
+        def __str__(self) -> str:
+            return f'Peak({self.freq:.0f}Hz, {self.gain:+.1f}dB, Q={self.q:.2f})'
+
+    @classmethod
+    def start(cls, args: List[str]) -> "Peak.Filter":
+        args = [a.strip() for a in args if a.strip()]
+        if len(args) < 2:
+            raise Exception('Missing parameters <frequency> <gain-dB> [q] ... ')
+        return Peak.Filter(*map(float, args[:3]))
+
+    @classmethod
+    def html(cls) -> str:
+        return '''
+            <input type="range" min="20" max="20000" step="1" value="1000" name="freq" />
+            <input type="range" min="-24" max="24" step="0.5" value="0" name="gain" />
+            <input type="range" min="0.1" max="10" step="0.01" value="1" name="q" />
+        '''
@@ -24,20 +24,25 @@ class Pitch(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
     
+        PARAMS = dict(fac=parse_perc)
+
         def __init__(self, fac: float):
             self.fac: float = fac
     
         def apply(self, data: np.ndarray) -> np.ndarray:
-            freq = np.fft.rfft(data)
+            freq = np.fft.rfft(data, axis=0)
             N = len(freq)
-            sh_freq = np.zeros(N, freq.dtype)
+            sh_freq = np.zeros(freq.shape, freq.dtype)
             S = int(np.round(self.fac if self.fac > 0 else N + self.fac, 0))
             s = int(N-S)
             sh_freq[:S] = freq[s:]
             sh_freq[S:] = freq[:s]
-            sh_chunk = np.fft.irfft(sh_freq)
+            sh_chunk = np.fft.irfft(sh_freq, len(data), axis=0)
             return sh_chunk.astype(data.dtype)
     
+        def idle(self, data: np.ndarray) -> np.ndarray:
+            return data
+
         def toJSON(self) -> Dict[str, Any]:
             return dict(name='pitch', fac=self.fac)
     
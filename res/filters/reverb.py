@@ -0,0 +1,98 @@
+"""A convolution reverb for audio"""
+
+import os, numpy as np
+from typing import List, Tuple, Dict, Any
+
+from figaro import params
+from figaro.sound import Sound
+from figaro.utils import parse_perc
+import figaro.filters.filter, figaro.filters.conv
+
+class Reverb(figaro.filters.filter.Filter):
+    """Spectra of all impulse responses in use, per (path, mtime, block size)"""
+    _cache: Dict[Tuple[str, float, int], np.ndarray] = {}
+
+    class Filter(figaro.filters.filter.Filter.Filter):
+        """
+        Convolves audio with an impulse response (a room, a speaker cabinet, ...).
+
+        ...
+
+        Attributes
+        ----------
+        fname : str
+            The impulse response's file.
+        wet : float
+            The level of the reverberated signal.
+        dry : float
+            The level of the original signal.
+        ir : np.ndarray
+            The impulse response (downmixed to mono, normalized to unit energy; applied to every channel).
+        _conv : Optional[figaro.filters.conv.Convolver]
+            The convolver (created once the block size is known).
+        _quiet : int
+            For how many samples the input has been silent (once the tail has rung out, silence is skipped).
+
+        Methods
+        -------
+        apply(data: np.ndarray)
+            Applies the filter and returns the result.
+        """
+
+        PARAMS = dict(wet=parse_perc, dry=parse_perc)
+
+        def __init__(self, fname: str, wet: float = .5, dry: float = 1.):
+            self.fname: str = fname
+            self.wet: float = wet
+            self.dry: float = dry
+            self.ir: np.ndarray = Sound(fname).samples().mean(axis=1)
+            self.ir /= max(np.sqrt(np.sum(self.ir**2)), 1e-9)
+            self._conv: figaro.filters.conv.Convolver = None
+            self._quiet: int = 0
+
+        def apply(self, data: np.ndarray) -> np.ndarray:
+            if self._conv is None or self._conv.bsize != len(data):
+                key = (self.fname, os.path.getmtime(self.fname), len(data))
+                if key not in Reverb._cache:
+                    Reverb._cache[key] = figaro.filters.conv.spectra(self.ir, len(data))
+                self._conv = figaro.filters.conv.Convolver(Reverb._cache[key])
+            self._quiet = 0
+            return data * self._ramp('dry', data) + self._conv.process(data) * self._ramp('wet', data)
+
+        def idle(self, data: np.ndarray) -> np.ndarray:
+            if self._quiet > len(self.ir) + len(data):
+                if self._conv is not None:
+                    self._conv.reset()
+                return data
+            q = self._quiet + len(data)
+            data = self.apply(data)
+            self._quiet = q
+            return data
+
+        def toJSON(self) -> Dict[str, Any]:
+            return dict(name='reverb', ir=os.path.basename(self.fname), wet=self.wet, dry=self.dry)
+
+        def __call__(self, data: np.ndarray) -> np.ndarray:
+            return self.apply(data)
+
+        def __str__(self) -> str:
+            return f'Reverb({os.path.basename(self.fname)}, {self.wet*100:.2f}% wet)'
+
+    @classmethod
+    def start(cls, args: List[str]) -> "Reverb.Filter":
+        args = [a.strip() for a in args if a.strip()]
+        if not args:
+            raise Exception('Missing parameters <impulse-response> [wet] [dry] ... ')
+        fname = args[0]
+        if not os.path.isfile(fname):
+            fname = os.path.join(params.BPATH, 'res', 'irs', fname)
+        if not os.path.isfile(fname):
+            raise Exception(f'File "{args[0]}" doesn\'t exist ... ')
+        return Reverb.Filter(fname, *map(parse_perc, args[1:3]))
+
+    @classmethod
+    def html(cls) -> str:
+        return '''
+            <input type="text" name="ir" />
+            <input type="range" min="0" max="1" step="0.01" value="0.5" name="wet" />
+        '''
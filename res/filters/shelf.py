@@ -0,0 +1,72 @@
+"""Shelving filter for audio"""
+
+import numpy as np
+from typing import List, Dict, Any
+
+from figaro import params
+import figaro.filters.filter, figaro.filters.sos
+
+class Shelf(figaro.filters.filter.Filter):
+    class Filter(figaro.filters.sos.Filter):
+        """
+        Boosts or cuts the lows or highs of audio.
+
+        ...
+
+        Attributes
+        ----------
+        side : str
+            Which frequencies to boost/cut (`low` or `high`).
+        freq : float
+            The shelf's corner frequency in Hz.
+        gain : float
+            The gain in dB.
+        q : float
+            The shelf's quality factor (slope).
+
+        Methods
+        -------
+        apply(data: np.ndarray)
+            Applies the filter and returns the result.
+        """
+
+        PARAMS = dict(freq=float, gain=float, q=float)
+
+        def __init__(self, side: str, freq: float, gain: float, q: float = .707):
+            if side not in ('low', 'high'):
+                raise Exception(f'Unknown shelf "{side}" (available: low, high) ... ')
+            self.side: str = side
+            self.freq: float = freq
+            self.gain: float = gain
+            self.q: float = q
+            super(Shelf.Filter, self).__init__()
+
+        def _design(self) -> np.ndarray:
+            return figaro.filters.sos.design(self.side + 'shelf', self.freq, params.SMPRATE, self.q, self.gain)
+
+        def toJSON(self) -> Dict[str, Any]:
+            return dict(name='shelf', side=self.side, freq=self.freq, gain=self.gain, q=self.q)
+
+        def __call__(self, data: np.ndarray) -> np.ndarray:
+            return self.apply(data)
+
+        def __str__(self) -> str:
+            return f'Shelf({self.side}, {self.freq:.0f}Hz, {self.gain:+.1f}dB)'
+
+    @classmethod
+    def start(cls, args: List[str]) -> "Shelf.Filter":
+        args = [a.strip() for a in args if a.strip()]
+        if len(args) < 3:
+            raise Exception('Missing parameters <low|high> <frequency> <gain-dB> [q] ... ')
+        return Shelf.Filter(args[0].lower(), *map(float, args[1:4]))
+
+    @classmethod
+    def html(cls) -> str:
+        return '''
+            <select name="side">
+                <option value="low">low</option>
+                <option value="high">high</option>
+            </select>
+            <input type="range" min="20" max="20000" step="1" value="200" name="freq" />
+            <input type="range" min="-24" max="24" step="0.5" value="0" name="gain" />
+        '''
@@ -24,6 +24,8 @@ class Trip(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
 
+        PARAMS = dict(scale=parse_perc)
+
         def __init__(self, scale: float):
             self.scale: float = scale
             self._prev: np.ndarray = None
@@ -31,7 +33,7 @@ class Trip(figaro.filters.filter.Filter):
         def apply(self, data: np.ndarray) -> np.ndarray:
             if self._prev is None:
                 self._prev = np.zeros(data.shape)
-            data, self._prev = data + self._prev, self._prev * self.scale + data
+            data, self._prev = data + self._prev, self._prev * self._ramp('scale', data) + data
             return data
 
         def toJSON(self) -> Dict[str, Any]:
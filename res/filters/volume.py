@@ -24,11 +24,16 @@ class Volume(figaro.filters.filter.Filter):
             Applies the filter and returns the result.
         """
 
+        PARAMS = dict(fac=parse_perc)
+
         def __init__(self, fac: float):
             self.fac: float = fac
 
         def apply(self, data: np.ndarray) -> np.ndarray:
-            return data*self.fac
+            return data*self._ramp('fac', data)
+
+        def idle(self, data: np.ndarray) -> np.ndarray:
+            return data
 
         def toJSON(self) -> Dict[str, Any]:
             return dict(name='volume', fac=self.fac)
@@ -0,0 +1,107 @@
+"""Tests the virtual devices - and the channel running on them, without any sound card"""
+
+import os, time, wave, tempfile, unittest, numpy as np
+
+from figaro import params
+from figaro.device import Sine, Noise, FileReader, FileWriter, Null, open_device
+from figaro.channel import Channel
+from figaro.recorder import writer
+
+def read_wav(fname: str) -> np.ndarray:
+    """Reads a 16 bit .wav file as floats, `(frames, channels)`"""
+    with wave.open(fname, 'rb') as w:
+        return (np.frombuffer(w.readframes(w.getnframes()), dtype='<i2') / 2**15).reshape(-1, w.getnchannels())
+
+class TestChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sine_to_file(self):
+        out = os.path.join(self.tmp.name, 'out.wav')
+        ch = Channel(ist=[open_device('sine:440:fast', False)], ost=[open_device(f'file:{out}', True)])
+        ch.start()
+        end = time.perf_counter() + 10.
+        while ch.stats()['blocks'] < 50 and time.perf_counter() < end:
+            time.sleep(.01)
+        ch.kill()
+        ch.join()
+        ch.kill_all()
+        x = read_wav(out)
+        self.assertGreaterEqual(ch.stats()['blocks'], 50)
+        self.assertEqual(x.shape[1], params.CHNNLS)
+        self.assertGreaterEqual(len(x), 40 * params.BUF)
+        self.assertEqual(len(x) % params.BUF, 0)
+        y = x[params.BUF:, 0]
+        self.assertAlmostEqual(np.abs(y).max(), .5, delta=.01)
+        self.assertAlmostEqual(20*np.log10(np.sqrt((y**2).mean())), 20*np.log10(.5/np.sqrt(2)), delta=.5)
+        crossings = np.count_nonzero(np.signbit(y[1:]) != np.signbit(y[:-1]))
+        self.assertAlmostEqual(crossings / (len(y) / params.SMPRATE), 880, delta=10)
+
+class TestOpenDevice(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_generators(self):
+        d = open_device('sine:220:.2:fast', False)
+        self.assertIsInstance(d, Sine)
+        self.assertEqual((d.freq, d.amp, d.realtime), (220., .2, False))
+        d = open_device('Sine', False)
+        self.assertEqual((d.freq, d.amp, d.realtime), (440., .5, True))
+        d = open_device('noise:.3:7', False)
+        self.assertIsInstance(d, Noise)
+        self.assertEqual(d.amp, .3)
+        self.assertTrue(np.array_equal(d.read_frames(64), open_device('noise:.3:7', False).read_frames(64)))
+
+    def test_outputs(self):
+        d = open_device('null:fast', True)
+        self.assertIsInstance(d, Null)
+        self.assertFalse(d.realtime)
+        fname = os.path.join(self.tmp.name, 'out.wav')
+        d = open_device(f'file:{fname}', True)
+        self.assertIsInstance(d, FileWriter)
+        d.write_frames(np.full((100, params.CHNNLS), .25))
+        d.close()
+        self.assertEqual(read_wav(fname).shape, (100, params.CHNNLS))
+
+    def test_file_reader(self):
+        fname = os.path.join(self.tmp.name, 'in.wav')
+        write, close = writer(fname, 1)
+        write(np.linspace(-.5, .5, 100)[:, None])
+        close()
+        d = open_device(f'file:{fname}:loop:fast', False)
+        self.assertIsInstance(d, FileReader)
+        self.assertTrue(d.loop)
+        self.assertFalse(d.realtime)
+        x = d.read_frames(250)
+        self.assertEqual(len(x), 250)
+        self.assertTrue(np.allclose(x[:100], x[100:200]))
+        d = open_device(f'file:{fname}', False)
+        x = d.read_frames(250)
+        self.assertFalse(x[100:].any())
+
+    def test_errors(self):
+        for spec, output, msg in [
+            ('bogus', False, 'Unknown device'),
+            ('null', False, 'only be used as an output'),
+            ('sine', True, 'only be used as an input'),
+            ('noise:fast', True, 'only be used as an input'),
+            ('file', False, 'Missing filename'),
+            ('file:fast', True, 'Missing filename'),
+            ('3', False, 'PyAudio isn\'t available'),
+        ]:
+            with self.subTest(spec=spec, output=output):
+                with self.assertRaisesRegex(Exception, msg):
+                    open_device(spec, output)
+        with self.assertRaises(ValueError):
+            open_device('sine:loud', False)
+
+if __name__ == '__main__':
+    unittest.main()